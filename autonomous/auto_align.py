@@ -0,0 +1,131 @@
+import math
+from commands2 import Command, cmd
+from dataclasses import dataclass
+from phoenix6 import swerve
+from wpimath.controller import ProfiledPIDController, ProfiledPIDControllerRadians
+from wpimath.geometry import Pose2d
+from wpimath.trajectory import TrapezoidProfile, TrapezoidProfileRadians
+from subsystems.command_swerve_drivetrain import CommandSwerveDrivetrain
+from subsystems.elevator.command import Elevator, ElevatorMode, ElevatorPositions
+from utils.field import TargetKind, nearest_target
+from utils.speed_limiter import SpeedLimiter
+
+# Translation and rotation profiles for alignment
+ALIGN_TRANSLATION_P = 4.0
+ALIGN_MAX_VELOCITY = 2.5  # m/s
+ALIGN_MAX_ACCELERATION = 3.0  # m/s^2
+ALIGN_ROTATION_P = 5.0
+ALIGN_MAX_ANGULAR_VELOCITY = math.pi * 2  # rad/s
+ALIGN_MAX_ANGULAR_ACCELERATION = math.pi * 4  # rad/s^2
+ALIGN_TRANSLATION_TOLERANCE = 0.02  # m
+ALIGN_ROTATION_TOLERANCE = math.radians(2)
+
+@dataclass
+class AlignState:
+    target: Pose2d | None = None
+    # Translation (speed, acceleration) constraints the profiles currently use
+    constraints: tuple[float, float] = (ALIGN_MAX_VELOCITY, ALIGN_MAX_ACCELERATION)
+
+def create_auto_align(
+    drivetrain: CommandSwerveDrivetrain,
+    elevator: Elevator,
+    kind: TargetKind = TargetKind.BRANCH,
+    level: ElevatorPositions | None = None,
+    limiter: SpeedLimiter | None = None,
+) -> Command:
+    """
+    Drive to the scoring pose nearest the robot while raising the elevator.
+
+    The target is picked once when the command starts, then each axis follows a
+    trapezoid profile to it. When a level is given, the elevator moves to it in
+    parallel; station targets lower the elevator instead. With a limiter, the
+    translation profiles are held to its caps at the elevator's current height
+    as it rises, and the commanded velocity to its speed cap.
+    """
+    state = AlignState()
+    x_controller = ProfiledPIDController(
+        ALIGN_TRANSLATION_P, 0, 0,
+        TrapezoidProfile.Constraints(ALIGN_MAX_VELOCITY, ALIGN_MAX_ACCELERATION),
+    )
+    y_controller = ProfiledPIDController(
+        ALIGN_TRANSLATION_P, 0, 0,
+        TrapezoidProfile.Constraints(ALIGN_MAX_VELOCITY, ALIGN_MAX_ACCELERATION),
+    )
+    theta_controller = ProfiledPIDControllerRadians(
+        ALIGN_ROTATION_P, 0, 0,
+        TrapezoidProfileRadians.Constraints(ALIGN_MAX_ANGULAR_VELOCITY, ALIGN_MAX_ANGULAR_ACCELERATION),
+    )
+    theta_controller.enableContinuousInput(-math.pi, math.pi)
+    x_controller.setTolerance(ALIGN_TRANSLATION_TOLERANCE)
+    y_controller.setTolerance(ALIGN_TRANSLATION_TOLERANCE)
+    theta_controller.setTolerance(ALIGN_ROTATION_TOLERANCE)
+
+    # Target poses are in blue-origin field coordinates regardless of alliance
+    request = (
+        swerve.requests.FieldCentric()
+        .with_forward_perspective(swerve.requests.ForwardPerspectiveValue.BLUE_ALLIANCE)
+        .with_drive_request_type(swerve.SwerveModule.DriveRequestType.VELOCITY)
+    )
+
+    def limit_profiles():
+        height = elevator.height()
+        constraints = (
+            min(ALIGN_MAX_VELOCITY, limiter.speed_cap_at(height)),
+            min(ALIGN_MAX_ACCELERATION, limiter.acceleration_cap_at(height)),
+        )
+        # The caps only change between height bins
+        if constraints != state.constraints:
+            state.constraints = constraints
+            x_controller.setConstraints(TrapezoidProfile.Constraints(*constraints))
+            y_controller.setConstraints(TrapezoidProfile.Constraints(*constraints))
+
+    def select_target():
+        if limiter is not None:
+            limit_profiles()
+        drive_state = drivetrain.get_state()
+        pose = drive_state.pose
+        speeds = drive_state.speeds
+        heading = pose.rotation()
+        # Seed the profiles with the current field-relative velocity for a smooth handoff
+        vx = speeds.vx * heading.cos() - speeds.vy * heading.sin()
+        vy = speeds.vx * heading.sin() + speeds.vy * heading.cos()
+        x_controller.reset(pose.x, vx)
+        y_controller.reset(pose.y, vy)
+        theta_controller.reset(heading.radians(), speeds.omega)
+        state.target = nearest_target(pose, kind)
+        x_controller.setGoal(state.target.x)
+        y_controller.setGoal(state.target.y)
+        theta_controller.setGoal(state.target.rotation().radians())
+
+    def drive_to_target():
+        pose = drivetrain.get_state().pose
+        if limiter is not None:
+            limit_profiles()
+        velocity_x = x_controller.calculate(pose.x) + x_controller.getSetpoint().velocity
+        velocity_y = y_controller.calculate(pose.y) + y_controller.getSetpoint().velocity
+        if limiter is not None:
+            # Each axis is held to the cap on its own, so the combined speed can still exceed it
+            velocity_x, velocity_y = limiter.clamp(velocity_x, velocity_y)
+        return (
+            request
+            .with_velocity_x(velocity_x)
+            .with_velocity_y(velocity_y)
+            .with_rotational_rate(
+                theta_controller.calculate(pose.rotation().radians())
+                + theta_controller.getSetpoint().velocity
+            )
+        )
+
+    def at_target():
+        return x_controller.atGoal() and y_controller.atGoal() and theta_controller.atGoal()
+
+    drive = (
+        drivetrain.runOnce(select_target)
+        .andThen(drivetrain.apply_request(drive_to_target).until(at_target))
+    )
+
+    if kind == TargetKind.STATION:
+        return cmd.parallel(drive, elevator.move(0, ElevatorMode.POSITION))
+    if level is not None:
+        return cmd.parallel(drive, elevator.move(level.value, ElevatorMode.POSITION))
+    return drive
@@ -0,0 +1,122 @@
+import math
+import os
+from dataclasses import dataclass
+
+import numpy as np
+from commands2 import Command
+from phoenix6 import swerve
+from wpilib import DriverStation, Timer, getDeployDirectory
+from wpimath.controller import PIDController
+from wpimath.geometry import Pose2d
+from subsystems.command_swerve_drivetrain import CommandSwerveDrivetrain
+from utils.speed_limiter import SpeedLimiter
+
+# Compiled path columns; one row per SAMPLE_PERIOD
+T, X, Y, HEADING, VX, VY, OMEGA = range(7)
+SAMPLE_PERIOD = 0.02  # s, one robot loop
+
+COMPILED_PATH_DIR = os.path.join("pathplanner", "compiled")
+
+# Feedback on top of the compiled velocities
+FOLLOW_TRANSLATION_P = 4.0
+FOLLOW_ROTATION_P = 5.0
+
+@dataclass
+class FollowState:
+    samples: np.ndarray | None = None
+    start: float = 0.0
+    index: int = 0
+
+class CompiledPath:
+    """
+    A path compiled ahead of time by tools/compile_paths.py.
+
+    Both alliance variants are memory-mapped when loaded, so following the path
+    only indexes into precomputed rows: no spline sampling or pose flipping
+    happens on the robot.
+    """
+
+    def __init__(self, name: str, blue: np.ndarray, red: np.ndarray):
+        self.name = name
+        self._samples = {DriverStation.Alliance.kBlue: blue, DriverStation.Alliance.kRed: red}
+        self.duration = float(blue[-1, T])
+
+    @classmethod
+    def load(cls, name: str, directory: str | None = None) -> "CompiledPath":
+        directory = directory or os.path.join(getDeployDirectory(), COMPILED_PATH_DIR)
+        return cls(
+            name,
+            np.load(os.path.join(directory, f"{name}.blue.npy"), mmap_mode="r"),
+            np.load(os.path.join(directory, f"{name}.red.npy"), mmap_mode="r"),
+        )
+
+    def warm(self) -> None:
+        """Touch every row so the memory map is paged in before it is followed"""
+        for samples in self._samples.values():
+            float(np.sum(samples))
+
+    def samples(self, alliance: DriverStation.Alliance) -> np.ndarray:
+        return self._samples[alliance]
+
+    def start_pose(self, alliance: DriverStation.Alliance) -> Pose2d:
+        x, y, heading = self._samples[alliance][0, X:HEADING + 1]
+        return Pose2d(x, y, heading)
+
+def load_compiled_paths(directory: str | None = None) -> dict[str, CompiledPath]:
+    """Load every compiled path in the deploy directory, keyed by path name"""
+    directory = directory or os.path.join(getDeployDirectory(), COMPILED_PATH_DIR)
+    if not os.path.isdir(directory):
+        return {}
+    names = sorted(f[:-len(".blue.npy")] for f in os.listdir(directory) if f.endswith(".blue.npy"))
+    return {name: CompiledPath.load(name, directory) for name in names}
+
+def create_follow_path(drivetrain: CommandSwerveDrivetrain, path: CompiledPath,
+                       limiter: SpeedLimiter | None = None) -> Command:
+    """
+    Follow a compiled path, using its velocities as feedforward with a
+    proportional correction toward each sampled pose.
+
+    The alliance variant is picked once when the command starts. The row
+    followed is chosen by the time since the start, so late or extra loops
+    do not stretch the path out. With a limiter, the commanded velocity is
+    held to its speed cap at the elevator's current height.
+    """
+    x_controller = PIDController(FOLLOW_TRANSLATION_P, 0, 0)
+    y_controller = PIDController(FOLLOW_TRANSLATION_P, 0, 0)
+    theta_controller = PIDController(FOLLOW_ROTATION_P, 0, 0)
+    theta_controller.enableContinuousInput(-math.pi, math.pi)
+
+    # Compiled poses are in blue-origin field coordinates for both alliances
+    request = (
+        swerve.requests.FieldCentric()
+        .with_forward_perspective(swerve.requests.ForwardPerspectiveValue.BLUE_ALLIANCE)
+        .with_drive_request_type(swerve.SwerveModule.DriveRequestType.VELOCITY)
+    )
+    state = FollowState(path.samples(DriverStation.Alliance.kBlue))
+
+    def start():
+        alliance = DriverStation.Alliance.kRed if drivetrain.should_flip_path() else DriverStation.Alliance.kBlue
+        state.samples = path.samples(alliance)
+        state.start = Timer.getFPGATimestamp()
+        state.index = 0
+
+    def follow():
+        samples = state.samples
+        state.index = int((Timer.getFPGATimestamp() - state.start) / SAMPLE_PERIOD)
+        row = samples[min(state.index, len(samples) - 1)]
+        pose = drivetrain.get_state().pose
+        velocity_x = row[VX] + x_controller.calculate(pose.x, row[X])
+        velocity_y = row[VY] + y_controller.calculate(pose.y, row[Y])
+        if limiter is not None:
+            velocity_x, velocity_y = limiter.clamp(velocity_x, velocity_y)
+        return (
+            request
+            .with_velocity_x(velocity_x)
+            .with_velocity_y(velocity_y)
+            .with_rotational_rate(row[OMEGA] + theta_controller.calculate(pose.rotation().radians(), row[HEADING]))
+        )
+
+    return (
+        drivetrain.runOnce(start)
+        .andThen(drivetrain.apply_request(follow).until(lambda: state.index >= len(state.samples)))
+    )
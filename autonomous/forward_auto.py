@@ -11,6 +11,14 @@ class AutoState:
 def create_forward_auto(drivetrain: CommandSwerveDrivetrain) -> Command:
     state = AutoState()
     
+    # Built once here so starting autonomous allocates nothing
+    request = (
+        swerve.requests.FieldCentric()
+        .with_velocity_x(-0.5)
+        .with_velocity_y(0)
+        .with_rotational_rate(0)
+    )
+
     def update_seed():
         state.seed_pose = drivetrain.get_state().pose
     
@@ -18,14 +26,7 @@ def create_forward_auto(drivetrain: CommandSwerveDrivetrain) -> Command:
         drivetrain.runOnce(lambda: drivetrain.seed_field_centric())
         .andThen(drivetrain.runOnce(update_seed))
         .andThen(
-            drivetrain.apply_request(
-                lambda: (
-                    swerve.requests.FieldCentric()
-                    .with_velocity_x(-0.5)
-                    .with_velocity_y(0)
-                    .with_rotational_rate(0)
-                )
-            )
+            drivetrain.apply_request(lambda: request)
             .until(lambda: state.seed_pose is not None and abs(drivetrain.get_state().pose.x - state.seed_pose.x) >= feetToMeters(7))
         )
     )
\ No newline at end of file
@@ -0,0 +1,150 @@
+import math
+from dataclasses import dataclass
+
+from commands2 import Command, cmd
+from phoenix6 import swerve
+from wpilib import DriverStation, Timer
+from wpimath.geometry import Rotation2d
+
+from subsystems.command_swerve_drivetrain import CommandSwerveDrivetrain
+from utils.constants import (HEADING_P, HEADING_D, HEADING_MAX_ANGULAR_VELOCITY,
+    HEADING_MAX_ANGULAR_ACCELERATION, HEADING_SNAP_INCREMENT, HEADING_SETTLE_TOLERANCE)
+from utils.field import SCORING_POSES, TargetKind
+from utils.speed_limiter import SpeedLimiter
+
+@dataclass
+class HeadingState:
+    """Rotation profile state, all in blue-origin field radians"""
+    goal: float | None = None
+    setpoint: float = 0.0
+    rate: float = 0.0
+    # Operator forward direction, read once per goal since it only changes while disabled
+    perspective: float = 0.0
+
+class HeadingDrive:
+    """
+    Field-centric driving that holds or snaps the robot heading.
+
+    While the rotation stick is outside its deadband it drives the rotational
+    rate directly. When the stick is released the heading where the robot can
+    stop turning becomes the goal and is held; snap_to_reef() and
+    snap_to_station() replace the goal with the nearest reef face heading (a
+    multiple of 60 degrees) or the heading of the nearest coral station. Each
+    loop a time-optimal trapezoid profile steps toward the goal and its
+    position and velocity are sent to FieldCentricFacingAngle as the target
+    direction and rate feedforward, with the request's heading PID closing the
+    rest. The profile is a few float operations on preallocated state. With a
+    limiter, the translation is capped by elevator height first. A goal held
+    from before another command had the drivetrain is dropped on the first
+    request after the gap; reset() drops it explicitly, as reseeding the field
+    heading must.
+    """
+
+    def __init__(self, drivetrain: CommandSwerveDrivetrain, max_angular_rate: float, rotational_deadband: float,
+                 limiter: SpeedLimiter | None = None, loop_period: float = 0.02):
+        self._drivetrain = drivetrain
+        self._limiter = limiter
+        self._rotational_deadband = rotational_deadband
+        self._loop_period = loop_period
+        self.state = HeadingState()
+        self._last_call = 0.0
+
+        self._free = (
+            swerve.requests.FieldCentric()
+            .with_drive_request_type(swerve.SwerveModule.DriveRequestType.OPEN_LOOP_VOLTAGE)
+        )
+        self._facing = (
+            swerve.requests.FieldCentricFacingAngle()
+            .with_drive_request_type(swerve.SwerveModule.DriveRequestType.OPEN_LOOP_VOLTAGE)
+            .with_heading_pid(HEADING_P, 0, HEADING_D)
+            .with_max_abs_rotational_rate(max_angular_rate)
+        )
+
+    def with_deadband(self, deadband: float) -> "HeadingDrive":
+        self._free.with_deadband(deadband)
+        self._facing.with_deadband(deadband)
+        return self
+
+    def reset(self) -> None:
+        """Drop the held heading, so the next request holds wherever the robot is then"""
+        self.state.goal = None
+
+    def request(self, velocity_x: float, velocity_y: float, rotational_rate: float) -> swerve.requests.SwerveRequest:
+        """The drive request for this loop; call from the default drive command's request lambda"""
+        state = self.state
+        now = Timer.getFPGATimestamp()
+        dt = now - self._last_call
+        self._last_call = now
+        if dt > 5 * self._loop_period:
+            # Another command had the drivetrain; the held goal is from before it moved the robot
+            state.goal = None
+        # The profile advances by the time since the last request, at most one loop
+        dt = min(dt, self._loop_period)
+        if self._limiter is not None:
+            self._limiter.apply(velocity_x, velocity_y)
+            velocity_x = self._limiter.velocity_x
+            velocity_y = self._limiter.velocity_y
+        if abs(rotational_rate) > self._rotational_deadband:
+            state.goal = None
+            return (
+                self._free
+                .with_velocity_x(velocity_x)
+                .with_velocity_y(velocity_y)
+                .with_rotational_rate(rotational_rate)
+            )
+        if state.goal is None:
+            self._seed()
+            # Hold where the robot can stop turning instead of swinging back to where the stick was released
+            state.goal = state.setpoint + math.copysign(state.rate * state.rate / (2 * HEADING_MAX_ANGULAR_ACCELERATION), state.rate)
+        self._step(dt)
+        return (
+            self._facing
+            .with_velocity_x(velocity_x)
+            .with_velocity_y(velocity_y)
+            .with_target_direction(Rotation2d(state.setpoint - state.perspective))
+            .with_target_rate_feedforward(state.rate)
+        )
+
+    def _seed(self) -> None:
+        drive_state = self._drivetrain.get_state()
+        self.state.setpoint = drive_state.pose.rotation().radians()
+        self.state.rate = drive_state.speeds.omega
+        self.state.perspective = self._drivetrain.get_operator_forward_direction().radians()
+
+    def _step(self, dt: float) -> None:
+        state = self.state
+        error = math.remainder(state.goal - state.setpoint, math.tau)
+        max_step = HEADING_MAX_ANGULAR_ACCELERATION * dt
+        if abs(error) < HEADING_SETTLE_TOLERANCE and abs(state.rate) <= max_step:
+            state.setpoint = state.goal
+            state.rate = 0.0
+            return
+        # Fastest rate from which the goal can still be reached without overshooting
+        target_rate = math.copysign(min(
+            HEADING_MAX_ANGULAR_VELOCITY, math.sqrt(2 * HEADING_MAX_ANGULAR_ACCELERATION * abs(error))
+        ), error)
+        state.rate += min(max(target_rate - state.rate, -max_step), max_step)
+        state.setpoint = math.remainder(state.setpoint + state.rate * dt, math.tau)
+
+    def _snap(self, goal: float) -> None:
+        if self.state.goal is None:
+            self._seed()
+        self.state.goal = goal
+
+    def snap_to_reef(self) -> Command:
+        """Turn to the nearest reef face heading; faces are 60 degrees apart on both alliances"""
+        def snap():
+            heading = self._drivetrain.get_state().pose.rotation().radians()
+            self._snap(round(heading / HEADING_SNAP_INCREMENT) * HEADING_SNAP_INCREMENT)
+        return cmd.runOnce(snap)
+
+    def snap_to_station(self) -> Command:
+        """Turn to back into the coral station nearest the robot"""
+        def snap():
+            alliance = DriverStation.getAlliance()
+            if alliance is None:
+                alliance = DriverStation.Alliance.kBlue
+            index = SCORING_POSES[(alliance, TargetKind.STATION)]
+            pose = self._drivetrain.get_state().pose
+            self._snap(float(index.poses[index.nearest(pose.x, pose.y), 2]))
+        return cmd.runOnce(snap)
@@ -0,0 +1,106 @@
+from dataclasses import dataclass
+from typing import Callable
+
+from commands2 import Command
+from ntcore import NetworkTableInstance
+from wpilib import DriverStation, SendableChooser, SmartDashboard, Timer
+
+from subsystems.command_swerve_drivetrain import CommandSwerveDrivetrain
+
+# Loops of a freshly built routine run against the drivetrain's dry run, enough
+# to get past the one-shot setup steps to its first drive request
+DRY_RUN_LOOPS = 3
+
+@dataclass
+class AutoRoutine:
+    build: Callable[[], Command]
+    warm: Callable[[], None] | None = None
+
+class AutoPrewarmer:
+    """
+    Builds the selected autonomous routine while disabled so nothing is
+    constructed when autonomous starts.
+
+    update() runs every disabled loop but only rebuilds when the chooser selection
+    or alliance changes, including after a failed build. A built routine is checked to require the drivetrain and
+    has its warm-up run, which pages in any memory-mapped data it follows. It is
+    then initialized and executed for a few loops inside the drivetrain's dry
+    run and ended, so its first real loop does not run cold code. The time from
+    start() to the drivetrain's first control request is published as
+    Auto/StartLatency.
+    """
+
+    def __init__(self, routines: dict[str, AutoRoutine], default: str, drivetrain: CommandSwerveDrivetrain):
+        self._routines = routines
+        self._drivetrain = drivetrain
+        self._chooser = SendableChooser()
+        self._chooser.setDefaultOption(default, default)
+        for name in routines:
+            if name != default:
+                self._chooser.addOption(name, name)
+        SmartDashboard.putData("Auto Chooser", self._chooser)
+
+        self._built_key = None
+        self._command: Command | None = None
+        self._started_at: float | None = None
+
+        table = NetworkTableInstance.getDefault().getTable("Auto")
+        self._selected_pub = table.getStringTopic("Prewarmed").publish()
+        self._build_time_pub = table.getDoubleTopic("BuildTime").publish()
+        self._latency_pub = table.getDoubleTopic("StartLatency").publish()
+
+        drivetrain.add_request_listener(self._stamp_start)
+
+    def _stamp_start(self, request) -> None:
+        """Publish the time from start() to the first request sent after it"""
+        if self._started_at is not None:
+            self._latency_pub.set(Timer.getFPGATimestamp() - self._started_at)
+            self._started_at = None
+
+    def update(self) -> None:
+        """Rebuild the selected routine if the selection or alliance changed"""
+        key = (self._chooser.getSelected(), DriverStation.getAlliance())
+        if key == self._built_key:
+            return
+        # Remembered even when the build fails, so a broken routine is reported once, not every loop
+        self._built_key = key
+        self._command = self._build(key[0])
+
+    def _build(self, name: str) -> Command | None:
+        routine = self._routines.get(name)
+        if routine is None:
+            return None
+        start = Timer.getFPGATimestamp()
+        try:
+            command = routine.build()
+            if routine.warm is not None:
+                routine.warm()
+            self._dry_run(command)
+        except Exception as e:
+            DriverStation.reportError(f"Auto {name} failed to build: {e}", False)
+            return None
+        if not command.hasRequirement(self._drivetrain):
+            DriverStation.reportWarning(f"Auto {name} does not require the drivetrain", False)
+        self._build_time_pub.set(Timer.getFPGATimestamp() - start)
+        self._selected_pub.set(name)
+        return command
+
+    def _dry_run(self, command: Command) -> None:
+        with self._drivetrain.dry_run():
+            command.initialize()
+            for _ in range(DRY_RUN_LOOPS):
+                if command.isFinished():
+                    break
+                command.execute()
+            command.end(True)
+
+    def start(self) -> Command | None:
+        """Hand over the prewarmed routine, building it now if disabled never ran"""
+        start = Timer.getFPGATimestamp()
+        self.update()
+        command, self._command = self._command, None
+        # The handed-over command is used up; the next disabled period builds a fresh one
+        self._built_key = None
+        if command is not None:
+            self._started_at = start
+        return command
@@ -0,0 +1,73 @@
+#
+# Simulated mechanisms for the elevator and rotating intake. pyfrc calls
+# update_sim() after every robot loop; the drivetrain runs its own sim thread.
+#
+
+import math
+
+from pyfrc.physics.core import PhysicsInterface
+from wpilib import RobotController
+from wpilib.simulation import DCMotorSim, ElevatorSim, XboxControllerSim
+from wpimath.system.plant import DCMotor, LinearSystemId
+from wpimath.units import inchesToMeters, metersToInches
+
+from utils.constants import (elevator_gearbox_radius, single_rotation_inches,
+    INPUT_LATENCY_STEP_PERIOD, INPUT_LATENCY_STEP_AMPLITUDE)
+from utils.motor_constants import MOTOR_CONFIG
+
+ELEVATOR_CARRIAGE_MASS = 8.0  # kg
+ELEVATOR_MAX_HEIGHT = inchesToMeters(80)
+# Drum radius that gives single_rotation_inches of travel per motor rotation
+ELEVATOR_DRUM_RADIUS = inchesToMeters(single_rotation_inches * elevator_gearbox_radius / (2 * math.pi))
+ROTATE_MOMENT_OF_INERTIA = 0.05  # kg m^2
+
+class PhysicsEngine:
+    def __init__(self, physics_controller: PhysicsInterface, robot):
+        self.robot = robot
+        # The elevator position loop holds the carriage up with its kG
+        self.elevator = ElevatorSim(
+            DCMotor.krakenX60(2), elevator_gearbox_radius, ELEVATOR_CARRIAGE_MASS,
+            ELEVATOR_DRUM_RADIUS, 0, ELEVATOR_MAX_HEIGHT, True, 0,
+        )
+        rotate_gearbox = DCMotor.krakenX60(1)
+        self.rotate_gear_ratio = MOTOR_CONFIG["rotate"]["gear_ratio"]
+        self.rotate = DCMotorSim(
+            LinearSystemId.DCMotorSystem(rotate_gearbox, ROTATE_MOMENT_OF_INERTIA, self.rotate_gear_ratio),
+            rotate_gearbox,
+        )
+
+    def update_sim(self, now: float, tm_diff: float) -> None:
+        container = getattr(self.robot, "container", None)
+        if container is None:
+            return
+        battery = RobotController.getBatteryVoltage()
+
+        if INPUT_LATENCY_STEP_PERIOD:
+            container.input_latency.inject_steps(
+                0, XboxControllerSim.setLeftY, INPUT_LATENCY_STEP_AMPLITUDE, INPUT_LATENCY_STEP_PERIOD
+            )
+
+        leading = container.leading_motor.sim_state
+        following = container.following_motor.sim_state
+        leading.set_supply_voltage(battery)
+        following.set_supply_voltage(battery)
+        if leading.motor_voltage == 0:
+            # The elevator only stops its motors in brake mode, which holds the carriage up
+            self.elevator.setState(self.elevator.getPosition(), 0)
+        else:
+            self.elevator.setInputVoltage(leading.motor_voltage)
+            self.elevator.update(tm_diff)
+        # The two motors face each other, so the follower turns the other way
+        rotor_position = metersToInches(self.elevator.getPosition()) / single_rotation_inches
+        rotor_velocity = metersToInches(self.elevator.getVelocity()) / single_rotation_inches
+        leading.set_raw_rotor_position(rotor_position)
+        leading.set_rotor_velocity(rotor_velocity)
+        following.set_raw_rotor_position(-rotor_position)
+        following.set_rotor_velocity(-rotor_velocity)
+
+        rotate = container.rotate_command.motor.sim_state
+        rotate.set_supply_voltage(battery)
+        self.rotate.setInputVoltage(rotate.motor_voltage)
+        self.rotate.update(tm_diff)
+        rotate.set_raw_rotor_position(self.rotate.getAngularPosition() / (2 * math.pi) * self.rotate_gear_ratio)
+        rotate.set_rotor_velocity(self.rotate.getAngularVelocity() / (2 * math.pi) * self.rotate_gear_ratio)
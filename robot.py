@@ -10,15 +10,23 @@ import commands2
 import typing
 
 from robotcontainer import RobotContainer
+from utils.constants import REPLAY_RECORD_PATH, TRACE_PATH
+from utils.replay import ReplayRecorder
+from utils.gc_policy import GcPolicy
+from utils.tracing import Tracer
 
 
-class MyRobot(commands2.TimedCommandRobot):
+class MyRobot(wpilib.TimedRobot):
     """
-    Command v2 robots are encouraged to inherit from TimedCommandRobot, which
-    has an implementation of robotPeriodic which runs the scheduler for you
+    Runs the command scheduler once per loop from robotPeriodic, between the
+    replay recorder and input latency hooks. This is a plain TimedRobot:
+    TimedCommandRobot would run the scheduler a second time on its own
+    callback, outside those hooks and the tracer.
     """
 
     autonomousCommand: typing.Optional[commands2.Command] = None
+    recorder: typing.Optional[ReplayRecorder] = None
+    tracer: typing.Optional[Tracer] = None
 
     def robotInit(self) -> None:
         """
@@ -30,6 +38,17 @@ class MyRobot(commands2.TimedCommandRobot):
         # autonomous chooser on the dashboard.
         self.container = RobotContainer()
 
+        if REPLAY_RECORD_PATH:
+            self.recorder = ReplayRecorder(self.container, REPLAY_RECORD_PATH)
+
+        if TRACE_PATH:
+            self.tracer = Tracer()
+            self.tracer.instrument(self.container)
+
+        # Everything built so far lives for the whole match; keep it out of collections
+        self.gc_policy = GcPolicy(self.getPeriod())
+        self.gc_policy.freeze()
+
     def robotPeriodic(self) -> None:
         """This function is called every 20 ms, no matter the mode. Use this for items like diagnostics
         that you want ran during disabled, autonomous, teleoperated and test.
@@ -41,18 +60,40 @@ class MyRobot(commands2.TimedCommandRobot):
         # commands, running already-scheduled commands, removing finished or interrupted commands,
         # and running subsystem periodic() methods.  This must be called from the robot's periodic
         # block in order for anything in the Command-based framework to work.
+        if self.recorder:
+            self.recorder.record_inputs()
+        self.container.input_latency.sample()
         commands2.CommandScheduler.getInstance().run()
+        self.container.input_latency.update()
+        if self.recorder:
+            self.recorder.record_outputs()
+        self.container.power_budget.periodic()
+        self.gc_policy.publish()
+        self.container.odometry_health.publish()
+        self.container.traction.publish()
 
     def disabledInit(self) -> None:
         """This function is called once each time the robot enters Disabled mode."""
-        pass
+        self.gc_policy.enter_disabled()
+        if self.tracer:
+            self.tracer.flush(TRACE_PATH)
+        if self.recorder:
+            self.recorder.flush()
+
+    def endCompetition(self) -> None:
+        """This function is called once when the robot program stops."""
+        if self.recorder:
+            self.recorder.close()
+        self.gc_policy.close()
+        super().endCompetition()
 
     def disabledPeriodic(self) -> None:
         """This function is called periodically when disabled"""
-        pass
+        self.container.prewarm_autonomous()
 
     def autonomousInit(self) -> None:
         """This autonomous runs the autonomous command selected by your RobotContainer class."""
+        self.gc_policy.enter_enabled()
         self.autonomousCommand = self.container.getAutonomousCommand()
 
         if self.autonomousCommand:
@@ -63,6 +104,8 @@ class MyRobot(commands2.TimedCommandRobot):
         pass
 
     def teleopInit(self) -> None:
+        self.gc_policy.enter_enabled()
+
         # This makes sure that the autonomous stops running when
         # teleop starts running. If you want the autonomous to
         # continue until interrupted by another command, remove
@@ -75,5 +118,7 @@ class MyRobot(commands2.TimedCommandRobot):
         pass
 
     def testInit(self) -> None:
+        self.gc_policy.enter_enabled()
+
         # Cancels all running commands at the start of test mode
         commands2.CommandScheduler.getInstance().cancelAll()
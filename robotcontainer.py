@@ -4,13 +4,15 @@
 # the WPILib BSD license file in the root directory of this project.
 #
 
+import math
+import os
 import commands2
 import commands2.button
 import commands2.cmd
 from commands2 import cmd
-from wpilib import SmartDashboard, XboxController
+from wpilib import XboxController, getOperatingDirectory
 from subsystems.climb.command import Climb
-from subsystems.elevator.command import Elevator, ElevatorMode
+from subsystems.elevator.command import Elevator, ElevatorMode, ElevatorPositions
 from generated.tuner_constants import TunerConstants
 from subsystems.elevator.coral.wheels import Wheels
 from telemetry import Telemetry
@@ -18,14 +20,29 @@ from phoenix6 import swerve
 from phoenix6.hardware import TalonFX
 from wpimath.geometry import Rotation2d
 from wpimath.units import rotationsToRadians
-from subsystems.elevator.coral.rotate import RotateCommand
+from subsystems.elevator.coral.rotate import RotateCommand, RotatePositions
+from subsystems.superstructure import Superstructure, SuperstructureState
 from commands2.sysid import SysIdRoutine
 from autonomous.forward_auto import create_forward_auto
+from autonomous.auto_align import create_auto_align
+from autonomous.heading_drive import HeadingDrive
+from autonomous.follow_path import create_follow_path, load_compiled_paths
+from autonomous.prewarm import AutoPrewarmer, AutoRoutine
+from utils.field import TargetKind
 
 from utils.constants import (MAX_ELEVATOR_HEIGHT, MIN_ELEVATOR_HEIGHT,
     ELEVATOR_LEADING_MOTOR_ID, ELEVATOR_FOLLOWING_MOTOR_ID,
-    CLIMB_MOTOR_ID, BOTTOM_WHEELS_MOTOR_ID, ROTATE_INTAKE_MOTOR_ID, TOP_WHEELS_MOTOR_ID)
+    CLIMB_MOTOR_ID, BOTTOM_WHEELS_MOTOR_ID, ROTATE_INTAKE_MOTOR_ID, TOP_WHEELS_MOTOR_ID,
+    POWER_BUDGET_MOVING_SPEED, BRAKE_LOCK_SPEED)
 from utils.math import inchesToRotations
+from utils.bringup import BRINGUP
+from utils.motor_constants import MOTOR_CONFIG
+from utils.input_latency import InputLatencyMonitor
+from utils.odometry_health import OdometryHealthMonitor
+from utils.power_budget import PowerBudget
+from utils.speed_limiter import SpeedLimiter
+from utils.traction_monitor import TractionMonitor
+from utils.tunables import TUNABLES
 
 class RobotContainer:
     """
@@ -43,38 +60,51 @@ class RobotContainer:
         self._joystick = commands2.button.CommandXboxController(0)
         self._functional_controller = commands2.button.CommandXboxController(1)
         
-        # Initialize subsystems
-        self.drivetrain = TunerConstants.create_drivetrain()
+        # Initialize subsystems. Mechanisms queue their device configs first so the
+        # bring-up workers write them while the drivetrain configures its own devices
         self.leading_motor = TalonFX(ELEVATOR_LEADING_MOTOR_ID)
         self.following_motor = TalonFX(ELEVATOR_FOLLOWING_MOTOR_ID)
-        self.leading_motor.set_position(0)
-        self.following_motor.set_position(0)
         self.elevator = Elevator(self.leading_motor, self.following_motor)
         self.climb = Climb(TalonFX(CLIMB_MOTOR_ID))
         self.wheels = Wheels(TalonFX(TOP_WHEELS_MOTOR_ID), TalonFX(BOTTOM_WHEELS_MOTOR_ID))
         self.rotate_command = RotateCommand(TalonFX(ROTATE_INTAKE_MOTOR_ID))
+        self.superstructure = Superstructure(self.elevator, self.rotate_command, self.wheels)
+        with BRINGUP.timed("drivetrain"):
+            self.drivetrain = TunerConstants.create_drivetrain()
+        # Full speed while the elevator is low, tip-safe caps as it rises
+        self.speed_limiter = SpeedLimiter(
+            self.elevator.height, self.drivetrain.module_locations, TunerConstants.speed_at_12_volts,
+            self.drivetrain.get_operator_velocity,
+        )
+        self._heading_drive = HeadingDrive(
+            self.drivetrain, self._max_angular_rate, self._max_angular_rate * 0.1, self.speed_limiter
+        ).with_deadband(self._max_speed * 0.1)
+        self.odometry_health = OdometryHealthMonitor(self.drivetrain.get_odometry_frequency())
+        self.traction = TractionMonitor(self.drivetrain, self.drivetrain.module_locations)
+        self._logger = Telemetry(self._max_speed, self.odometry_health, self.traction)
+        self.input_latency = InputLatencyMonitor(self._joystick.getLeftY, self.drivetrain.get_module(0).drive_motor)
+
+        # Paths compiled by tools/compile_paths.py, memory-mapped once at startup
+        self.paths = load_compiled_paths()
+        self._configure_autos()
 
-        SmartDashboard.putNumber("Elevator/Leading Motor Position", self.leading_motor.get_position().value)
-        SmartDashboard.putNumber("Elevator/Following Motor Position", self.following_motor.get_position().value)
-        SmartDashboard.putNumber("Elevator/Leading Motor Position(in)", self.leading_motor.get_position().value * 0.36)
-        SmartDashboard.putNumber("Elevator/Following Motor Position(in)", self.following_motor.get_position().value * 0.36)
-        
         # Configure all button bindings
         self.configureButtonBindings()
+        self._configure_tunables()
+        # Every device has to be configured before the budget reads back its limits
+        self.bringup_reports = BRINGUP.finish()
+        self._configure_power_budget()
 
     def _configure_drivetrain(self) -> None:
-        self._max_speed = TunerConstants.speed_at_12_volts * 0.5
+        self._max_speed = TunerConstants.speed_at_12_volts
         self._max_angular_rate = rotationsToRadians(0.75)
         
-        self._drive = (
+        self._brake = swerve.requests.SwerveDriveBrake()
+        self._stopping = (
             swerve.requests.FieldCentric()
-            .with_deadband(self._max_speed * 0.1)
-            .with_rotational_deadband(self._max_angular_rate * 0.1)
             .with_drive_request_type(swerve.SwerveModule.DriveRequestType.OPEN_LOOP_VOLTAGE)
         )
-        self._brake = swerve.requests.SwerveDriveBrake()
         self._point = swerve.requests.PointWheelsAt()
-        self._logger = Telemetry(self._max_speed)
 
     def configureButtonBindings(self) -> None:
         self._configure_drivetrain_controls()
@@ -86,56 +116,86 @@ class RobotContainer:
     def _configure_drivetrain_controls(self) -> None:
         # Configure default drive command
         self.drivetrain.setDefaultCommand(
-            self.drivetrain.apply_request(
-                lambda: self._drive
-                    .with_velocity_x(-self._joystick.getLeftY() * self._max_speed)
-                    .with_velocity_y(-self._joystick.getLeftX() * self._max_speed)
-                    .with_rotational_rate(-self._joystick.getRightX() * self._max_angular_rate)
-            )
+            self.drivetrain.apply_request(self.input_latency.wrap_request(
+                lambda: self._heading_drive.request(
+                    -self._joystick.getLeftY() * self._max_speed,
+                    -self._joystick.getLeftX() * self._max_speed,
+                    -self._joystick.getRightX() * self._max_angular_rate,
+                )
+            ))
         )
+        self.input_latency.attach(self.drivetrain)
         
         # Simplified button bindings for better performance
-        self._joystick.a().whileTrue(self.drivetrain.apply_request(lambda: self._brake))
+        self._joystick.a().whileTrue(self.drivetrain.apply_request(self._brake_request))
         
         self._joystick.b().onTrue(cmd.runOnce(lambda: setattr(self, '_max_speed', self._max_speed * 0.25)))
         self._joystick.b().onFalse(cmd.runOnce(lambda: setattr(self, '_max_speed', TunerConstants.speed_at_12_volts)))
         
         # Reset field-centric heading
         self._joystick.leftBumper().onTrue(
-        self.drivetrain.runOnce(lambda: self.drivetrain.seed_field_centric())
+        self.drivetrain.runOnce(self._seed_field_centric)
     )
     
+        # Snap the held heading to the nearest reef face or coral station
+        self._joystick.x().onTrue(self._heading_drive.snap_to_reef())
+        self._joystick.y().onTrue(self._heading_drive.snap_to_station())
+
+        # Align to the nearest reef branch or coral station. The POV picks the level to raise
+        # the elevator to on the way, laid out like the operator's scoring POV; the bumper
+        # leaves the elevator where it is
+        self._joystick.rightBumper().whileTrue(
+            create_auto_align(self.drivetrain, self.elevator, TargetKind.BRANCH, limiter=self.speed_limiter)
+        )
+        for angle, level in ((0, ElevatorPositions.Level4), (90, ElevatorPositions.Level3),
+                             (180, ElevatorPositions.Level2), (270, ElevatorPositions.Level1)):
+            self._joystick.pov(angle).whileTrue(
+                create_auto_align(self.drivetrain, self.elevator, TargetKind.BRANCH, level, self.speed_limiter)
+            )
+        self._joystick.rightTrigger().whileTrue(
+            create_auto_align(self.drivetrain, self.elevator, TargetKind.STATION, limiter=self.speed_limiter)
+        )
+
         # Register telemetry
         self.drivetrain.register_telemetry(lambda state: self._logger.telemeterize(state))
 
+    def _brake_request(self) -> swerve.requests.SwerveRequest:
+        # Slow down within the tip-safe acceleration first, then lock the wheels
+        self.speed_limiter.apply(0.0, 0.0)
+        if math.hypot(self.speed_limiter.velocity_x, self.speed_limiter.velocity_y) > BRAKE_LOCK_SPEED:
+            return (
+                self._stopping
+                .with_velocity_x(self.speed_limiter.velocity_x)
+                .with_velocity_y(self.speed_limiter.velocity_y)
+            )
+        return self._brake
+
+    def _seed_field_centric(self) -> None:
+        self.drivetrain.seed_field_centric()
+        # The held heading was measured from the old forward direction
+        self._heading_drive.reset()
+
     def _configure_elevator_controls(self) -> None:
-        # Manual elevator controls
-        self._functional_controller.y().whileTrue(cmd.runEnd(
-            lambda: self.elevator.move_motor(20),
-            lambda: self.elevator.brake()
-        ))
-        
-        self._functional_controller.a().whileTrue(cmd.runEnd(
-            lambda: self.elevator.move_motor(-20),
-            lambda: self.elevator.brake()
-        ))
+        # Manual elevator controls; they require the elevator, so they take it over from a macro
+        self._functional_controller.y().whileTrue(self.elevator.move(20, ElevatorMode.MANUAL))
+        self._functional_controller.a().whileTrue(self.elevator.move(-20, ElevatorMode.MANUAL))
         
-        # Position-based elevator controls
-        self._functional_controller.pov(0).whileTrue(self.elevator.move(18, ElevatorMode.POSITION))
-        self._functional_controller.pov(90).whileTrue(self.elevator.move(24, ElevatorMode.POSITION))
-        self._functional_controller.pov(180).whileTrue(self.elevator.move(0, ElevatorMode.POSITION))
-        self._functional_controller.pov(270).whileTrue(self.elevator.move(10, ElevatorMode.POSITION))
+        # One-press scoring: raise, swing, eject and stow
+        self._functional_controller.pov(0).onTrue(self.superstructure.score(SuperstructureState.L4))
+        self._functional_controller.pov(90).onTrue(self.superstructure.score(SuperstructureState.L3))
+        self._functional_controller.pov(180).onTrue(self.superstructure.score(SuperstructureState.L2))
+        self._functional_controller.pov(270).onTrue(self.superstructure.score(SuperstructureState.L1))
+        self._functional_controller.back().onTrue(self.superstructure.intake())
+        self._functional_controller.start().onTrue(self.superstructure.go_to(SuperstructureState.STOW))
 
     def _configure_wheels_controls(self) -> None:
         # Intake/outtake controls
-        self._functional_controller.rightTrigger().whileTrue(cmd.parallel(
-            self.wheels.run(-100),
-            cmd.run(lambda: None)
-        ))
+        self._functional_controller.rightTrigger().whileTrue(self.wheels.intake())
         self._functional_controller.leftTrigger().whileTrue(cmd.parallel(
             self.wheels.run(100),
             cmd.run(lambda: None)
         ))
+        self._functional_controller.leftStick().onTrue(self.wheels.reset_piece())
     def _configure_climb_controls(self) -> None:
         # Climb controls
         self._functional_controller.rightBumper().whileTrue(self.climb.run(25))
@@ -151,6 +211,60 @@ class RobotContainer:
                 self.rotate_command
             )
         )
-    def getAutonomousCommand(self) -> commands2.Command:
-        return create_forward_auto(self.drivetrain)
-        #return commands2.cmd.print_("No autonomous command configured")
+        self._functional_controller.x().onTrue(self.rotate_command.move_to(RotatePositions.Intake))
+        self._functional_controller.b().onTrue(self.rotate_command.move_to(RotatePositions.Stow))
+    def _configure_tunables(self) -> None:
+        # Swerve gains are applied to every module off the main loop
+        TUNABLES.add_slot_gains(
+            "Swerve/Steer", TunerConstants._steer_gains,
+            lambda: [self.drivetrain.get_module(i).steer_motor for i in range(4)],
+        )
+        TUNABLES.add_slot_gains(
+            "Swerve/Drive", TunerConstants._drive_gains,
+            lambda: [self.drivetrain.get_module(i).drive_motor for i in range(4)],
+        )
+        TUNABLES.add_export_button(os.path.join(getOperatingDirectory(), "tuned_gains.py"))
+
+    def get_motors(self) -> dict[str, TalonFX]:
+        """Mechanism motors by name, for logging and diagnostics"""
+        return {
+            "elevator_leading": self.leading_motor,
+            "elevator_following": self.following_motor,
+            "climb": self.climb.motor,
+            "wheels_top": self.wheels.top_wheels,
+            "wheels_bottom": self.wheels.bottom_wheels,
+            "rotate": self.rotate_command.motor,
+        }
+
+    def _is_moving(self) -> bool:
+        speeds = self.drivetrain.get_state().speeds
+        return math.hypot(speeds.vx, speeds.vy) > POWER_BUDGET_MOVING_SPEED
+
+    def _configure_power_budget(self) -> None:
+        # Drive comes first while moving; mechanisms take over while the robot is stopped to score or climb
+        self.power_budget = PowerBudget(self._is_moving)
+        groups = {
+            "drive": [self.drivetrain.get_module(i).drive_motor for i in range(4)],
+            "wheels": [self.wheels.top_wheels, self.wheels.bottom_wheels],
+            "elevator": [self.leading_motor, self.following_motor],
+            "rotate": [self.rotate_command.motor],
+            "climb": [self.climb.motor],
+        }
+        for name, motors in groups.items():
+            config = MOTOR_CONFIG[name]
+            self.power_budget.add(
+                name, motors, config["budget_priority"], config["supply_limit_min"], config["supply_limit_max"],
+                config["budget_priority_stopped"],
+            )
+
+    def _configure_autos(self) -> None:
+        routines = {"Forward": AutoRoutine(lambda: create_forward_auto(self.drivetrain))}
+        for name, path in self.paths.items():
+            routines[name] = AutoRoutine(lambda path=path: create_follow_path(self.drivetrain, path, self.speed_limiter), path.warm)
+        self._autos = AutoPrewarmer(routines, "Forward", self.drivetrain)
+
+    def prewarm_autonomous(self) -> None:
+        self._autos.update()
+
+    def getAutonomousCommand(self) -> commands2.Command | None:
+        return self._autos.start()
@@ -1,6 +1,11 @@
+import math
 from commands2 import Command, Subsystem, cmd
+from ntcore import NetworkTableInstance
 from phoenix6.hardware import TalonFX
-from phoenix6 import controls, signals
+from phoenix6 import BaseStatusSignal, configs, controls, signals
+from utils.bringup import BRINGUP
+from utils.filters import EwmaHysteresis
+from utils.mechanism_telemetry import MechanismTelemetry
 from utils.motor_constants import percent_to_voltage, MOTOR_CONFIG
 
 class Climb(Subsystem):
@@ -8,23 +13,106 @@ class Climb(Subsystem):
         super().__init__()
         self.motor: TalonFX = motor
         self.config = MOTOR_CONFIG["climb"]
+
+        # Soft limits, brake mode and the hold gain all live on the motor
+        travel_rotations = self.config["travel"] / (math.pi * self.config["drum_diameter"]) * self.config["gear_ratio"]
+        motor_config = configs.TalonFXConfiguration()
+        motor_config.motor_output.neutral_mode = signals.NeutralModeValue.BRAKE
+        motor_config.slot0.k_p = self.config["hold_kP"]
+        motor_config.software_limit_switch = (
+            configs.SoftwareLimitSwitchConfigs()
+            .with_forward_soft_limit_enable(True)
+            .with_forward_soft_limit_threshold(travel_rotations)
+            .with_reverse_soft_limit_enable(True)
+            .with_reverse_soft_limit_threshold(-travel_rotations)
+        )
+        BRINGUP.configure("climb", self.motor, motor_config, position=0)
+
+        self._voltage_request = controls.VoltageOut(0)
+        self._hold_request = controls.PositionVoltage(0).with_slot(0)
+
+        self._position = self.motor.get_position()
+        self._velocity = self.motor.get_velocity()
+        self._stator_current = self.motor.get_stator_current()
+        self._supply_current = self.motor.get_supply_current()
+        self._signals = [self._position, self._velocity, self._stator_current, self._supply_current]
+        BaseStatusSignal.set_update_frequency_for_all(100, *self._signals)
+
+        self._stall_filter = EwmaHysteresis(
+            self.config["stall_filter_alpha"],
+            self.config["stall_current"],
+            self.config["stall_release_current"],
+            self.config["stall_debounce_loops"],
+        )
+        self._driving = False
+        self._holding = False
+        self._loops_driving = 0
+        self._peak_supply_current = 0.0
+
+        table = NetworkTableInstance.getDefault().getTable("Climb")
+        self._stator_current_pub = table.getDoubleTopic("StatorCurrent").publish()
+        self._supply_current_pub = table.getDoubleTopic("SupplyCurrent").publish()
+        self._peak_supply_current_pub = table.getDoubleTopic("PeakSupplyCurrent").publish()
+        self._breaker_fraction_pub = table.getDoubleTopic("BreakerFraction").publish()
+        self._stalled_pub = table.getBooleanTopic("Stalled").publish()
+        self._telemetry = MechanismTelemetry("Climb", [self.motor])
+
+    def periodic(self):
+        BaseStatusSignal.refresh_all(*self._signals)
+        supply_current = abs(self._supply_current.value)
+        self._peak_supply_current = max(self._peak_supply_current, supply_current)
+
+        if self._driving:
+            self._loops_driving += 1
+            stalled = self._stall_filter.update(abs(self._stator_current.value))
+            # Ignore the inrush current while the winch starts moving
+            if (stalled and self._loops_driving >= self.config["stall_spinup_loops"]
+                    and abs(self._velocity.value) < self.config["stall_max_velocity"]):
+                self.hold()
+
+        self._stator_current_pub.set(self._stator_current.value)
+        self._supply_current_pub.set(supply_current)
+        self._peak_supply_current_pub.set(self._peak_supply_current)
+        self._breaker_fraction_pub.set(self._peak_supply_current / self.config["breaker_current"])
+        self._stalled_pub.set(self._holding)
+        self._telemetry.publish(self._hold_request.position if self._holding else math.nan)
         
     def run(self, speed_percent: float = 20) -> Command:
+        """Drive the winch until released or stalled, then hold position on the motor"""
         # Clamp speed to configured limits
         speed_percent = max(-self.config["max_speed"], min(speed_percent, self.config["max_speed"]))
         voltage = percent_to_voltage(speed_percent)
         
-        return cmd.runEnd(
-            lambda: self.motor.setVoltage(voltage),
-            lambda: self.brake()
+        return cmd.startEnd(
+            lambda: self._drive(voltage),
+            lambda: self.hold()
         )
+
+    def _drive(self, voltage: float) -> None:
+        self._driving = True
+        self._holding = False
+        self._loops_driving = 0
+        # Peak current is reported per climb attempt
+        self._peak_supply_current = 0.0
+        self._stall_filter.reset()
+        self.motor.set_control(self._voltage_request.with_output(voltage))
+
+    def hold(self) -> None:
+        """Hold the current winch position with the TalonFX's closed loop"""
+        if self._holding:
+            return
+        self._driving = False
+        self._holding = True
+        self._position.refresh()
+        self.motor.set_control(self._hold_request.with_position(self._position.value))
         
     def brake(self) -> None:
-        """Stop the motor and engage brake mode"""
-        self.motor.setVoltage(0)
-        self.motor.setNeutralMode(signals.NeutralModeValue.BRAKE)
+        """Stop the motor; brake mode is configured on the motor"""
+        self._driving = False
+        self._holding = False
+        self.motor.set_control(self._voltage_request.with_output(0))
 
     def set_speed(self, speed_percent: float) -> None:
         """Set the motor speed as a percentage (-100 to 100)"""
         speed_percent = max(-self.config["max_speed"], min(speed_percent, self.config["max_speed"]))
-        self.motor.setVoltage(percent_to_voltage(speed_percent))
\ No newline at end of file
+        self.motor.set_control(self._voltage_request.with_output(percent_to_voltage(speed_percent)))
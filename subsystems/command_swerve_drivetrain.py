@@ -1,11 +1,12 @@
 from commands2 import Command, Subsystem
+from contextlib import contextmanager
 from commands2.sysid import SysIdRoutine
 import math
 from phoenix6 import SignalLogger, swerve, units, utils
 from typing import Callable, overload
 from wpilib import DriverStation, Notifier, RobotController
 from wpilib.sysid import SysIdRoutineLog
-from wpimath.geometry import Rotation2d
+from wpimath.geometry import Pose2d, Rotation2d
 
 class CommandSwerveDrivetrain(Subsystem, swerve.SwerveDrivetrain):
     """
@@ -177,6 +178,12 @@ class CommandSwerveDrivetrain(Subsystem, swerve.SwerveDrivetrain):
         self._has_applied_operator_perspective = False
         """Keep track if we've ever applied the operator perspective before or not"""
 
+        self._request_listeners: list[Callable[[swerve.requests.SwerveRequest], None]] = []
+        """Called with every request given to set_control, before it is applied"""
+
+        self._dry_run = False
+        """Drop requests and odometry resets, see dry_run()"""
+
         # Swerve requests to apply during SysId characterization
         self._translation_characterization = swerve.requests.SysIdSwerveTranslation()
         self._steer_characterization = swerve.requests.SysIdSwerveSteerGains()
@@ -259,6 +266,55 @@ class CommandSwerveDrivetrain(Subsystem, swerve.SwerveDrivetrain):
         if utils.is_simulation():
             self._start_sim_thread()
 
+    def add_request_listener(self, listener: Callable[[swerve.requests.SwerveRequest], None]) -> None:
+        """
+        Registers a function that is called with every control request given to
+        this drivetrain, for monitors that stamp or record requests.
+
+        :param listener: Function called with each request before it is applied
+        :type listener: Callable[[swerve.requests.SwerveRequest], None]
+        """
+        self._request_listeners.append(listener)
+
+    def remove_request_listener(self, listener: Callable[[swerve.requests.SwerveRequest], None]) -> None:
+        """
+        Unregisters a function added with add_request_listener.
+
+        :param listener: Function to remove
+        :type listener: Callable[[swerve.requests.SwerveRequest], None]
+        """
+        if listener in self._request_listeners:
+            self._request_listeners.remove(listener)
+
+    def set_control(self, request: swerve.requests.SwerveRequest):
+        if self._dry_run:
+            return
+        for listener in self._request_listeners:
+            listener(request)
+        return swerve.SwerveDrivetrain.set_control(self, request)
+
+    def seed_field_centric(self):
+        if self._dry_run:
+            return
+        return swerve.SwerveDrivetrain.seed_field_centric(self)
+
+    def reset_pose(self, pose: Pose2d):
+        if self._dry_run:
+            return
+        return swerve.SwerveDrivetrain.reset_pose(self, pose)
+
+    @contextmanager
+    def dry_run(self):
+        """
+        Drops control requests and odometry resets made inside the block, so a
+        command can be run ahead of time without moving or re-seeding the robot.
+        """
+        self._dry_run = True
+        try:
+            yield
+        finally:
+            self._dry_run = False
+
     def apply_request(
         self, request: Callable[[], swerve.requests.SwerveRequest]
     ) -> Command:
@@ -325,9 +381,19 @@ class CommandSwerveDrivetrain(Subsystem, swerve.SwerveDrivetrain):
         self._sim_notifier = Notifier(_sim_periodic)
         self._sim_notifier.startPeriodic(self._SIM_LOOP_PERIOD)
 
-    def should_flip_path():
+    def should_flip_path(self):
         return DriverStation.getAlliance() == DriverStation.Alliance.kRed
 
+    def get_operator_velocity(self) -> tuple[float, float]:
+        """Measured translational velocity in m/s, in the operator-relative field frame FieldCentric requests use"""
+        state = self.get_state()
+        heading = state.pose.rotation() - self.get_operator_forward_direction()
+        speeds = state.speeds
+        return (
+            speeds.vx * heading.cos() - speeds.vy * heading.sin(),
+            speeds.vx * heading.sin() + speeds.vy * heading.cos(),
+        )
+
     def get_robot_relative_speed(self):
         
         return self.get_state().speeds
@@ -1,3 +1,6 @@
+import copy
+import math
+import threading
 from commands2 import Command, Subsystem, cmd
 from enum import Enum
 from utils.HashMap import HashMap
@@ -8,8 +11,12 @@ from wpilib import RobotController
 from wpimath.controller import PIDController
 from utils.constants import ELEVATOR_LEVELS, single_rotation_inches
 from utils.math import inchesToRotations
-from wpilib import SmartDashboard
+from phoenix6 import SignalLogger
 from utils.motor_constants import percent_to_voltage, MOTOR_CONFIG, voltage_to_percent
+from utils.tunables import TUNABLES
+from utils.bringup import BRINGUP
+from utils.fast_loop import FastLoop, Mailbox, FAST_LOOP_PERIOD
+from utils.mechanism_telemetry import MechanismTelemetry
 
 class ElevatorPositions(Enum):
     Level1 = 16
@@ -34,19 +41,43 @@ class Elevator(Subsystem):
         self.following_motor = following_motor
         self.config = MOTOR_CONFIG["elevator"]
 
-        # Zero both motors before any movement
-        self.leading_motor.set_position(0)
-        self.following_motor.set_position(0)
+        # Zero both motors before any movement; the position loop waits for it
+        self._zeroed = (
+            BRINGUP.configure("elevator_leading", self.leading_motor, position=0),
+            BRINGUP.configure("elevator_following", self.following_motor, position=0),
+        )
 
+        # Gains come from MOTOR_CONFIG; tools/tune_gains.py searches them offline
         self.position_controller = PIDController(
-            0.5,  # P gain - Increased for stronger position holding, 0.4375
-            0.01,  # I gain - Added to eliminate steady-state error
-            0  # D gain - Increased for better damping
+            self.config["kP"], self.config["kI"], self.config["kD"], FAST_LOOP_PERIOD
         )
-        self.position_controller.setIZone(0.125)
-        self.position_controller.setTolerance(0.5)
-        
-        self.kG = 0.1  # Increased gravity compensation
+        self.position_controller.setIZone(self.config["i_zone"])
+        self.position_controller.setTolerance(self.config["tolerance"])
+
+        # Live tuning from the dashboard. The controller belongs to the position loop
+        # thread, so edits are handed over and applied there between runs
+        self._gains = Mailbox[dict[str, float]]({
+            "kP": self.position_controller.getP(),
+            "kI": self.position_controller.getI(),
+            "kD": self.position_controller.getD(),
+            "IZone": self.position_controller.getIZone(),
+            "Tolerance": self.position_controller.getErrorTolerance(),
+            "kG": self.config["kG"],
+        })
+        self._applied_gains = self._gains.get()
+        self.kG = self._applied_gains["kG"]
+        for name, value in self._applied_gains.items():
+            TUNABLES.add(f"Elevator/{name}", value, lambda value, name=name: self._gains.put({**self._gains.get(), name: value}))
+
+        # The position loop runs on its own 5 ms thread; commands hand it a target in
+        # rotations (None when idle) and read back (position, at setpoint)
+        self._target = Mailbox[float | None](None)
+        self._measurement = Mailbox[tuple[float, bool]]((0.0, False))
+        self._output_lock = threading.Lock()
+        self._loop_position = copy.deepcopy(self.leading_motor.get_position(False))
+        self._position_loop = FastLoop("Elevator", self._run_position_loop)
+        self._setpoint = math.nan
+        self._telemetry = MechanismTelemetry("Elevator", [self.leading_motor, self.following_motor], single_rotation_inches)
 
         self.sys_id_routine = SysIdRoutine(
             SysIdRoutine.Config(stepVoltage=3),
@@ -58,17 +89,45 @@ class Elevator(Subsystem):
     def periodic(self):
         leading_pos = self.leading_motor.get_position().value
         following_pos = self.following_motor.get_position().value
-        SmartDashboard.putNumber("Elevator/Leading Motor Position", leading_pos)
-        SmartDashboard.putNumber("Elevator/Following Motor Position", following_pos)
-        SmartDashboard.putNumber("Elevator/Leading Motor Position(in)", leading_pos * single_rotation_inches)
-        SmartDashboard.putNumber("Elevator/Following Motor Position(in)", following_pos * single_rotation_inches)
+        SignalLogger.write_double("Elevator/LeadingPosition", leading_pos * single_rotation_inches, "inches")
+        SignalLogger.write_double("Elevator/FollowingPosition", following_pos * single_rotation_inches, "inches")
+        self._position_loop.publish_stats()
+        self._telemetry.publish(self._setpoint)
 
-    def move_motor(self, speed_percent: float):
+    def _set_output(self, speed_percent: float):
         speed_percent = max(-self.config["max_speed"], min(speed_percent, self.config["max_speed"]))
         voltage = percent_to_voltage(speed_percent)
         self.leading_motor.setVoltage(voltage)
         self.following_motor.setVoltage(-voltage)
-        self.periodic()
+
+    def move_motor(self, speed_percent: float):
+        with self._output_lock:
+            self._set_output(speed_percent)
+
+    def _run_position_loop(self, dt: float):
+        with self._output_lock:
+            target = self._target.get()
+            if target is None or not all(future.done() for future in self._zeroed):
+                return
+            gains = self._gains.get()
+            if gains is not self._applied_gains:
+                self._apply_gains(gains)
+            current_position = self._loop_position.refresh().value
+            pid_output = self.position_controller.calculate(current_position, target)
+            self._measurement.put((current_position, self.position_controller.atSetpoint()))
+
+            # Volts that hold the carriage against gravity
+            output = pid_output + self.kG
+
+            self._set_output(voltage_to_percent(output))
+
+    def _apply_gains(self, gains: dict[str, float]) -> None:
+        """Called on the position loop thread with the latest tuned gains"""
+        self.position_controller.setPID(gains["kP"], gains["kI"], gains["kD"])
+        self.position_controller.setIZone(gains["IZone"])
+        self.position_controller.setTolerance(gains["Tolerance"])
+        self.kG = gains["kG"]
+        self._applied_gains = gains
 
     def move(self, value: float | str, mode: ElevatorMode = ElevatorMode.MANUAL) -> Command:
         """Unified movement function that supports both manual and position-based control
@@ -78,10 +137,13 @@ class Elevator(Subsystem):
                   or target position in inches/level name for position mode
             mode: ElevatorMode.MANUAL for direct control or ElevatorMode.POSITION for PID control
         """
+        # Both kinds require the elevator, so a new move interrupts the previous one
+        # before its brake() could stop the loop the new move started
         if mode == ElevatorMode.MANUAL:
             return cmd.runEnd(
                 lambda: self.move_motor(float(value)),
-                lambda: self.brake()
+                lambda: self.brake(),
+                self
             )
         else:
             if isinstance(value, str):
@@ -91,24 +153,28 @@ class Elevator(Subsystem):
             else:
                 target_position = float(value)
 
-            def execute():
-                current_position = self.leading_motor.get_position().value
-                pid_output = self.position_controller.calculate(
-                    current_position, 
-                    inchesToRotations(target_position)
-                )
+            def start():
+                self.position_controller.reset()
+                self.set_target(target_position)
                 
-                output = pid_output # + self.kG
-                
-                self.move_motor(voltage_to_percent(output))
-                
-            def is_finished():
-                self.periodic()
-                return self.position_controller.atSetpoint()
-                
-            return cmd.run(execute).until(is_finished).finallyDo(lambda interrupted: self.brake())
+            return cmd.runOnce(start, self).andThen(cmd.waitUntil(lambda: self._measurement.get()[1])).finallyDo(lambda interrupted: self.brake())
+
+    def set_target(self, inches: float) -> None:
+        """Hold the given height on the fast position loop until brake() is called"""
+        self._measurement.put((self.leading_motor.get_position().value, False))
+        self._target.put(inchesToRotations(inches))
+        self._setpoint = inches
+        self._position_loop.start()
+
+    def height(self) -> float:
+        """Current carriage height in inches"""
+        return self.leading_motor.get_position().value * single_rotation_inches
 
     def brake(self):
+        with self._output_lock:
+            self._target.put(None)
+        self._setpoint = math.nan
+        self._position_loop.stop()
         self.leading_motor.setVoltage(0)
         self.leading_motor.setNeutralMode(signals.NeutralModeValue.BRAKE)
         self.following_motor.setVoltage(0)
@@ -1,25 +1,88 @@
+from enum import Enum, unique
 from commands2 import Command, Subsystem, cmd
 from wpilib import XboxController
 from phoenix6.hardware import TalonFX
-from phoenix6 import controls, signals
-from utils.motor_constants import percent_to_voltage
+from phoenix6 import configs, controls, signals
+from utils.bringup import BRINGUP
+from utils.mechanism_telemetry import MechanismTelemetry
+from utils.motor_constants import MOTOR_CONFIG
+
+@unique
+class RotatePositions(Enum):
+    """Intake angles in degrees from the stowed position"""
+    Stow = 0
+    Intake = 55
+    Level1 = 20
+    # The L2 and L3 branches are angled the same, so both levels score at this angle
+    Level2 = 35
+    Level4 = 70
 
 class RotateCommand(Subsystem):
     def __init__(self, motor: TalonFX):
         super().__init__()
         self.motor: TalonFX = motor
-        self.motor.setNeutralMode(signals.NeutralModeValue.BRAKE)
+        self.config = MOTOR_CONFIG["rotate"]
+
+        # Position control, motion profile and soft limits all run on the motor
+        motor_config = configs.TalonFXConfiguration()
+        motor_config.motor_output.neutral_mode = signals.NeutralModeValue.BRAKE
+        motor_config.feedback.sensor_to_mechanism_ratio = self.config["gear_ratio"]
+        motor_config.slot0.k_p = self.config["kP"]
+        motor_config.slot0.k_d = self.config["kD"]
+        motor_config.motion_magic.motion_magic_cruise_velocity = self.config["cruise_velocity"]
+        motor_config.motion_magic.motion_magic_acceleration = self.config["acceleration"]
+        motor_config.software_limit_switch = (
+            configs.SoftwareLimitSwitchConfigs()
+            .with_forward_soft_limit_enable(True)
+            .with_forward_soft_limit_threshold(self.config["forward_soft_limit"] / 360)
+            .with_reverse_soft_limit_enable(True)
+            .with_reverse_soft_limit_threshold(self.config["reverse_soft_limit"] / 360)
+        )
+        # Motion Magic needs the gains and zero in place, so control waits for bring-up
+        self._configured = BRINGUP.configure("rotate", self.motor, motor_config, position=0)
+        self._controlling = False
+
+        self._position = self.motor.get_position()
+        self._request = controls.MotionMagicVoltage(0).with_slot(0)
+        self.setpoint = RotatePositions.Stow.value
+        self._telemetry = MechanismTelemetry("Rotate", [self.motor], 360)
+
+    def periodic(self):
+        if not self._controlling and self._configured.done():
+            self._controlling = True
+            self.motor.set_control(self._request.with_position(self.setpoint / 360))
+        self._telemetry.publish(self.setpoint)
+
+    def set_angle(self, degrees: float) -> None:
+        """Send a new angle to the motor's Motion Magic loop, clamped to the soft limits"""
+        degrees = max(self.config["reverse_soft_limit"], min(degrees, self.config["forward_soft_limit"]))
+        if degrees == self.setpoint:
+            return
+        self.setpoint = degrees
+        if self._controlling:
+            self.motor.set_control(self._request.with_position(degrees / 360))
+
+    def angle(self) -> float:
+        """Current intake angle in degrees"""
+        return self._position.refresh().value * 360
+
+    def at_setpoint(self) -> bool:
+        return abs(self.angle() - self.setpoint) <= self.config["tolerance"]
+
+    def move_to(self, position: RotatePositions) -> Command:
+        """Rotate to a preset angle and finish once it is reached"""
+        return cmd.runOnce(lambda: self.set_angle(position.value), self).andThen(
+            cmd.waitUntil(self.at_setpoint)
+        )
         
     def rotate(self, stick_value: int) -> None:
+        """Nudge the angle setpoint with the stick (-100 to 100); called every loop"""
         normalized_value = stick_value / 100.0
-        if abs(normalized_value) < 0.1:
-            self.brake()
+        if abs(normalized_value) < self.config["deadband"]:
             return
-            
-        motor_speed = 20 * normalized_value
-        self.motor.setVoltage(percent_to_voltage(motor_speed))
-        self.motor.setNeutralMode(signals.NeutralModeValue.COAST)
+
+        self.set_angle(self.setpoint + normalized_value * self.config["nudge_rate"] * 0.02)
         
     def brake(self) -> None:
-        self.motor.setVoltage(0)
-        self.motor.setNeutralMode(signals.NeutralModeValue.BRAKE)
\ No newline at end of file
+        """Hold the current angle"""
+        self.set_angle(self.angle())
@@ -1,6 +1,10 @@
+import math
 from commands2 import Command, Subsystem, cmd
+from commands2.button import Trigger
 from phoenix6.hardware import TalonFX
-from phoenix6 import controls, signals
+from phoenix6 import BaseStatusSignal, SignalLogger, controls, signals
+from utils.filters import EwmaHysteresis
+from utils.mechanism_telemetry import MechanismTelemetry
 from utils.motor_constants import percent_to_voltage, MOTOR_CONFIG
 
 class Wheels(Subsystem):
@@ -10,7 +14,80 @@ class Wheels(Subsystem):
         self.bottom_wheels: TalonFX = bottom_wheels
         self.config = MOTOR_CONFIG["wheels"]
 
+        # Stream current and velocity from both motors for game piece detection
+        self._signals = [
+            self.top_wheels.get_stator_current(),
+            self.bottom_wheels.get_stator_current(),
+            self.top_wheels.get_velocity(),
+            self.bottom_wheels.get_velocity(),
+        ]
+        BaseStatusSignal.set_update_frequency_for_all(100, *self._signals)
+        self._current_filter = EwmaHysteresis(
+            self.config["piece_filter_alpha"],
+            self.config["piece_current"],
+            self.config["piece_release_current"],
+            self.config["piece_debounce_loops"],
+        )
+        self._velocity_filter = EwmaHysteresis(
+            self.config["piece_filter_alpha"],
+            self.config["piece_max_velocity"],
+            self.config["piece_stalled_velocity"],
+            self.config["piece_debounce_loops"],
+        )
+        self._direction = 0
+        self._loops_running = 0
+        self._ejecting_piece = False
+        self._has_piece = False
+        self.has_piece = Trigger(lambda: self._has_piece)
+        """True from when a coral is pulled in until it has been ejected"""
+        self._telemetry = MechanismTelemetry("Wheels", [self.bottom_wheels, self.top_wheels])
+
+    def periodic(self):
+        # Open loop, so there is no setpoint to report
+        self._telemetry.publish(math.nan)
+        # Logged for tools/match_analytics.py, which splits matches into cycles on these
+        SignalLogger.write_integer("Wheels/Direction", self._direction)
+        SignalLogger.write_boolean("Wheels/HasPiece", self._has_piece)
+        if self._direction == 0:
+            return
+
+        BaseStatusSignal.refresh_all(*self._signals)
+        top_current, bottom_current, top_velocity, bottom_velocity = self._signals
+        loaded = self._current_filter.update(abs(top_current.value) + abs(bottom_current.value))
+        spinning = self._velocity_filter.update(max(abs(top_velocity.value), abs(bottom_velocity.value)))
+
+        # Ignore the inrush current while the wheels spin up
+        self._loops_running += 1
+        if self._loops_running < self.config["piece_spinup_loops"]:
+            return
+
+        if self._direction == self._intake_direction():
+            if loaded and not spinning:
+                self._has_piece = True
+        elif loaded:
+            self._ejecting_piece = True
+        elif self._ejecting_piece:
+            # Current dropped back after the piece pushed through
+            self._has_piece = False
+            self._ejecting_piece = False
+
+    def _intake_direction(self) -> int:
+        return 1 if self.config["intake_speed"] > 0 else -1
+
+    def _end_run(self) -> None:
+        # Whatever was held is out once an eject run ends, even if it timed out before the current dropped
+        if self._direction == -self._intake_direction():
+            self._has_piece = False
+
     def move(self, voltage: float):
+        direction = (voltage > 0) - (voltage < 0)
+        if direction != self._direction:
+            self._end_run()
+            self._direction = direction
+            self._loops_running = 0
+            self._ejecting_piece = False
+            self._current_filter.reset()
+            self._velocity_filter.reset()
         self.top_wheels.setVoltage(percent_to_voltage(voltage * 0.20))
         self.bottom_wheels.setVoltage(-voltage)
         
@@ -20,12 +97,23 @@ class Wheels(Subsystem):
         
         return cmd.runEnd(
             lambda: self.move(voltage),
-            lambda: self.brake()
+            lambda: self.brake(),
+            self
         )
+
+    def intake(self) -> Command:
+        """Run the wheels inward until a coral is detected"""
+        return self.run(self.config["intake_speed"]).until(self.has_piece)
         
+    def reset_piece(self) -> Command:
+        """Forget a detected coral, for when one was removed by hand"""
+        return cmd.runOnce(lambda: setattr(self, "_has_piece", False)).ignoringDisable(True)
+
     def brake(self) -> None:
         """Stop the motor and engage brake mode"""
+        self._end_run()
+        self._direction = 0
         self.top_wheels.setVoltage(0)
         self.top_wheels.setNeutralMode(signals.NeutralModeValue.BRAKE)
         self.bottom_wheels.setVoltage(0)
-        self.bottom_wheels.setNeutralMode(signals.NeutralModeValue.BRAKE)
\ No newline at end of file
+        self.bottom_wheels.setNeutralMode(signals.NeutralModeValue.BRAKE)
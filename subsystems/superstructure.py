@@ -0,0 +1,131 @@
+from enum import Enum
+from commands2 import Command, Subsystem, cmd
+from ntcore import NetworkTableInstance
+from wpilib import Timer
+from subsystems.elevator.command import Elevator, ElevatorPositions
+from subsystems.elevator.coral.rotate import RotateCommand, RotatePositions
+from subsystems.elevator.coral.wheels import Wheels
+from utils.constants import (SUPERSTRUCTURE_TRAVEL_ANGLE, SUPERSTRUCTURE_ROTATE_LEAD,
+    SUPERSTRUCTURE_HEIGHT_TOLERANCE, SUPERSTRUCTURE_EJECT_SPEED, SUPERSTRUCTURE_EJECT_TIME)
+
+class SuperstructureState(Enum):
+    """Elevator height (inches) and intake angle (degrees) for each goal"""
+    STOW = (0, RotatePositions.Stow.value)
+    INTAKE = (0, RotatePositions.Intake.value)
+    L1 = (ElevatorPositions.Level1.value, RotatePositions.Level1.value)
+    L2 = (ElevatorPositions.Level2.value, RotatePositions.Level2.value)
+    # Same intake angle as L2; the two branches are parallel
+    L3 = (ElevatorPositions.Level3.value, RotatePositions.Level2.value)
+    L4 = (ElevatorPositions.Level4.value, RotatePositions.Level4.value)
+
+class Superstructure(Subsystem):
+    """
+    Moves the elevator and intake together toward a goal state.
+
+    While a goal is set, periodic() re-evaluates two guards from live positions
+    every loop instead of running the motions one after another. First, the
+    elevator only travels while the intake is tucked at or below the travel
+    angle. Second, the intake only swings past the travel angle once the
+    elevator is within the lead distance of its goal height. This lets the
+    elevator start as soon as the intake is clear and the intake finish its
+    swing while the elevator settles.
+    """
+
+    def __init__(self, elevator: Elevator, rotate: RotateCommand, wheels: Wheels):
+        super().__init__()
+        self._elevator = elevator
+        self._rotate = rotate
+        self._wheels = wheels
+        self._goal: SuperstructureState | None = None
+        self._elevator_target: float | None = None
+        self.state = SuperstructureState.STOW
+        self._cycle_start = 0.0
+
+        table = NetworkTableInstance.getDefault().getTable("Superstructure")
+        self._state_pub = table.getStringTopic("State").publish()
+        self._goal_pub = table.getStringTopic("Goal").publish()
+        self._cycle_time_pub = table.getDoubleTopic("LastCycleTime").publish()
+
+    def periodic(self):
+        self._state_pub.set(self.state.name)
+        self._goal_pub.set(self._goal.name if self._goal is not None else "")
+        if self._goal is None:
+            return
+
+        goal_height, goal_angle = self._goal.value
+        near_goal = abs(self._elevator.height() - goal_height) <= SUPERSTRUCTURE_ROTATE_LEAD
+        self._rotate.set_angle(goal_angle if near_goal else min(goal_angle, SUPERSTRUCTURE_TRAVEL_ANGLE))
+
+        intake_clear = self._rotate.angle() <= SUPERSTRUCTURE_TRAVEL_ANGLE + self._rotate.config["tolerance"]
+        if (near_goal or intake_clear) and self._elevator_target != goal_height:
+            self._elevator_target = goal_height
+            self._elevator.set_target(goal_height)
+
+    def at_goal(self) -> bool:
+        if self._goal is None:
+            return False
+        goal_height, goal_angle = self._goal.value
+        return (
+            abs(self._elevator.height() - goal_height) <= SUPERSTRUCTURE_HEIGHT_TOLERANCE
+            and self._rotate.setpoint == goal_angle
+            and self._rotate.at_setpoint()
+        )
+
+    def _set_goal(self, goal: SuperstructureState) -> None:
+        self._goal = goal
+        self.periodic()
+
+    def _reached(self) -> None:
+        self.state = self._goal
+
+    def _release(self) -> None:
+        """Give the mechanisms back to their own commands"""
+        self._goal = None
+        self._elevator_target = None
+        self._elevator.brake()
+
+    def _move_to(self, goal: SuperstructureState) -> Command:
+        return (
+            # The elevator is driven from periodic(), so the command has to hold it too
+            cmd.runOnce(lambda: self._set_goal(goal), self, self._rotate, self._elevator)
+            .andThen(cmd.waitUntil(self.at_goal))
+            .andThen(cmd.runOnce(self._reached))
+        )
+
+    def _eject(self) -> Command:
+        # With a detected piece, stop as soon as it has left; otherwise run for the full time
+        return cmd.either(
+            self._wheels.run(SUPERSTRUCTURE_EJECT_SPEED).until(lambda: not self._wheels.has_piece.getAsBoolean()),
+            self._wheels.run(SUPERSTRUCTURE_EJECT_SPEED),
+            self._wheels.has_piece.getAsBoolean,
+        ).withTimeout(SUPERSTRUCTURE_EJECT_TIME)
+
+    def go_to(self, goal: SuperstructureState) -> Command:
+        """Move to a goal state and finish once both mechanisms are there"""
+        return self._move_to(goal).finallyDo(lambda interrupted: self._release())
+
+    def intake(self) -> Command:
+        """Swing out and run the wheels together, then stow once a coral is in"""
+        return (
+            cmd.deadline(self._wheels.intake(), self._move_to(SuperstructureState.INTAKE))
+            .andThen(self._move_to(SuperstructureState.STOW))
+            .finallyDo(lambda interrupted: self._release())
+        )
+
+    def score(self, level: SuperstructureState) -> Command:
+        """Raise and swing to a level, eject the coral and stow, all from one press"""
+        def start_cycle():
+            self._cycle_start = Timer.getFPGATimestamp()
+
+        def end_cycle(interrupted: bool):
+            if not interrupted:
+                self._cycle_time_pub.set(Timer.getFPGATimestamp() - self._cycle_start)
+            self._release()
+
+        return (
+            cmd.runOnce(start_cycle)
+            .andThen(self._move_to(level))
+            .andThen(self._eject())
+            .andThen(self._move_to(SuperstructureState.STOW))
+            .finallyDo(end_cycle)
+        )
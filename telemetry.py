@@ -4,15 +4,25 @@ from wpilib import Color, Color8Bit, Mechanism2d, MechanismLigament2d, SmartDash
 from wpimath.geometry import Pose2d
 from wpimath.kinematics import ChassisSpeeds, SwerveModulePosition, SwerveModuleState
 
+from utils.odometry_health import OdometryHealthMonitor
+from utils.traction_monitor import TractionMonitor
+
 class Telemetry:
-    def __init__(self, max_speed: units.meters_per_second):
+    def __init__(self, max_speed: units.meters_per_second, health: OdometryHealthMonitor | None = None,
+                 traction: TractionMonitor | None = None):
         """
         Construct a telemetry object with the specified max speed of the robot.
 
         :param max_speed: Maximum speed
         :type max_speed: units.meters_per_second
+        :param health: Odometry health monitor fed with every drive state
+        :type health: OdometryHealthMonitor | None
+        :param traction: Slip and collision detector fed with every drive state
+        :type traction: TractionMonitor | None
         """
         self._max_speed = max_speed
+        self._health = health
+        self._traction = traction
         SignalLogger.start()
 
         # What to publish over networktables for telemetry
@@ -70,6 +80,9 @@ class Telemetry:
             .getRoot("RootDirection", 0.5, 0.5)
             .appendLigament("Direction", 0.1, 0, 0, Color8Bit(Color.kWhite)),
         ]
+        # Register once here; putData from the odometry thread races the main loop's dashboard update
+        for i, mechanism in enumerate(self._module_mechanisms):
+            SmartDashboard.putData(f"Module {i}", mechanism)
 
     def telemeterize(self, state: swerve.SwerveDrivetrain.SwerveDriveState):
         """
@@ -77,6 +90,11 @@ class Telemetry:
         Optimized for thread safety and performance.
         """
         try:
+            if self._health is not None:
+                self._health.update(state)
+            if self._traction is not None:
+                self._traction.update(state)
+
             # Prepare all data arrays first to minimize time spent in critical sections
             pose_array = [state.pose.x, state.pose.y, state.pose.rotation().degrees()]
             module_states_array = []
@@ -111,7 +129,6 @@ class Telemetry:
                 self._module_speeds[i].setAngle(angle_deg)
                 self._module_directions[i].setAngle(angle_deg)
                 self._module_speeds[i].setLength(speed_normalized)
-                SmartDashboard.putData(f"Module {i}", self._module_mechanisms[i])
 
         except Exception as e:
             # Log any errors but don't crash
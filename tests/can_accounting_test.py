@@ -0,0 +1,291 @@
+'''
+    Counts the CAN traffic the mechanism subsystems generate per scheduler loop.
+
+    Elevator, Climb, Wheels and RotateCommand are built on CountingTalonFX
+    stand-ins, which tally control requests, config transactions (configurator
+    apply/refresh/set_position, so setNeutralMode counts as two) and refreshes
+    of the status signals they handed out. Each operating mode runs a command
+    for LOOPS loops of simulated time, moving the mechanism to its target
+    partway through where there is no physics to do it, and checks the mode
+    reached the transition it ends in, like detecting a piece or holding a
+    stalled winch, so the per-loop bounds cover that loop too. Each bound is
+    the mode's expected worst loop plus HEADROOM; a change that adds bus load
+    fails here instead of on the robot.
+'''
+
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable
+
+import pytest
+from commands2 import Command, CommandScheduler, cmd
+from phoenix6 import BaseStatusSignal, StatusSignal, controls, unmanaged
+from phoenix6.hardware import TalonFX
+from wpilib.simulation import DriverStationSim, isTimingPaused, pauseTiming, resumeTiming, stepTimingAsync
+
+from subsystems.climb.command import Climb
+from subsystems.elevator.command import Elevator, ElevatorMode, ElevatorPositions
+from subsystems.elevator.coral.rotate import RotateCommand, RotatePositions
+from subsystems.elevator.coral.wheels import Wheels
+from utils.bringup import BRINGUP
+from utils.fast_loop import FastLoop
+from utils.math import inchesToRotations
+from utils.motor_constants import MOTOR_CONFIG
+
+LOOP_PERIOD = 0.02
+LOOPS = 25
+# Loop at which mechanisms without physics are put at their target
+ARRIVE_LOOP = 10
+
+# Valid CAN IDs (0-62) clear of the robot's own devices, which later tests create
+ELEVATOR_LEADING_ID = 40
+ELEVATOR_FOLLOWING_ID = 41
+CLIMB_ID = 42
+TOP_WHEELS_ID = 43
+BOTTOM_WHEELS_ID = 44
+ROTATE_ID = 45
+
+@dataclass
+class CanCounts:
+    control: int = 0
+    config: int = 0
+    status: int = 0
+
+    def __add__(self, other: "CanCounts") -> "CanCounts":
+        return CanCounts(self.control + other.control, self.config + other.config, self.status + other.status)
+
+    def __sub__(self, other: "CanCounts") -> "CanCounts":
+        return CanCounts(self.control - other.control, self.config - other.config, self.status - other.status)
+
+class CountingTalonFX(TalonFX):
+    """A TalonFX that tallies every control request, config transaction and refresh of its status signals"""
+
+    def __init__(self, device_id: int):
+        super().__init__(device_id)
+        self.counts = CanCounts()
+        self.last_request = None
+        # Identities of the signals this device's getters returned; a device hands out one object per signal
+        self.signals: set[int] = set()
+        configurator = self.configurator
+        for name in ("apply", "refresh", "set_position"):
+            setattr(configurator, name, self._counted_config(getattr(configurator, name)))
+        for name in dir(TalonFX):
+            if name.startswith("get_"):
+                setattr(self, name, self._recorded_getter(getattr(self, name)))
+
+    def _counted_config(self, call):
+        def counted(*args, **kwargs):
+            self.counts.config += 1
+            return call(*args, **kwargs)
+        return counted
+
+    def _recorded_getter(self, getter):
+        def recorded(*args, **kwargs):
+            result = getter(*args, **kwargs)
+            if isinstance(result, BaseStatusSignal):
+                self.signals.add(id(result))
+            return result
+        return recorded
+
+    def set_control(self, request):
+        # setVoltage(), set() and stopMotor() all end up here
+        self.counts.control += 1
+        self.last_request = request
+        return super().set_control(request)
+
+class CanAccounting:
+    """Attributes status signal refreshes to the counting devices and records per-loop totals"""
+
+    def __init__(self, devices: list[CountingTalonFX]):
+        self.devices = devices
+        self.loops: list[CanCounts] = []
+
+    def _count_status(self, signals) -> None:
+        for signal in signals:
+            for device in self.devices:
+                if id(signal) in device.signals:
+                    device.counts.status += 1
+                    break
+
+    @contextmanager
+    def patched(self, monkeypatch):
+        refresh = StatusSignal.refresh
+        wait_for_update = StatusSignal.wait_for_update
+        refresh_all = BaseStatusSignal.refresh_all
+
+        def counted_refresh(signal, *args, **kwargs):
+            self._count_status((signal,))
+            return refresh(signal, *args, **kwargs)
+
+        def counted_wait_for_update(signal, *args, **kwargs):
+            self._count_status((signal,))
+            return wait_for_update(signal, *args, **kwargs)
+
+        def counted_refresh_all(*signals):
+            flat = [s for group in signals for s in (group if isinstance(group, list) else [group])]
+            self._count_status(flat)
+            return refresh_all(*signals)
+
+        with monkeypatch.context() as patch:
+            patch.setattr(StatusSignal, "refresh", counted_refresh)
+            patch.setattr(StatusSignal, "wait_for_update", counted_wait_for_update)
+            patch.setattr(BaseStatusSignal, "refresh_all", staticmethod(counted_refresh_all))
+            yield self
+
+    def total(self) -> CanCounts:
+        counts = CanCounts()
+        for device in self.devices:
+            counts.control += device.counts.control
+            counts.config += device.counts.config
+            counts.status += device.counts.status
+        return counts
+
+    def run_loop(self, schedule: Command | None = None) -> None:
+        """One robot loop: the scheduler, then the fast loops for the same 20 ms of simulated time"""
+        before = self.total()
+        # Phoenix feeds the actuator enable from a Notifier, which nothing waits on here
+        unmanaged.feed_enable(0.1)
+        # Scheduling a command runs its initialize(), which belongs to this loop's traffic
+        if schedule is not None:
+            schedule.schedule()
+        CommandScheduler.getInstance().run()
+        FastLoop.step_all(LOOP_PERIOD)
+        # Not stepTiming(): under pyfrc the unstarted robot's loop Notifier would never let it return
+        stepTimingAsync(LOOP_PERIOD)
+        # The simulated devices run on the wall clock, so they get the loop's 20 ms too
+        time.sleep(LOOP_PERIOD)
+        self.loops.append(self.total() - before)
+
+    def worst(self) -> CanCounts:
+        return CanCounts(
+            max(loop.control for loop in self.loops),
+            max(loop.config for loop in self.loops),
+            max(loop.status for loop in self.loops),
+        )
+
+@pytest.fixture
+def mechanisms():
+    CommandScheduler.resetInstance()
+    FastLoop.synchronous = True
+    # Filters and debouncers see exactly LOOP_PERIOD per loop whichever runner drives the test
+    was_paused = isTimingPaused()
+    pauseTiming()
+    DriverStationSim.setEnabled(True)
+    DriverStationSim.notifyNewData()
+
+    devices = [
+        CountingTalonFX(ELEVATOR_LEADING_ID),
+        CountingTalonFX(ELEVATOR_FOLLOWING_ID),
+        CountingTalonFX(CLIMB_ID),
+        CountingTalonFX(TOP_WHEELS_ID),
+        CountingTalonFX(BOTTOM_WHEELS_ID),
+        CountingTalonFX(ROTATE_ID),
+    ]
+    subsystems = {
+        "elevator": Elevator(devices[0], devices[1]),
+        "climb": Climb(devices[2]),
+        "wheels": Wheels(devices[3], devices[4]),
+        "rotate": RotateCommand(devices[5]),
+    }
+    BRINGUP.finish()
+    # The first scheduler run does one-time signal lookups and sends the rotate's first request
+    CommandScheduler.getInstance().run()
+    yield subsystems, CanAccounting(devices)
+
+    CommandScheduler.getInstance().cancelAll()
+    # Stops the elevator's position loop while loops are still synchronous
+    subsystems["elevator"].brake()
+    FastLoop.synchronous = False
+    DriverStationSim.setEnabled(False)
+    DriverStationSim.notifyNewData()
+    if not was_paused:
+        resumeTiming()
+    CommandScheduler.resetInstance()
+
+def _put_elevator_at(elevator: Elevator, inches: float) -> None:
+    rotations = inchesToRotations(inches)
+    # The two motors face each other
+    elevator.leading_motor.sim_state.set_raw_rotor_position(rotations)
+    elevator.following_motor.sim_state.set_raw_rotor_position(-rotations)
+
+def _put_rotate_at(rotate: RotateCommand, position: RotatePositions) -> None:
+    rotate.motor.sim_state.set_raw_rotor_position(position.value / 360 * MOTOR_CONFIG["rotate"]["gear_ratio"])
+
+@dataclass
+class Mode:
+    command: Callable[[dict], Command | None]
+    # Most (control, config, status) transactions the mode takes in one loop today
+    expected: CanCounts
+    # Puts the mechanism where the command sends it, since nothing simulates its motion here
+    arrive: Callable[[dict], None] | None = None
+    # The transition the run has to reach for its bound to cover that loop
+    reached: Callable[[dict, Command | None], bool] | None = None
+
+def _finished(subsystems: dict, command: Command) -> bool:
+    return not command.isScheduled()
+
+# Allowed on top of each mode's expected counts, so reordering a read or an extra setpoint does not fail
+# the test while a new per-loop read of a whole device does. Config writes block, so none are allowed.
+HEADROOM = CanCounts(control=1, config=0, status=4)
+
+# Every loop refreshes the elevator's two positions and the climb's four stall signals, and on the loop
+# the mechanism telemetry publishes, its 18 signals too: 24 status refreshes before any mode adds its own.
+MODES = {
+    "idle": Mode(lambda m: None, CanCounts(0, 0, 24)),
+    # Both motors every loop; runs until released, so the steady state is all there is
+    "elevator_manual": Mode(
+        lambda m: cmd.runEnd(lambda: m["elevator"].move_motor(20), m["elevator"].brake),
+        CanCounts(2, 0, 24),
+    ),
+    # Four fast loops per scheduler loop drive both motors and read the position;
+    # reaching the target brakes both, and each setNeutralMode is two config transactions
+    "elevator_position": Mode(
+        lambda m: m["elevator"].move(ElevatorPositions.Level2.value, ElevatorMode.POSITION),
+        CanCounts(8, 4, 25),
+        arrive=lambda m: _put_elevator_at(m["elevator"], ElevatorPositions.Level2.value),
+        reached=_finished,
+    ),
+    # The winch cannot turn in simulation, so it stalls and holds its position, reading it once
+    "climb": Mode(
+        lambda m: m["climb"].run(25),
+        CanCounts(1, 0, 25),
+        reached=lambda m, command: isinstance(m["climb"].motor.last_request, controls.PositionVoltage),
+    ),
+    # The wheels cannot turn either, which reads as a coral pulled in: the loop that detects it
+    # drives both motors and then brakes both
+    "wheels_intake": Mode(
+        lambda m: m["wheels"].intake(),
+        CanCounts(4, 4, 28),
+        reached=lambda m, command: _finished(m, command) and m["wheels"].has_piece.getAsBoolean(),
+    ),
+    # One Motion Magic request, then a position read per loop until it is there
+    "rotate_move": Mode(
+        lambda m: m["rotate"].move_to(RotatePositions.Intake),
+        CanCounts(1, 0, 25),
+        arrive=lambda m: _put_rotate_at(m["rotate"], RotatePositions.Intake),
+        reached=_finished,
+    ),
+    # A new setpoint every loop; runs until released
+    "rotate_nudge": Mode(lambda m: cmd.run(lambda: m["rotate"].rotate(50), m["rotate"]), CanCounts(1, 0, 24)),
+}
+
+@pytest.mark.parametrize("mode", MODES)
+def test_can_transactions_per_loop(mode, mechanisms, monkeypatch):
+    subsystems, accounting = mechanisms
+    spec = MODES[mode]
+    command = spec.command(subsystems)
+    with accounting.patched(monkeypatch):
+        accounting.run_loop(command)
+        for loop in range(1, LOOPS):
+            if loop == ARRIVE_LOOP and spec.arrive is not None:
+                spec.arrive(subsystems)
+            accounting.run_loop()
+
+    if spec.reached is not None:
+        assert spec.reached(subsystems, command), f"{mode} did not reach its transition in {LOOPS} loops"
+    worst = accounting.worst()
+    limit = spec.expected + HEADROOM
+    assert worst.control <= limit.control, worst
+    assert worst.config <= limit.config, worst
+    assert worst.status <= limit.status, worst
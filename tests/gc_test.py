@@ -0,0 +1,62 @@
+'''
+    Checks that the GC policy keeps full collections out of the enabled modes,
+    counting collections through gc.callbacks and the interpreter's generation
+    stats rather than timing pauses.
+'''
+
+import gc
+
+from utils.gc_policy import GcPolicy
+
+# Containers allocated by the workload, enough for several full collections at the default thresholds
+WORKLOAD = 100_000
+
+def run_workload(policy: GcPolicy, enabled: bool) -> tuple[list[int], list[int]]:
+    """Allocate garbage and long-lived objects; returns collections per generation from the policy and from gc"""
+    if enabled:
+        policy.enter_enabled()
+    else:
+        policy.enter_disabled()
+    counted = list(policy.collections)
+    stats = [generation["collections"] for generation in gc.get_stats()]
+    keep = []
+    for _ in range(WORKLOAD):
+        node = []
+        node.append(node)
+        keep.append((node,))
+    counted = [after - before for after, before in zip(policy.collections, counted)]
+    stats = [generation["collections"] - before for generation, before in zip(gc.get_stats(), stats)]
+    return counted, stats
+
+def test_policy_suppresses_full_collections():
+    policy = GcPolicy()
+    try:
+        policy.freeze()
+        disabled, disabled_stats = run_workload(policy, enabled=False)
+        enabled, enabled_stats = run_workload(policy, enabled=True)
+        # The deferred full collection runs on the next disable
+        policy.enter_disabled()
+    finally:
+        policy.close()
+        gc.unfreeze()
+
+    assert disabled == disabled_stats
+    assert enabled == enabled_stats
+    # Without the policy the same workload triggers full collections
+    assert disabled[2] > 0
+    assert enabled[2] == 0
+    assert policy.enabled_full_collections == 0
+    # Young generations keep running while enabled
+    assert enabled[0] > 0
+    assert policy._on_gc not in gc.callbacks
+
+def test_no_full_collections_during_match(control, robot):
+    with control.run_robot():
+        control.step_timing(seconds=0.5, autonomous=True, enabled=False)
+        control.step_timing(seconds=15, autonomous=True, enabled=True)
+        control.step_timing(seconds=0.5, autonomous=False, enabled=False)
+        control.step_timing(seconds=120, autonomous=False, enabled=True)
+
+        assert robot.gc_policy.enabled_full_collections == 0
+    # endCompetition unregistered the policy's callback
+    assert robot.gc_policy._on_gc not in gc.callbacks
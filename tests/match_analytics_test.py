@@ -0,0 +1,73 @@
+'''
+    Runs tools/match_analytics.py on small synthetic matches: one that never
+    scores, one that only scores its preload, and one with a retried intake,
+    checking the cycles found in each.
+'''
+
+import numpy as np
+
+from subsystems.elevator.command import ElevatorPositions
+from tools.match_analytics import find_cycles, summarize
+from utils.motor_constants import MOTOR_CONFIG
+
+INTAKE = 1 if MOTOR_CONFIG["wheels"]["intake_speed"] > 0 else -1
+EJECT = -INTAKE
+
+def _match(direction, has_piece=None, elevator=None, pose=None) -> dict:
+    """A converted dataset from (timestamps, values) pairs, named as the robot logs them"""
+    dataset = {"Wheels.Direction": (np.array(direction[0], dtype=np.float64), np.array(direction[1]))}
+    if has_piece is not None:
+        dataset["Wheels.HasPiece"] = (np.array(has_piece[0], dtype=np.float64), np.array(has_piece[1]))
+    if elevator is not None:
+        dataset["Elevator.LeadingPosition"] = (np.array(elevator[0], dtype=np.float64), np.array(elevator[1], dtype=np.float64))
+    if pose is not None:
+        dataset["DriveState.Pose"] = (np.array(pose[0], dtype=np.float64), np.array(pose[1], dtype=np.float64))
+    return dataset
+
+def test_no_score():
+    # Intakes a piece, then ejects once without one detected: nothing is scored
+    match = _match(
+        ([0, 1, 2, 4, 5], [0, INTAKE, 0, EJECT, 0]),
+        has_piece=([0, 1.5, 5], [False, False, False]),
+        elevator=([0, 3], [0, ElevatorPositions.Level2.value]),
+    )
+    starts, scores = find_cycles(*match["Wheels.Direction"], match["Wheels.HasPiece"])
+    assert len(starts) == 0 and len(scores) == 0
+
+    summary = summarize("no_score", match)
+    assert summary.cycles == []
+    assert summary.level_time["Level2"] == 0.0
+
+def test_preload_only():
+    # Starts holding the preload and scores it without ever intaking
+    match = _match(
+        ([0, 3, 4], [0, EJECT, 0]),
+        has_piece=([0, 4], [True, False]),
+        elevator=([0, 2, 5], [0, ElevatorPositions.Level4.value, 0]),
+    )
+    summary = summarize("preload_only", match)
+    assert summary.cycles == []
+    assert summary.level_time["Level4"] == 3.0
+
+def test_retried_intake():
+    # The first intake misses, the second picks the coral up, and it is scored on L3
+    match = _match(
+        ([0, 1, 2, 3, 4, 6, 7], [0, INTAKE, 0, INTAKE, 0, EJECT, 0]),
+        has_piece=([0, 3.5, 7], [False, True, False]),
+        elevator=([0, 5, 6.5], [0, ElevatorPositions.Level3.value, 0]),
+        pose=([0, 1, 6, 8], [[0, 0, 0], [0, 0, 0], [5, 0, 0], [5, 0, 0]]),
+    )
+    summary = summarize("retried_intake", match)
+    assert len(summary.cycles) == 1
+    cycle = summary.cycles[0]
+    # The cycle runs from the first intake after the previous score
+    assert (cycle.start, cycle.score) == (1.0, 6.0)
+    assert cycle.level == "Level3"
+    assert cycle.duration == 5.0
+    assert cycle.distance == 5.0
+
+    # Without elevator samples the cycle is still found, just without a level
+    match["Elevator.LeadingPosition"] = (np.array([]), np.array([]))
+    summary = summarize("retried_intake", match)
+    assert len(summary.cycles) == 1
+    assert summary.cycles[0].level is None
@@ -0,0 +1,63 @@
+'''
+    Scores a coral on L4 in simulation twice: once with the mechanisms moved one
+    after another, as separate operator actions would, and once with the
+    superstructure macro. The macro overlaps its phases, so it must be faster.
+'''
+
+import pytest
+from commands2 import cmd
+from phoenix6 import unmanaged
+from wpilib import DriverStation, Notifier, Timer
+
+from subsystems.elevator.command import ElevatorMode, ElevatorPositions
+from subsystems.elevator.coral.rotate import RotatePositions
+from subsystems.superstructure import SuperstructureState
+from utils.constants import SUPERSTRUCTURE_EJECT_SPEED, SUPERSTRUCTURE_EJECT_TIME
+
+# pyfrc advances simulated time 0.2 s at a time
+STEP = 0.2
+
+@pytest.fixture
+def phoenix_enable():
+    """
+    Feed the Phoenix actuator enable from the simulated driver station, as
+    Phoenix's own feeder does. That feeder's Notifier is created with the first
+    device in the process and stops firing once pyfrc resets the HAL handles
+    after an earlier test, leaving this test's motors disabled.
+    """
+    def feed():
+        if DriverStation.isEnabled():
+            unmanaged.feed_enable(0.1)
+
+    notifier = Notifier(feed)
+    notifier.startPeriodic(0.02)
+    yield
+    notifier.stop()
+
+def run_until_finished(control, command, limit=15.0):
+    command.schedule()
+    start = Timer.getFPGATimestamp()
+    while command.isScheduled():
+        control.step_timing(seconds=STEP, autonomous=False, enabled=True)
+        assert Timer.getFPGATimestamp() - start < limit, "command did not finish"
+    return Timer.getFPGATimestamp() - start
+
+def test_score_macro_beats_sequential(control, robot, phoenix_enable):
+    with control.run_robot():
+        control.step_timing(seconds=0.5, autonomous=False, enabled=True)
+        container = robot.container
+
+        sequential = cmd.sequence(
+            container.elevator.move(ElevatorPositions.Level4.value, ElevatorMode.POSITION),
+            container.rotate_command.move_to(RotatePositions.Level4),
+            container.wheels.run(SUPERSTRUCTURE_EJECT_SPEED).withTimeout(SUPERSTRUCTURE_EJECT_TIME),
+            container.rotate_command.move_to(RotatePositions.Stow),
+            container.elevator.move(0, ElevatorMode.POSITION),
+        )
+        sequential_time = run_until_finished(control, sequential)
+
+        macro_time = run_until_finished(control, container.superstructure.score(SuperstructureState.L4))
+        print(f"L4 cycle: sequential {sequential_time:.2f} s, macro {macro_time:.2f} s")
+
+        assert container.superstructure.state == SuperstructureState.STOW
+        assert macro_time < sequential_time
@@ -0,0 +1,151 @@
+"""
+Compile PathPlanner .path files into time-sampled arrays the robot can follow
+without evaluating splines.
+
+Each path's cubic Bezier segments are sampled densely, given a velocity profile
+that respects the path's velocity and acceleration constraints (acceleration
+also bounds the centripetal term through curves), and resampled once per robot
+loop. Holonomic rotation is interpolated between the start rotation, the
+rotation targets and the goal rotation. The red alliance variant is the blue
+one rotated 180 degrees about the field center, with the field size taken from
+navgrid.json.
+
+Output is deploy/pathplanner/compiled/<name>.{blue,red}.npy, an (N, 7) float64
+array whose columns are listed in autonomous.follow_path. Re-run this whenever a
+path changes:
+
+    python -m tools.compile_paths
+"""
+
+import json
+import math
+import os
+import sys
+
+import numpy as np
+
+from autonomous.follow_path import COMPILED_PATH_DIR, SAMPLE_PERIOD, T, X, Y, HEADING, VX, VY, OMEGA
+from utils.constants import FIELD_LENGTH, FIELD_WIDTH
+from utils.field import flip_to_red
+
+DEPLOY_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "deploy")
+PATHPLANNER_DIR = os.path.join(DEPLOY_DIR, "pathplanner")
+
+SAMPLES_PER_SEGMENT = 200
+
+def _bezier(p0, p1, p2, p3, t):
+    """Points and first and second derivatives of one cubic segment at parameters t"""
+    t = t[:, None]
+    u = 1 - t
+    points = u**3 * p0 + 3 * u**2 * t * p1 + 3 * u * t**2 * p2 + t**3 * p3
+    first = 3 * u**2 * (p1 - p0) + 6 * u * t * (p2 - p1) + 3 * t**2 * (p3 - p2)
+    second = 6 * u * (p2 - 2 * p1 + p0) + 6 * t * (p3 - 2 * p2 + p1)
+    return points, first, second
+
+def _xy(point: dict) -> np.ndarray:
+    return np.array([point["x"], point["y"]])
+
+def _constraints(path: dict, settings: dict) -> tuple[float, float]:
+    if path.get("useDefaultConstraints", False):
+        return settings["defaultMaxVel"], settings["defaultMaxAccel"]
+    constraints = path["globalConstraints"]
+    return constraints["maxVelocity"], constraints["maxAcceleration"]
+
+def _rotation(path: dict, positions: np.ndarray, segments: int) -> np.ndarray:
+    """Holonomic heading (radians) at each waypoint-relative position"""
+    targets = [(0.0, path["idealStartingState"]["rotation"])]
+    targets += sorted((t["waypointRelativePos"], t["rotationDegrees"]) for t in path.get("rotationTargets", []))
+    targets.append((float(segments), path["goalEndState"]["rotation"]))
+    keys = np.array([position for position, _ in targets])
+    # Unwrap so each step between targets takes the short way around
+    degrees = [targets[0][1]]
+    for _, rotation in targets[1:]:
+        degrees.append(degrees[-1] + (rotation - degrees[-1] + 180) % 360 - 180)
+    return np.radians(np.interp(positions, keys, degrees))
+
+def compile_path(path: dict, settings: dict) -> np.ndarray:
+    """Return the blue alliance samples of a parsed .path file"""
+    waypoints = path["waypoints"]
+    segments = len(waypoints) - 1
+    points, firsts, seconds, positions = [], [], [], []
+    for i in range(segments):
+        t = np.linspace(0, 1, SAMPLES_PER_SEGMENT, endpoint=i == segments - 1)
+        p, d1, d2 = _bezier(
+            _xy(waypoints[i]["anchor"]), _xy(waypoints[i]["nextControl"]),
+            _xy(waypoints[i + 1]["prevControl"]), _xy(waypoints[i + 1]["anchor"]), t,
+        )
+        points.append(p)
+        firsts.append(d1)
+        seconds.append(d2)
+        positions.append(i + t)
+    points, firsts, seconds = np.concatenate(points), np.concatenate(firsts), np.concatenate(seconds)
+    positions = np.concatenate(positions)
+
+    steps = np.hypot(*np.diff(points, axis=0).T)
+    speed = np.hypot(firsts[:, 0], firsts[:, 1])
+    curvature = np.abs(firsts[:, 0] * seconds[:, 1] - firsts[:, 1] * seconds[:, 0]) / np.maximum(speed**3, 1e-9)
+
+    max_velocity, max_acceleration = _constraints(path, settings)
+    velocity = np.minimum(max_velocity, np.sqrt(max_acceleration / np.maximum(curvature, 1e-9)))
+    velocity[0] = min(velocity[0], path["idealStartingState"]["velocity"])
+    velocity[-1] = min(velocity[-1], path["goalEndState"]["velocity"])
+    for i in range(1, len(velocity)):
+        velocity[i] = min(velocity[i], math.sqrt(velocity[i - 1] ** 2 + 2 * max_acceleration * steps[i - 1]))
+    for i in range(len(velocity) - 2, -1, -1):
+        velocity[i] = min(velocity[i], math.sqrt(velocity[i + 1] ** 2 + 2 * max_acceleration * steps[i]))
+
+    # Trapezoidal integration of dt = ds / v between dense samples
+    time = np.concatenate([[0.0], np.cumsum(2 * steps / np.maximum(velocity[:-1] + velocity[1:], 1e-9))])
+    sample_times = np.arange(0.0, time[-1], SAMPLE_PERIOD)
+    sample_times = np.append(sample_times, time[-1])
+
+    tangent = np.unwrap(np.arctan2(firsts[:, 1], firsts[:, 0]))
+    sampled_velocity = np.interp(sample_times, time, velocity)
+    sampled_tangent = np.interp(sample_times, time, tangent)
+    heading = _rotation(path, np.interp(sample_times, time, positions), segments)
+
+    samples = np.empty((len(sample_times), 7))
+    samples[:, T] = sample_times
+    samples[:, X] = np.interp(sample_times, time, points[:, 0])
+    samples[:, Y] = np.interp(sample_times, time, points[:, 1])
+    samples[:, HEADING] = np.arctan2(np.sin(heading), np.cos(heading))
+    samples[:, VX] = sampled_velocity * np.cos(sampled_tangent)
+    samples[:, VY] = sampled_velocity * np.sin(sampled_tangent)
+    samples[:, OMEGA] = np.gradient(heading, sample_times) if len(sample_times) > 1 else 0.0
+    return samples
+
+def flip_samples(samples: np.ndarray) -> np.ndarray:
+    """Rotate blue alliance samples 180 degrees about the field center"""
+    flipped = samples.copy()
+    flipped[:, [X, Y, HEADING]] = flip_to_red(samples[:, [X, Y, HEADING]])
+    flipped[:, VX] = -samples[:, VX]
+    flipped[:, VY] = -samples[:, VY]
+    return flipped
+
+def _check_field_size() -> None:
+    with open(os.path.join(PATHPLANNER_DIR, "navgrid.json")) as f:
+        size = json.load(f)["field_size"]
+    if not (math.isclose(size["x"], FIELD_LENGTH) and math.isclose(size["y"], FIELD_WIDTH)):
+        raise RuntimeError(f"navgrid.json field size {size} does not match FIELD_LENGTH/FIELD_WIDTH")
+
+def main(argv: list[str]) -> int:
+    _check_field_size()
+    with open(os.path.join(PATHPLANNER_DIR, "settings.json")) as f:
+        settings = json.load(f)
+
+    paths_dir = os.path.join(PATHPLANNER_DIR, "paths")
+    output_dir = os.path.join(DEPLOY_DIR, COMPILED_PATH_DIR)
+    os.makedirs(output_dir, exist_ok=True)
+    for file in sorted(os.listdir(paths_dir)):
+        if not file.endswith(".path"):
+            continue
+        name = file[:-len(".path")]
+        with open(os.path.join(paths_dir, file)) as f:
+            blue = compile_path(json.load(f), settings)
+        np.save(os.path.join(output_dir, f"{name}.blue.npy"), blue)
+        np.save(os.path.join(output_dir, f"{name}.red.npy"), flip_samples(blue))
+        print(f"{name}: {blue[-1, T]:.2f} s, {len(blue)} samples")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
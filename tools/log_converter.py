@@ -0,0 +1,224 @@
+"""
+Convert robot logs into columnar per-signal NumPy or Parquet datasets.
+
+Reads WPILib .wpilog files directly. SignalLogger .hoot files are first converted
+to .wpilog with CTRE's ``owlet`` tool, which must be on the PATH.
+
+Every numeric signal becomes a ``timestamp`` column (seconds since the start of
+the log, so all signals share one time base) and a ``value`` column; arrays such
+as DriveState/Pose become a 2-D value column padded with NaN. The log is read
+twice: once to size every column, then again to stream records into
+memory-mapped columns in fixed-size chunks, so memory stays bounded by the chunk
+size no matter how long the log is.
+
+Usage::
+
+    python -m tools.log_converter match.wpilog out/ [--format npy|npz|parquet] [--signal DriveState/ ...]
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from dataclasses import dataclass, field
+
+import numpy as np
+from wpiutil.log import DataLogReader
+
+CHUNK_RECORDS = 65536
+
+# wpilog type -> (DataLogRecord getter, numpy dtype, is array)
+_TYPES = {
+    "double": ("getDouble", np.float64, False),
+    "float": ("getFloat", np.float32, False),
+    "int64": ("getInteger", np.int64, False),
+    "boolean": ("getBoolean", np.bool_, False),
+    "double[]": ("getDoubleArray", np.float64, True),
+    "float[]": ("getFloatArray", np.float32, True),
+    "int64[]": ("getIntegerArray", np.float64, True),
+}
+
+@dataclass
+class _Column:
+    name: str
+    getter: str
+    dtype: type
+    is_array: bool
+    count: int = 0
+    width: int = 1
+    written: int = 0
+    timestamps: np.ndarray | None = None
+    values: np.ndarray | None = None
+    pending_t: list = field(default_factory=list)
+    pending_v: list = field(default_factory=list)
+
+def safe_name(signal: str) -> str:
+    return signal.strip("/").replace("/", ".").replace(" ", "_")
+
+def hoot_to_wpilog(path: str, directory: str) -> str:
+    owlet = shutil.which("owlet")
+    if owlet is None:
+        raise RuntimeError("Converting .hoot logs needs CTRE's owlet tool on the PATH")
+    output = os.path.join(directory, os.path.basename(path)[:-len(".hoot")] + ".wpilog")
+    subprocess.run([owlet, "-f", "wpilog", path, output], check=True)
+    return output
+
+def _scan(path: str, selected) -> tuple[dict[int, _Column], int]:
+    """First pass: find matching numeric signals and size their columns"""
+    columns: dict[int, _Column] = {}
+    first_timestamp = None
+    for record in DataLogReader(path):
+        if record.isStart():
+            start = record.getStartData()
+            if start.type in _TYPES and selected(start.name):
+                getter, dtype, is_array = _TYPES[start.type]
+                columns[start.entry] = _Column(start.name, getter, dtype, is_array)
+        elif not record.isControl():
+            if first_timestamp is None:
+                first_timestamp = record.getTimestamp()
+            column = columns.get(record.getEntry())
+            if column is not None:
+                column.count += 1
+                if column.is_array:
+                    column.width = max(column.width, len(getattr(record, column.getter)()))
+    return columns, first_timestamp or 0
+
+def _flush(column: _Column) -> None:
+    if not column.pending_t:
+        return
+    end = column.written + len(column.pending_t)
+    column.timestamps[column.written:end] = column.pending_t
+    if column.is_array:
+        block = np.full((len(column.pending_v), column.width), np.nan)
+        for row, value in enumerate(column.pending_v):
+            block[row, :len(value)] = value
+        column.values[column.written:end] = block
+    else:
+        column.values[column.written:end] = column.pending_v
+    column.written = end
+    column.pending_t.clear()
+    column.pending_v.clear()
+
+def convert_to_npy(path: str, output_dir: str, signals: list[str] | None = None) -> list[str]:
+    """Convert a .wpilog into output_dir/<signal>/{timestamp,value}.npy; returns signal names"""
+    selected = (lambda name: any(s in name for s in signals)) if signals else (lambda name: True)
+    columns, first_timestamp = _scan(path, selected)
+
+    for column in columns.values():
+        directory = os.path.join(output_dir, safe_name(column.name))
+        os.makedirs(directory, exist_ok=True)
+        shape = (column.count, column.width) if column.is_array else (column.count,)
+        column.timestamps = np.lib.format.open_memmap(
+            os.path.join(directory, "timestamp.npy"), mode="w+", dtype=np.float64, shape=(column.count,)
+        )
+        column.values = np.lib.format.open_memmap(
+            os.path.join(directory, "value.npy"), mode="w+",
+            dtype=np.float64 if column.is_array else column.dtype, shape=shape,
+        )
+
+    for record in DataLogReader(path):
+        if record.isControl():
+            continue
+        column = columns.get(record.getEntry())
+        if column is None:
+            continue
+        column.pending_t.append((record.getTimestamp() - first_timestamp) / 1e6)
+        column.pending_v.append(getattr(record, column.getter)())
+        if len(column.pending_t) >= CHUNK_RECORDS:
+            _flush(column)
+
+    for column in columns.values():
+        _flush(column)
+        column.timestamps.flush()
+        column.values.flush()
+    return [column.name for column in columns.values()]
+
+def convert(path: str, output: str, format: str = "npy", signals: list[str] | None = None) -> None:
+    with tempfile.TemporaryDirectory() as scratch:
+        if path.endswith(".hoot"):
+            path = hoot_to_wpilog(path, scratch)
+
+        columns_dir = output if format == "npy" else os.path.join(scratch, "columns")
+        names = convert_to_npy(path, columns_dir, signals)
+        if format == "npy":
+            return
+
+        if format == "npz":
+            # np.savez streams each memory-mapped column into the archive in chunks
+            arrays = {}
+            for name in names:
+                directory = os.path.join(columns_dir, safe_name(name))
+                for column in ("timestamp", "value"):
+                    arrays[f"{safe_name(name)}/{column}"] = np.load(os.path.join(directory, f"{column}.npy"), mmap_mode="r")
+            np.savez(output, **arrays)
+        elif format == "parquet":
+            _write_parquet(columns_dir, names, output)
+        else:
+            raise ValueError(f"Unknown format {format}")
+
+def _write_parquet(columns_dir: str, names: list[str], output_dir: str) -> None:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet output needs pyarrow; install it or use --format npz")
+
+    os.makedirs(output_dir, exist_ok=True)
+    for name in names:
+        directory = os.path.join(columns_dir, safe_name(name))
+        timestamps = np.load(os.path.join(directory, "timestamp.npy"), mmap_mode="r")
+        values = np.load(os.path.join(directory, "value.npy"), mmap_mode="r")
+        value_columns = [f"value{i}" for i in range(values.shape[1])] if values.ndim == 2 else ["value"]
+        writer = None
+        for start in range(0, len(timestamps), CHUNK_RECORDS):
+            block = values[start:start + CHUNK_RECORDS]
+            data = {"timestamp": np.asarray(timestamps[start:start + CHUNK_RECORDS])}
+            if values.ndim == 2:
+                data.update({column: np.asarray(block[:, i]) for i, column in enumerate(value_columns)})
+            else:
+                data["value"] = np.asarray(block)
+            table = pa.table(data)
+            if writer is None:
+                writer = pq.ParquetWriter(os.path.join(output_dir, f"{safe_name(name)}.parquet"), table.schema)
+            writer.write_table(table)
+        if writer is not None:
+            writer.close()
+
+def load_dataset(path: str) -> dict[str, tuple[np.ndarray, np.ndarray]]:
+    """Load a converted npy directory or npz file as {signal: (timestamps, values)}"""
+    dataset = {}
+    if path.endswith(".npz"):
+        archive = np.load(path)
+        for key in archive.files:
+            name, column = key.rsplit("/", 1)
+            if column == "timestamp":
+                dataset[name] = (archive[key], archive[f"{name}/value"])
+        return dataset
+    for name in sorted(os.listdir(path)):
+        directory = os.path.join(path, name)
+        dataset[name] = (
+            np.load(os.path.join(directory, "timestamp.npy"), mmap_mode="r"),
+            np.load(os.path.join(directory, "value.npy"), mmap_mode="r"),
+        )
+    return dataset
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("logs", nargs="+", help=".wpilog or .hoot files")
+    parser.add_argument("output", help="output directory (one dataset per log)")
+    parser.add_argument("--format", choices=["npy", "npz", "parquet"], default="npy")
+    parser.add_argument("--signal", action="append", help="only convert signals containing this text")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.output, exist_ok=True)
+    for log in args.logs:
+        stem = os.path.splitext(os.path.basename(log))[0]
+        output = os.path.join(args.output, stem + (".npz" if args.format == "npz" else ""))
+        convert(log, output, args.format, args.signal)
+        print(f"{log} -> {output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
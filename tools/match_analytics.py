@@ -0,0 +1,215 @@
+"""
+Split recorded matches into intake -> score cycles and summarize them.
+
+Works on datasets written by tools/log_converter.py (npy directories or .npz
+files), one per match, and reads three signals from them:
+
+* ``Wheels/Direction`` (and ``Wheels/HasPiece`` when logged): runs of the
+  wheels in the intake direction start a cycle; the start of an eject run
+  while holding a piece scores it. A cycle runs from the first intake after
+  the previous score to the next score, so retried intakes stay in one cycle
+  and a preloaded piece scored without an intake is not counted.
+* ``Elevator/LeadingPosition``: the level each piece was scored at and the
+  time spent within LEVEL_TOLERANCE inches of each ElevatorPositions level.
+* ``DriveState/Pose``: distance driven and average speed during each cycle
+  and in the transit before it from the previous score. Pose jumps faster
+  than MAX_POSE_SPEED, like pose resets, are not counted as driving.
+
+Edges, cycle boundaries and per-cycle sums are found with array operations
+(diff, searchsorted, cumulative sums and bincount), so an event's worth of
+matches is summarized in well under a second once converted. Per-match and
+per-event summaries are printed; --json also writes every cycle.
+
+Usage::
+
+    python -m tools.log_converter logs/*.wpilog datasets/ --signal Wheels/ --signal Elevator/ --signal DriveState/Pose
+    python -m tools.match_analytics datasets/* [--json event.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+from dataclasses import asdict, dataclass, field
+
+import numpy as np
+
+from subsystems.elevator.command import ElevatorPositions
+from tools.log_converter import load_dataset, safe_name
+from utils.motor_constants import MOTOR_CONFIG
+
+LEVEL_TOLERANCE = 2.0  # inches from a level's height that still counts as at it
+MAX_POSE_SPEED = 6.0  # m/s; faster pose changes are resets, not driving
+
+LEVELS = list(ElevatorPositions)
+LEVEL_HEIGHTS = np.array([level.value for level in LEVELS], dtype=np.float64)
+
+@dataclass
+class Cycle:
+    """One intake -> score cycle; times are seconds since the start of the log"""
+    start: float
+    score: float
+    level: str | None
+    duration: float
+    distance: float
+    average_speed: float
+    transit_time: float
+    transit_distance: float
+
+@dataclass
+class MatchSummary:
+    name: str
+    cycles: list[Cycle] = field(default_factory=list)
+    level_time: dict[str, float] = field(default_factory=dict)
+    distance: float = 0.0
+    duration: float = 0.0
+
+    @property
+    def cycle_times(self) -> np.ndarray:
+        return np.array([cycle.duration for cycle in self.cycles])
+
+def _signal(dataset: dict[str, tuple[np.ndarray, np.ndarray]], name: str) -> tuple[np.ndarray, np.ndarray] | None:
+    """Find a signal by its logged name, allowing for a prefix added by the log source"""
+    key = safe_name(name)
+    for candidate, columns in dataset.items():
+        if candidate == key or candidate.endswith("." + key):
+            return np.asarray(columns[0]), np.asarray(columns[1])
+    return None
+
+def _hold(timestamps: np.ndarray, values: np.ndarray, times: np.ndarray) -> np.ndarray:
+    """Sample-and-hold values at the given times; before the first sample reads the first value"""
+    index = np.searchsorted(timestamps, times, side="right") - 1
+    return values[np.clip(index, 0, len(values) - 1)]
+
+def _runs(values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Start indices and values of each run of equal values"""
+    starts = np.flatnonzero(np.diff(values)) + 1
+    starts = np.concatenate(([0], starts))
+    return starts, values[starts]
+
+def nearest_level(heights: np.ndarray) -> np.ndarray:
+    """Index into LEVELS of the level each height is at, or -1 when between levels"""
+    offsets = np.abs(heights[:, None] - LEVEL_HEIGHTS[None, :])
+    index = offsets.argmin(axis=1)
+    return np.where(offsets[np.arange(len(heights)), index] <= LEVEL_TOLERANCE, index, -1)
+
+def find_cycles(timestamps: np.ndarray, direction: np.ndarray,
+                has_piece: tuple[np.ndarray, np.ndarray] | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """Start and score times of every cycle from the logged wheels direction"""
+    intake_direction = 1 if MOTOR_CONFIG["wheels"]["intake_speed"] > 0 else -1
+    starts, values = _runs(direction.astype(np.int64))
+    intakes = timestamps[starts[values == intake_direction]]
+    ejects = timestamps[starts[values == -intake_direction]]
+    if has_piece is not None and len(ejects):
+        # Only ejecting a detected piece scores; the sample just before the eject started is the state it began in
+        ejects = ejects[_hold(has_piece[0], has_piece[1].astype(bool), np.nextafter(ejects, -np.inf))]
+    if not len(ejects):
+        return np.array([]), np.array([])
+
+    # The cycle before each score starts at the first intake after the previous score
+    previous = np.concatenate(([-np.inf], ejects[:-1]))
+    first_intake = np.searchsorted(intakes, previous, side="right")
+    valid = first_intake < len(intakes)
+    valid[valid] = intakes[first_intake[valid]] < ejects[valid]
+    return intakes[first_intake[valid]], ejects[valid]
+
+def summarize(name: str, dataset: dict[str, tuple[np.ndarray, np.ndarray]]) -> MatchSummary:
+    summary = MatchSummary(name)
+    direction = _signal(dataset, "Wheels/Direction")
+    elevator = _signal(dataset, "Elevator/LeadingPosition")
+    pose = _signal(dataset, "DriveState/Pose")
+
+    if pose is not None and len(pose[0]) > 1:
+        pose_times, pose_values = pose
+        steps = np.hypot(np.diff(pose_values[:, 0]), np.diff(pose_values[:, 1]))
+        dt = np.diff(pose_times)
+        steps[steps > MAX_POSE_SPEED * np.maximum(dt, 1e-3)] = 0.0
+        traveled = np.concatenate(([0.0], np.cumsum(steps)))
+        summary.distance = float(traveled[-1])
+        summary.duration = float(pose_times[-1] - pose_times[0])
+    else:
+        pose_times, traveled = np.zeros(1), np.zeros(1)
+
+    if elevator is not None and len(elevator[0]):
+        elevator_times, heights = elevator
+        levels = nearest_level(heights)
+        # Each sample holds until the next one
+        dt = np.diff(elevator_times, append=elevator_times[-1])
+        at_level = levels >= 0
+        time_at = np.bincount(levels[at_level], weights=dt[at_level], minlength=len(LEVELS))
+        summary.level_time = {level.name: float(seconds) for level, seconds in zip(LEVELS, time_at)}
+
+    if direction is None or not len(direction[0]):
+        return summary
+    starts, scores = find_cycles(*direction, _signal(dataset, "Wheels/HasPiece"))
+    if not len(scores):
+        return summary
+
+    if elevator is not None and len(elevator[0]):
+        score_levels = nearest_level(_hold(*elevator, scores))
+    else:
+        score_levels = np.full(len(scores), -1)
+    distances = _hold(pose_times, traveled, scores) - _hold(pose_times, traveled, starts)
+    durations = scores - starts
+    previous_scores = np.concatenate(([np.nan], scores[:-1]))
+    transit_times = starts - previous_scores
+    transit_distances = _hold(pose_times, traveled, starts) - _hold(pose_times, traveled, np.nan_to_num(previous_scores))
+    for i in range(len(scores)):
+        summary.cycles.append(Cycle(
+            start=float(starts[i]),
+            score=float(scores[i]),
+            level=LEVELS[score_levels[i]].name if score_levels[i] >= 0 else None,
+            duration=float(durations[i]),
+            distance=float(distances[i]),
+            average_speed=float(distances[i] / durations[i]) if durations[i] > 0 else 0.0,
+            transit_time=float(transit_times[i]),
+            transit_distance=float(transit_distances[i]) if i else float("nan"),
+        ))
+    return summary
+
+def _cycle_stats(cycle_times: np.ndarray) -> str:
+    if not len(cycle_times):
+        return "no cycles"
+    return (f"{len(cycle_times)} cycles, mean {cycle_times.mean():.2f} s, "
+            f"median {np.median(cycle_times):.2f} s, best {cycle_times.min():.2f} s")
+
+def report(summaries: list[MatchSummary]) -> None:
+    for summary in summaries:
+        print(f"\n{summary.name}: {_cycle_stats(summary.cycle_times)}")
+        speed = summary.distance / summary.duration if summary.duration else 0.0
+        print(f"  drove {summary.distance:.1f} m over {summary.duration:.1f} s ({speed:.2f} m/s)")
+        if summary.level_time:
+            print("  time at level: " + ", ".join(f"{name} {seconds:.1f} s" for name, seconds in summary.level_time.items()))
+        for cycle in summary.cycles:
+            transit = "" if np.isnan(cycle.transit_distance) else (
+                f"  after {cycle.transit_time:5.2f} s / {cycle.transit_distance:4.1f} m transit")
+            print(f"  {cycle.start:7.2f} s  {cycle.level or '-':>6}  {cycle.duration:5.2f} s  "
+                  f"{cycle.distance:4.1f} m  {cycle.average_speed:4.2f} m/s{transit}")
+
+    cycles = [cycle for summary in summaries for cycle in summary.cycles]
+    cycle_times = np.array([cycle.duration for cycle in cycles])
+    print(f"\nEvent ({len(summaries)} matches): {_cycle_stats(cycle_times)}")
+    for level in LEVELS:
+        scored = [cycle.duration for cycle in cycles if cycle.level == level.name]
+        if scored:
+            print(f"  {level.name}: {len(scored)} scored, mean cycle {np.mean(scored):.2f} s")
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("datasets", nargs="+", help="converted match datasets (npy directories or .npz)")
+    parser.add_argument("--json", help="also write every match summary and cycle to this file")
+    args = parser.parse_args(argv)
+
+    summaries = []
+    for path in args.datasets:
+        name = os.path.splitext(os.path.basename(path.rstrip("/")))[0]
+        summaries.append(summarize(name, load_dataset(path)))
+    report(summaries)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump([asdict(summary) for summary in summaries], f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,285 @@
+"""
+Search closed-loop gains offline by simulating a standard maneuver many times in
+parallel.
+
+Each target pairs a maneuver with a plain model of the mechanism and the same
+control law the robot runs:
+
+* ``elevator``: 0 -> L4 -> 0 through the fast-loop PIDController (volts per
+  motor rotation, clamped to the elevator's max_speed), driving two Krakens with
+  the carriage mass and drum radius from physics.py. Gravity and kG are
+  modelled like physics.py and the robot loop; ``--no-gravity`` leaves both out
+  and keeps kG at its current value.
+* ``steer``: a 90 degree then -135 degree module step under the TalonFX
+  position loop, using the Tuner X inertia, gear ratio and friction voltage.
+* ``drive``: a 0 -> 3 m/s -> 0 wheel speed step under the TalonFX velocity loop.
+
+Feedforward gains (kS, kV) stay at their current values, which come from
+characterization. Every candidate is scored by its settling time, overshoot and
+RMS tracking error. A cross-entropy search samples gains log-uniformly around
+the best candidates so far, and the simulations run on a process pool. The best
+set is printed as source to paste back.
+
+Usage::
+
+    python -m tools.tune_gains elevator [--rounds 6] [--population 64] [--workers N] [--no-gravity]
+"""
+
+import argparse
+import math
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+from wpimath.controller import PIDController
+from wpimath.system.plant import DCMotor
+
+from generated.tuner_constants import TunerConstants
+from physics import ELEVATOR_CARRIAGE_MASS, ELEVATOR_DRUM_RADIUS
+from subsystems.elevator.command import ElevatorPositions
+from utils.constants import elevator_gearbox_radius, single_rotation_inches
+from utils.fast_loop import FAST_LOOP_PERIOD
+from utils.motor_constants import MOTOR_CONFIG, MAX_VOLTAGE, percent_to_voltage
+
+GRAVITY = 9.81
+TALON_PERIOD = 0.001  # on-motor closed loops run at 1 kHz
+PHYSICS_SUBSTEPS = 5  # model steps per elevator fast-loop period
+# The fast loop reads the elevator position signal at its default 50 Hz rate, so
+# it can be up to a frame old; the TalonFX loops see their sensor one cycle late
+ELEVATOR_MEASUREMENT_DELAY = 0.02
+TALON_MEASUREMENT_DELAY = 0.001
+
+# Cost weights: settling time counts as a fraction of each step's duration,
+# overshoot as a fraction of the step size and tracking error as RMS over the
+# step size
+OVERSHOOT_WEIGHT = 2.0
+TRACKING_WEIGHT = 1.0
+
+@dataclass
+class Response:
+    """Sampled setpoint and measurement of one maneuver"""
+    time: np.ndarray
+    setpoint: np.ndarray
+    measurement: np.ndarray
+    tolerance: float
+
+@dataclass
+class Score:
+    cost: float
+    settling_time: float
+    overshoot: float
+    tracking_error: float
+
+@dataclass
+class Target:
+    """A mechanism, its tunable gains with search bounds, and how to simulate it"""
+    name: str
+    gains: dict[str, float]
+    bounds: dict[str, tuple[float, float]]
+    simulate: Callable[[dict[str, float], bool], Response]
+    source: Callable[[dict[str, float]], str]
+
+def _steps(schedule: list[tuple[float, float]], time: np.ndarray) -> np.ndarray:
+    """Setpoint at each time for a list of (start time, setpoint) steps"""
+    starts = np.array([start for start, _ in schedule])
+    values = np.array([value for _, value in schedule])
+    return values[np.searchsorted(starts, time, side="right") - 1]
+
+def simulate_elevator(gains: dict[str, float], gravity: bool) -> Response:
+    config = MOTOR_CONFIG["elevator"]
+    motor = DCMotor.krakenX60(2)
+    ratio = elevator_gearbox_radius
+    # Linear carriage model: acceleration = a_volt * V - a_vel * v - g
+    a_volt = ratio * motor.Kt / (motor.R * ELEVATOR_DRUM_RADIUS * ELEVATOR_CARRIAGE_MASS)
+    a_vel = ratio**2 * motor.Kt / (motor.R * ELEVATOR_DRUM_RADIUS**2 * ELEVATOR_CARRIAGE_MASS * motor.Kv)
+    meters_per_rotation = single_rotation_inches * 0.0254
+
+    controller = PIDController(gains["kP"], gains["kI"], gains["kD"], FAST_LOOP_PERIOD)
+    controller.setIZone(config["i_zone"])
+    max_voltage = percent_to_voltage(config["max_speed"])
+    top = ElevatorPositions.Level4.value / single_rotation_inches
+    time = np.arange(0.0, 12.0, FAST_LOOP_PERIOD)
+    setpoint = _steps([(0.0, top), (6.0, 0.0)], time)
+    measurement = np.empty_like(time)
+
+    position = velocity = 0.0
+    dt = FAST_LOOP_PERIOD / PHYSICS_SUBSTEPS
+    delay = round(ELEVATOR_MEASUREMENT_DELAY / FAST_LOOP_PERIOD)
+    for i, target in enumerate(setpoint):
+        measurement[i] = position / meters_per_rotation
+        rotations = measurement[max(i - delay, 0)]
+        voltage = controller.calculate(rotations, target) + (gains.get("kG", 0.0) if gravity else 0.0)
+        voltage = max(-max_voltage, min(voltage, max_voltage))
+        for _ in range(PHYSICS_SUBSTEPS):
+            acceleration = a_volt * voltage - a_vel * velocity - (GRAVITY if gravity else 0.0)
+            velocity += acceleration * dt
+            position += velocity * dt
+            if position < 0.0:
+                # Resting on the bottom hard stop
+                position = velocity = 0.0
+    return Response(time, setpoint, measurement, config["tolerance"])
+
+def _simulate_talon(gains: dict[str, float], feedforward, schedule, duration, gear_ratio, inertia,
+                    friction_voltage, velocity_loop: bool, tolerance: float) -> Response:
+    """A TalonFX slot 0 loop in mechanism units driving an inertia through a Kraken"""
+    motor = DCMotor.krakenX60(1)
+    time = np.arange(0.0, duration, TALON_PERIOD)
+    setpoint = _steps(schedule, time)
+    measurement = np.empty_like(time)
+    position = velocity = integral = 0.0
+    last_error = None
+    delay = round(TALON_MEASUREMENT_DELAY / TALON_PERIOD)
+    for i, target in enumerate(setpoint):
+        measurement[i] = velocity if velocity_loop else position
+        error = target - measurement[max(i - delay, 0)]
+        integral += error * TALON_PERIOD
+        derivative = 0.0 if last_error is None else (error - last_error) / TALON_PERIOD
+        last_error = error
+        voltage = gains["kP"] * error + gains["kI"] * integral + gains["kD"] * derivative
+        if velocity_loop:
+            voltage += feedforward.k_s * math.copysign(1.0, target) * (target != 0) + feedforward.k_v * target
+        else:
+            voltage += feedforward.k_s * math.copysign(1.0, error) * (abs(error) > 1e-9)
+        voltage = max(-MAX_VOLTAGE, min(voltage, MAX_VOLTAGE))
+        # Friction eats the first few volts of output, as in the Phoenix module sim
+        voltage = math.copysign(max(abs(voltage) - friction_voltage, 0.0), voltage)
+        rotor_speed = velocity * gear_ratio * 2 * math.pi
+        torque = gear_ratio * motor.Kt * (voltage - rotor_speed / motor.Kv) / motor.R
+        velocity += torque / inertia / (2 * math.pi) * TALON_PERIOD
+        position += velocity * TALON_PERIOD
+    return Response(time, setpoint, measurement, tolerance)
+
+def simulate_steer(gains: dict[str, float], gravity: bool) -> Response:
+    return _simulate_talon(
+        gains, TunerConstants._steer_gains, [(0.0, 0.25), (0.5, -0.125)], 1.0,
+        TunerConstants._steer_gear_ratio, TunerConstants._steer_inertia,
+        TunerConstants._steer_friction_voltage, False, 1 / 360,
+    )
+
+def simulate_drive(gains: dict[str, float], gravity: bool) -> Response:
+    # Drive gains are per rotor rotation; model the rotor with the wheel inertia reflected onto it
+    wheel_rps = 3.0 / (2 * math.pi * TunerConstants._wheel_radius)
+    rotor_rps = wheel_rps * TunerConstants._drive_gear_ratio
+    return _simulate_talon(
+        gains, TunerConstants._drive_gains, [(0.0, rotor_rps), (1.0, 0.0)], 2.0,
+        1.0, TunerConstants._drive_inertia / TunerConstants._drive_gear_ratio**2,
+        TunerConstants._drive_friction_voltage, True, 0.02 * rotor_rps,
+    )
+
+def score(response: Response) -> Score:
+    """Settling time, overshoot and tracking error summed over every setpoint step"""
+    changes = np.flatnonzero(np.diff(response.setpoint)) + 1
+    bounds = np.concatenate([[0], changes, [len(response.time)]])
+    settling, overshoot, tracking, cost = 0.0, 0.0, 0.0, 0.0
+    start_value = response.measurement[0]
+    for begin, end in zip(bounds[:-1], bounds[1:]):
+        target = response.setpoint[begin]
+        step = target - start_value
+        if step == 0:
+            continue
+        segment = response.measurement[begin:end]
+        error = target - segment
+        duration = response.time[end - 1] - response.time[begin]
+        outside = np.flatnonzero(np.abs(error) > response.tolerance)
+        if len(outside) == 0:
+            settle = 0.0
+        elif outside[-1] == len(segment) - 1:
+            settle = 2 * duration  # never settled
+        else:
+            settle = response.time[begin + outside[-1] + 1] - response.time[begin]
+        settling += settle
+        cost += settle / duration
+        overshoot = max(overshoot, float(np.max(-error * math.copysign(1.0, step))) / abs(step))
+        tracking += float(np.sqrt(np.mean(error**2))) / abs(step)
+        start_value = segment[-1]
+    overshoot = max(overshoot, 0.0)
+    cost += OVERSHOOT_WEIGHT * overshoot + TRACKING_WEIGHT * tracking
+    return Score(cost, settling, overshoot, tracking)
+
+def _slot_source(gains: dict[str, float]) -> str:
+    return "".join(f"\n    .with_k_{name[1:].lower()}({value:.6g})" for name, value in gains.items())
+
+TARGETS = {
+    "elevator": Target(
+        "elevator",
+        {name: MOTOR_CONFIG["elevator"][name] for name in ("kP", "kI", "kD", "kG")},
+        {"kP": (0.05, 5.0), "kI": (1e-4, 0.5), "kD": (1e-4, 0.1), "kG": (0.01, 1.0)},
+        simulate_elevator,
+        lambda gains: "".join(f'\n"{name}": {value:.6g},' for name, value in gains.items()),
+    ),
+    "steer": Target(
+        "steer",
+        {"kP": TunerConstants._steer_gains.k_p, "kI": TunerConstants._steer_gains.k_i, "kD": TunerConstants._steer_gains.k_d},
+        {"kP": (10.0, 500.0), "kI": (1e-3, 10.0), "kD": (1e-3, 5.0)},
+        simulate_steer,
+        _slot_source,
+    ),
+    "drive": Target(
+        "drive",
+        {"kP": TunerConstants._drive_gains.k_p, "kI": TunerConstants._drive_gains.k_i, "kD": TunerConstants._drive_gains.k_d},
+        {"kP": (0.01, 2.0), "kI": (1e-5, 0.1), "kD": (1e-5, 0.1)},
+        simulate_drive,
+        _slot_source,
+    ),
+}
+
+def evaluate(target_name: str, gains: dict[str, float], gravity: bool) -> Score:
+    """Simulate and score one candidate; runs in a worker process"""
+    return score(TARGETS[target_name].simulate(gains, gravity))
+
+def search(target: Target, rounds: int, population: int, workers: int | None, gravity: bool,
+           elite_fraction: float = 0.2, seed: int = 0) -> tuple[dict[str, float], Score, int]:
+    """Cross-entropy search in log gain space; returns the best gains, their score and the evaluation count"""
+    names = [name for name in target.bounds if gravity or name != "kG"]
+    low = np.log([target.bounds[name][0] for name in names])
+    high = np.log([target.bounds[name][1] for name in names])
+    start = np.log(np.clip([target.gains[name] or target.bounds[name][0] for name in names], np.exp(low), np.exp(high)))
+    mean, spread = start, (high - low) / 4
+    rng = np.random.default_rng(seed)
+    elites = max(2, int(population * elite_fraction))
+    best = (dict(zip(names, np.exp(start))), None)
+    evaluations = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for round_ in range(rounds):
+            candidates = np.clip(rng.normal(mean, spread, (population, len(names))), low, high)
+            candidates[0] = np.log(list(best[0].values()))
+            gain_sets = [dict(zip(names, np.exp(candidate))) for candidate in candidates]
+            scores = list(pool.map(evaluate, [target.name] * population, gain_sets, [gravity] * population,
+                                   chunksize=max(1, population // (4 * (workers or os.cpu_count() or 1)))))
+            evaluations += population
+            order = np.argsort([s.cost for s in scores])
+            if best[1] is None or scores[order[0]].cost < best[1].cost:
+                best = (gain_sets[order[0]], scores[order[0]])
+            mean = candidates[order[:elites]].mean(axis=0)
+            spread = np.maximum(candidates[order[:elites]].std(axis=0), (high - low) * 0.01)
+            print(f"round {round_ + 1}/{rounds}: best cost {best[1].cost:.4f}")
+    return best[0], best[1], evaluations
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("target", choices=sorted(TARGETS))
+    parser.add_argument("--rounds", type=int, default=6)
+    parser.add_argument("--population", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--no-gravity", dest="gravity", action="store_false",
+                        help="leave gravity out and do not search kG (elevator only)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    target = TARGETS[args.target]
+    baseline = evaluate(target.name, target.gains, args.gravity)
+    gains, best, evaluations = search(target, args.rounds, args.population, args.workers, args.gravity, seed=args.seed)
+
+    print(f"\n{evaluations} candidates")
+    for label, result in (("current", baseline), ("best", best)):
+        print(f"{label:>8}: cost {result.cost:.4f}  settling {result.settling_time:.3f} s  "
+              f"overshoot {result.overshoot:.3f}  tracking {result.tracking_error:.4f}")
+    print(f"\n# {target.name} gains{target.source(gains)}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,147 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable
+
+from ntcore import NetworkTableInstance
+from phoenix6 import StatusCode
+from phoenix6.hardware import TalonFX
+from wpilib import Alert
+
+from utils.constants import BRINGUP_WORKERS, BRINGUP_ATTEMPTS, BRINGUP_TIMEOUT
+
+@dataclass
+class DeviceReport:
+    """How one device's bring-up went; latency covers every attempt"""
+    name: str
+    latency: float = 0.0
+    attempts: int = 0
+    error: str = ""
+    steps: list[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.error
+
+class DeviceBringup:
+    """
+    Configures devices on a thread pool while the rest of the robot is built.
+
+    Subsystems queue the config writes and zeroing for each of their devices with
+    configure(); the steps for one device run in order on a worker, each retried
+    up to BRINGUP_ATTEMPTS times, while different devices are written
+    concurrently. configure() returns a future that completes once the device
+    is configured, so a subsystem can hold back its first control request
+    until then. Queueing a device again, as a rebuilt subsystem does, runs its
+    new steps after the earlier ones. Anything that can only block the calling
+    thread, like the swerve drivetrain constructor, is wrapped in timed() so it
+    still shows up in the report while the workers run alongside it. finish()
+    waits for everything queued so far, shuts the workers down and publishes
+    the per-device latency and failures to the Bringup table.
+    """
+
+    def __init__(self, workers: int = BRINGUP_WORKERS, attempts: int = BRINGUP_ATTEMPTS, timeout: float = BRINGUP_TIMEOUT):
+        self.attempts = attempts
+        self.timeout = timeout
+        self.workers = workers
+        # Created on the first configure() and shut down by finish()
+        self._pool: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+        # Keyed by (CAN bus, device ID), holding the device's name and its latest work
+        self._pending: dict[tuple[str, int], tuple[str, Future]] = {}
+        self._start: float | None = None
+        self.reports: dict[str, DeviceReport] = {}
+
+        self._table = NetworkTableInstance.getDefault().getTable("Bringup")
+        self._total_pub = self._table.getDoubleTopic("TotalTime").publish()
+        self._serial_pub = self._table.getDoubleTopic("SerialTime").publish()
+        self._failed_pub = self._table.getStringArrayTopic("Failed").publish()
+        self._alert = Alert("Device bring-up failed", Alert.AlertType.kError)
+
+    def configure(self, name: str, motor: TalonFX, config=None, position: float | None = None) -> Future:
+        """Queue applying config to motor, then setting its position, as one device; the future completes when done"""
+        steps: list[tuple[str, Callable[[], StatusCode]]] = []
+        if config is not None:
+            steps.append(("config", lambda: motor.configurator.apply(config, self.timeout)))
+        if position is not None:
+            steps.append(("position", lambda: motor.set_position(position, self.timeout)))
+        key = (motor.network, motor.device_id)
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bringup")
+            if self._start is None:
+                self._start = time.perf_counter()
+            previous = self._pending.get(key)
+            # Submitted earlier, so it is never still queued behind this one
+            after = previous[1] if previous is not None else None
+            future = self._pool.submit(self._bring_up, name, steps, after)
+            self._pending[key] = (name, future)
+            return future
+
+    @contextmanager
+    def timed(self, name: str):
+        """Report a blocking bring-up that has to run on the calling thread"""
+        with self._lock:
+            if self._start is None:
+                self._start = time.perf_counter()
+        report = DeviceReport(name, attempts=1)
+        start = time.perf_counter()
+        try:
+            yield report
+        except Exception as e:
+            report.error = str(e)
+            raise
+        finally:
+            report.latency = time.perf_counter() - start
+            self.reports[name] = report
+
+    def _bring_up(self, name: str, steps: list[tuple[str, Callable[[], StatusCode]]],
+                  after: Future | None = None) -> DeviceReport:
+        if after is not None:
+            after.result()
+        report = DeviceReport(name)
+        start = time.perf_counter()
+        for step, write in steps:
+            for _ in range(self.attempts):
+                report.attempts += 1
+                status = write()
+                if status.is_ok():
+                    break
+            else:
+                report.error = f"{step}: {status.name}"
+                break
+            report.steps.append(step)
+        report.latency = time.perf_counter() - start
+        return report
+
+    def finish(self) -> dict[str, DeviceReport]:
+        """Block until every queued device is done, stop the workers and publish the results"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            start, self._start = self._start, None
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            # Waits for every queued device, including ones queued again behind earlier work
+            pool.shutdown(wait=True)
+        for name, future in pending.values():
+            self.reports[name] = future.result()
+        total = time.perf_counter() - start if start is not None else 0.0
+
+        failed = []
+        for name, report in self.reports.items():
+            self._table.putNumber(f"Devices/{name}/Latency", report.latency)
+            self._table.putNumber(f"Devices/{name}/Attempts", report.attempts)
+            self._table.putString(f"Devices/{name}/Error", report.error)
+            if not report.ok:
+                failed.append(f"{name} ({report.error})")
+        self._total_pub.set(total)
+        self._serial_pub.set(sum(report.latency for report in self.reports.values()))
+        self._failed_pub.set(failed)
+        self._alert.setText(f"Device bring-up failed: {', '.join(failed)}")
+        self._alert.set(bool(failed))
+        return self.reports
+
+BRINGUP = DeviceBringup()
+"""Shared bring-up stage for every mechanism device"""
@@ -21,4 +21,83 @@ ELEVATOR_FOLLOWING_MOTOR_ID = 14
 CLIMB_MOTOR_ID = 15
 BOTTOM_WHEELS_MOTOR_ID = 16
 TOP_WHEELS_MOTOR_ID = 17
-ROTATE_INTAKE_MOTOR_ID = 18
\ No newline at end of file
+ROTATE_INTAKE_MOTOR_ID = 18
+
+# Field dimensions (meters), from deploy/pathplanner/navgrid.json
+FIELD_LENGTH = 17.548
+FIELD_WIDTH = 8.052
+
+# Reef geometry (meters), blue alliance; red is the field rotated 180 degrees
+BLUE_REEF_CENTER = (4.489, 4.026)
+REEF_FACE_DISTANCE = 0.832  # reef center to face
+REEF_BRANCH_OFFSET = 0.164  # face center to each branch, along the face
+# Coral station AprilTags (x, y, facing degrees), blue alliance
+BLUE_CORAL_STATIONS = [(0.851, 0.655, 54.0), (0.851, 7.396, -54.0)]
+ROBOT_HALF_LENGTH = 0.45  # bumper edge to robot center
+
+# Replay recording; set to a file path to record a replay log every loop
+REPLAY_RECORD_PATH: str | None = None
+
+# Loop tracing; set to a file path to write a Chrome trace (Perfetto) on every disable,
+# numbered per flush. Spans past the cap are dropped; a match is about 200k
+TRACE_PATH: str | None = None
+TRACE_MAX_EVENTS = 250_000
+
+# Total supply current budget (A), scaled down as the battery sags
+POWER_BUDGET_MAX = 350
+POWER_BUDGET_MIN = 200
+POWER_BUDGET_FULL_VOLTAGE = 11.0  # full budget at or above this
+POWER_BUDGET_MIN_VOLTAGE = 8.5  # minimum budget at or below this
+POWER_BUDGET_WRITE_INTERVAL = 0.25  # s, least time between limit writes to one group
+POWER_BUDGET_MOVING_SPEED = 0.25  # m/s, drivetrain speed above which the driving priorities apply
+
+# Superstructure coordination
+SUPERSTRUCTURE_TRAVEL_ANGLE = 40  # degrees; the intake stays at or below this while the elevator travels
+SUPERSTRUCTURE_ROTATE_LEAD = 8  # inches from the goal height at which the intake starts toward its goal angle
+SUPERSTRUCTURE_HEIGHT_TOLERANCE = 0.5  # inches
+SUPERSTRUCTURE_EJECT_SPEED = 100
+SUPERSTRUCTURE_EJECT_TIME = 0.4  # seconds, longest the wheels run to score
+
+# Device bring-up at boot
+BRINGUP_WORKERS = 6  # devices configured at once
+BRINGUP_ATTEMPTS = 3  # tries per config write before reporting a failure
+BRINGUP_TIMEOUT = 0.25  # seconds to wait for each write to be acknowledged
+
+# Mechanism state publishing rate (Hz); at most once per robot loop
+MECHANISM_TELEMETRY_RATE = 50
+
+# Driver input to motor output latency measurement
+INPUT_LATENCY_INPUT_THRESHOLD = 0.1  # stick change that starts a measurement
+INPUT_LATENCY_OUTPUT_THRESHOLD = 0.5  # volts of applied output change that ends it
+INPUT_LATENCY_TIMEOUT = 0.5  # seconds before an input that never reached the motor is dropped
+INPUT_LATENCY_SIGNAL_FREQUENCY = 250  # Hz, frame rate of the watched motor voltage
+# Simulation only; set to a period in seconds to inject drive stick steps
+INPUT_LATENCY_STEP_PERIOD: float | None = None
+INPUT_LATENCY_STEP_AMPLITUDE = 0.5
+
+# Wheel slip and collision detection from module states
+TRACTION_SLIP_RESIDUAL = 0.5  # m/s a module may differ from the fitted chassis motion
+TRACTION_SLIP_YAW_ERROR = 1.0  # rad/s between wheel-derived and gyro yaw rate
+TRACTION_SLIP_COMMAND_ERROR = 0.75  # m/s a module may exceed its commanded speed while speeding up
+TRACTION_COLLISION_ACCEL = 20  # m/s^2, well past what the drive can produce
+TRACTION_HOLD_TIME = 0.5  # seconds odometry stays distrusted after an event
+TRACTION_WINDOW = 0.05  # seconds over which yaw rate and acceleration are measured
+ODOMETRY_STD_DEVS = (0.1, 0.1, 0.1)  # pose estimator odometry trust (m, m, rad)
+TRACTION_LOST_STD_DEV_SCALE = 10  # odometry std devs multiplier while slipping or colliding
+
+# Heading-controlled driving
+HEADING_P = 6.0  # rad/s per radian of heading error
+HEADING_D = 0.1
+HEADING_MAX_ANGULAR_VELOCITY = math.pi * 2  # rad/s of the rotation profile
+HEADING_MAX_ANGULAR_ACCELERATION = math.pi * 6  # rad/s^2 of the rotation profile
+HEADING_SNAP_INCREMENT = math.radians(60)  # reef faces are 60 degrees apart
+HEADING_SETTLE_TOLERANCE = math.radians(0.5)
+
+# Tip-safe drive limits by elevator height
+TIP_CG_HEIGHT_STOWED = 0.25  # m, robot center of gravity with the elevator down
+TIP_CG_RISE = 0.006  # m of center of gravity rise per inch of elevator travel
+TIP_SAFETY_FACTOR = 0.5  # fraction of the tipping acceleration the drive may use
+TIP_STOP_DISTANCE = 2.1  # m the robot must be able to stop in from the speed cap
+SPEED_LIMIT_MAX_HEIGHT = 80  # inches covered by the lookup table
+SPEED_LIMIT_BIN_SIZE = 1.0  # inches per lookup table entry
+BRAKE_LOCK_SPEED = 0.1  # m/s below which the driver's brake locks the wheels
@@ -0,0 +1,136 @@
+import math
+import threading
+from typing import Callable, Generic, TypeVar
+
+from ntcore import NetworkTableInstance
+from wpilib import Notifier, Timer
+
+T = TypeVar("T")
+
+FAST_LOOP_PERIOD = 0.005
+
+class Mailbox(Generic[T]):
+    """Latest-value handoff between the scheduler thread and a fast loop thread"""
+
+    def __init__(self, initial: T):
+        self._lock = threading.Lock()
+        self._value = initial
+
+    def put(self, value: T) -> None:
+        with self._lock:
+            self._value = value
+
+    def get(self) -> T:
+        with self._lock:
+            return self._value
+
+class LoopTimingStats:
+    """Running period, jitter and execution time statistics for a periodic loop"""
+
+    def __init__(self, nominal_period: float):
+        self.nominal_period = nominal_period
+        self.reset()
+
+    def reset(self) -> None:
+        self.count = 0
+        self.mean_period = 0.0
+        self._m2 = 0.0
+        self.max_jitter = 0.0
+        self.max_execution = 0.0
+        self.overruns = 0
+
+    def add(self, period: float, execution: float) -> None:
+        # Welford's update keeps the variance without storing samples
+        self.count += 1
+        delta = period - self.mean_period
+        self.mean_period += delta / self.count
+        self._m2 += delta * (period - self.mean_period)
+        self.max_jitter = max(self.max_jitter, abs(period - self.nominal_period))
+        self.max_execution = max(self.max_execution, execution)
+        if period > self.nominal_period * 1.5:
+            self.overruns += 1
+
+    @property
+    def jitter_stddev(self) -> float:
+        return math.sqrt(self._m2 / self.count) if self.count > 1 else 0.0
+
+class FastLoop:
+    """
+    Runs a control callback on its own Notifier thread, faster than the 20 ms
+    scheduler loop.
+
+    The callback receives the measured time since its last run. Anything it shares
+    with commands or periodic() should go through a Mailbox. Timing statistics are
+    collected on the loop thread and published by calling publish_stats() from the
+    scheduler thread, so NetworkTables is not written at the fast rate.
+
+    Setting FastLoop.synchronous before loops are started keeps the Notifiers off;
+    running loops are then advanced explicitly with FastLoop.step_all(), which is
+    how log replay keeps them deterministic.
+    """
+
+    synchronous = False
+    _running_loops: list["FastLoop"] = []
+
+    def __init__(self, name: str, callback: Callable[[float], None], period: float = FAST_LOOP_PERIOD):
+        self.name = name
+        self.period = period
+        self._callback = callback
+        self._notifier = Notifier(self._run)
+        self._notifier.setName(name)
+        self._stats_lock = threading.Lock()
+        self._stats = LoopTimingStats(period)
+        self._last_time: float | None = None
+        self._running = False
+
+        table = NetworkTableInstance.getDefault().getTable("FastLoops").getSubTable(name)
+        self._mean_period_pub = table.getDoubleTopic("MeanPeriod").publish()
+        self._jitter_stddev_pub = table.getDoubleTopic("JitterStdDev").publish()
+        self._max_jitter_pub = table.getDoubleTopic("MaxJitter").publish()
+        self._max_execution_pub = table.getDoubleTopic("MaxExecution").publish()
+        self._overruns_pub = table.getIntegerTopic("Overruns").publish()
+
+    def start(self) -> None:
+        if self._running:
+            return
+        self._running = True
+        self._last_time = None
+        if FastLoop.synchronous:
+            FastLoop._running_loops.append(self)
+        else:
+            self._notifier.startPeriodic(self.period)
+
+    def stop(self) -> None:
+        if not self._running:
+            return
+        self._running = False
+        if FastLoop.synchronous:
+            FastLoop._running_loops.remove(self)
+        else:
+            self._notifier.stop()
+
+    @staticmethod
+    def step_all(elapsed: float) -> None:
+        """Run every started loop as many times as fit in elapsed seconds of virtual time"""
+        for loop in list(FastLoop._running_loops):
+            for _ in range(round(elapsed / loop.period)):
+                if not loop._running:
+                    break
+                loop._callback(loop.period)
+
+    def _run(self) -> None:
+        start = Timer.getFPGATimestamp()
+        period = self.period if self._last_time is None else start - self._last_time
+        self._last_time = start
+        self._callback(period)
+        with self._stats_lock:
+            self._stats.add(period, Timer.getFPGATimestamp() - start)
+
+    def publish_stats(self) -> None:
+        with self._stats_lock:
+            stats = self._stats
+            self._mean_period_pub.set(stats.mean_period)
+            self._jitter_stddev_pub.set(stats.jitter_stddev)
+            self._max_jitter_pub.set(stats.max_jitter)
+            self._max_execution_pub.set(stats.max_execution)
+            self._overruns_pub.set(stats.overruns)
@@ -0,0 +1,115 @@
+import math
+from enum import Enum
+
+import numpy as np
+from wpilib import DriverStation
+from wpimath.geometry import Pose2d
+
+from utils.constants import (FIELD_LENGTH, FIELD_WIDTH, BLUE_REEF_CENTER,
+    REEF_FACE_DISTANCE, REEF_BRANCH_OFFSET, BLUE_CORAL_STATIONS, ROBOT_HALF_LENGTH)
+
+class TargetKind(Enum):
+    BRANCH = 0
+    STATION = 1
+
+def flip_to_red(poses: np.ndarray) -> np.ndarray:
+    """Rotate (N, 3) blue alliance poses 180 degrees about the field center"""
+    flipped = np.empty_like(poses)
+    flipped[:, 0] = FIELD_LENGTH - poses[:, 0]
+    flipped[:, 1] = FIELD_WIDTH - poses[:, 1]
+    flipped[:, 2] = np.arctan2(-np.sin(poses[:, 2]), -np.cos(poses[:, 2]))
+    return flipped
+
+def _blue_branch_poses() -> np.ndarray:
+    """Robot poses facing each of the 12 reef branches, as rows of (x, y, heading)"""
+    poses = []
+    standoff = REEF_FACE_DISTANCE + ROBOT_HALF_LENGTH
+    for face in range(6):
+        normal = math.radians(180 - 60 * face)
+        face_x = BLUE_REEF_CENTER[0] + standoff * math.cos(normal)
+        face_y = BLUE_REEF_CENTER[1] + standoff * math.sin(normal)
+        heading = math.atan2(-math.sin(normal), -math.cos(normal))
+        for side in (-1, 1):
+            poses.append((
+                face_x - side * REEF_BRANCH_OFFSET * math.sin(normal),
+                face_y + side * REEF_BRANCH_OFFSET * math.cos(normal),
+                heading,
+            ))
+    return np.array(poses)
+
+def _blue_station_poses() -> np.ndarray:
+    """Robot poses backed up against each coral station, as rows of (x, y, heading)"""
+    poses = []
+    for tag_x, tag_y, tag_degrees in BLUE_CORAL_STATIONS:
+        normal = math.radians(tag_degrees)
+        poses.append((
+            tag_x + ROBOT_HALF_LENGTH * math.cos(normal),
+            tag_y + ROBOT_HALF_LENGTH * math.sin(normal),
+            math.atan2(-math.sin(normal), -math.cos(normal)),
+        ))
+    return np.array(poses)
+
+class PoseIndex:
+    """
+    Nearest-pose lookup over a fixed set of field poses.
+
+    The field is split into a coarse grid and each cell keeps only the poses that
+    can be nearest to some point inside it, so a query measures a handful of
+    distances instead of all of them.
+    """
+
+    def __init__(self, poses: np.ndarray, cell_size: float = 0.5):
+        self.poses = poses
+        self._cell_size = cell_size
+        self._columns = math.ceil(FIELD_LENGTH / cell_size)
+        self._rows = math.ceil(FIELD_WIDTH / cell_size)
+        self._pose_objects = [Pose2d(x, y, heading) for x, y, heading in poses]
+
+        cx, cy = np.meshgrid(
+            (np.arange(self._columns) + 0.5) * cell_size,
+            (np.arange(self._rows) + 0.5) * cell_size,
+            indexing="ij",
+        )
+        centers = np.stack([cx.ravel(), cy.ravel()], axis=1)
+        distances = np.hypot(
+            centers[:, None, 0] - poses[None, :, 0],
+            centers[:, None, 1] - poses[None, :, 1],
+        )
+        # Any point in a cell is within half a diagonal of its center, so the true
+        # nearest pose is at most a full diagonal further than the closest one
+        reach = distances.min(axis=1, keepdims=True) + cell_size * math.sqrt(2)
+        candidates = [np.flatnonzero(row <= limit) for row, limit in zip(distances, reach)]
+        self._cell_starts = np.cumsum([0] + [len(c) for c in candidates])
+        self._cell_candidates = np.concatenate(candidates)
+
+    def nearest(self, x: float, y: float) -> int:
+        """Return the row of the pose closest to the given field position"""
+        column = min(max(int(x / self._cell_size), 0), self._columns - 1)
+        row = min(max(int(y / self._cell_size), 0), self._rows - 1)
+        cell = column * self._rows + row
+        candidates = self._cell_candidates[self._cell_starts[cell]:self._cell_starts[cell + 1]]
+        offsets = self.poses[candidates, :2] - (x, y)
+        return int(candidates[np.argmin(np.einsum("ij,ij->i", offsets, offsets))])
+
+    def pose(self, index: int) -> Pose2d:
+        return self._pose_objects[index]
+
+_BLUE_POSES = {
+    TargetKind.BRANCH: _blue_branch_poses(),
+    TargetKind.STATION: _blue_station_poses(),
+}
+
+SCORING_POSES = {
+    (alliance, kind): PoseIndex(poses if alliance == DriverStation.Alliance.kBlue else flip_to_red(poses))
+    for alliance in (DriverStation.Alliance.kBlue, DriverStation.Alliance.kRed)
+    for kind, poses in _BLUE_POSES.items()
+}
+"""Precomputed scoring pose indices keyed by (alliance, TargetKind)"""
+
+def nearest_target(pose: Pose2d, kind: TargetKind = TargetKind.BRANCH) -> Pose2d:
+    """Return the closest scoring pose of the given kind for our alliance"""
+    alliance = DriverStation.getAlliance()
+    if alliance is None:
+        alliance = DriverStation.Alliance.kBlue
+    index = SCORING_POSES[(alliance, kind)]
+    return index.pose(index.nearest(pose.x, pose.y))
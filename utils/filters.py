@@ -0,0 +1,34 @@
+class EwmaHysteresis:
+    """
+    Streaming threshold detector for noisy signals such as motor current.
+
+    Each sample updates an exponentially weighted moving average in O(1). The
+    output turns on once the average stays above `rising` for `debounce` samples
+    and turns off once it stays below `falling` for `debounce` samples.
+    """
+
+    def __init__(self, alpha: float, rising: float, falling: float, debounce: int = 3):
+        self.alpha = alpha
+        self.rising = rising
+        self.falling = falling
+        self.debounce = debounce
+        self.average = 0.0
+        self.state = False
+        self._count = 0
+
+    def reset(self, average: float = 0.0, state: bool = False) -> None:
+        self.average = average
+        self.state = state
+        self._count = 0
+
+    def update(self, sample: float) -> bool:
+        self.average += self.alpha * (sample - self.average)
+        above = self.average > (self.falling if self.state else self.rising)
+        if above != self.state:
+            self._count += 1
+            if self._count >= self.debounce:
+                self.state = above
+                self._count = 0
+        else:
+            self._count = 0
+        return self.state
@@ -0,0 +1,80 @@
+import gc
+import time
+
+from ntcore import NetworkTableInstance
+
+# Gen 2 threshold high enough that a full collection never triggers during a match
+SUPPRESSED_GEN2_THRESHOLD = 1_000_000
+
+class GcPolicy:
+    """
+    Keeps Python garbage collection pauses out of autonomous and teleop.
+
+    Objects created during robot startup are frozen into the permanent generation
+    so collections never rescan them. While enabled, full (gen 2) collections are
+    suppressed and only the cheap young generations run; the deferred full
+    collection happens on the next disable. Every collection is timed through
+    gc.callbacks, and pauses longer than a loop period while enabled count as
+    overruns.
+    """
+
+    def __init__(self, loop_period: float = 0.02):
+        self.loop_period = loop_period
+        self._default_thresholds = gc.get_threshold()
+        self._enabled = False
+        self._start = 0.0
+        self.collections = [0, 0, 0]
+        self.enabled_full_collections = 0
+        self.max_pause = 0.0
+        self.overruns = 0
+        gc.callbacks.append(self._on_gc)
+
+        table = NetworkTableInstance.getDefault().getTable("GC")
+        self._collections_pub = table.getIntegerArrayTopic("Collections").publish()
+        self._enabled_full_pub = table.getIntegerTopic("EnabledFullCollections").publish()
+        self._max_pause_pub = table.getDoubleTopic("MaxPause").publish()
+        self._overruns_pub = table.getIntegerTopic("Overruns").publish()
+        self._frozen_pub = table.getIntegerTopic("Frozen").publish()
+
+    def _on_gc(self, phase: str, info: dict) -> None:
+        if phase == "start":
+            self._start = time.perf_counter()
+            return
+        pause = time.perf_counter() - self._start
+        generation = info["generation"]
+        self.collections[generation] += 1
+        if self._enabled and generation == 2:
+            self.enabled_full_collections += 1
+        self.max_pause = max(self.max_pause, pause)
+        if self._enabled and pause > self.loop_period:
+            self.overruns += 1
+
+    def freeze(self) -> None:
+        """Collect once and move everything alive into the permanent generation"""
+        gc.collect()
+        gc.freeze()
+
+    def enter_enabled(self) -> None:
+        """Stop full collections for the rest of the enabled period"""
+        self._enabled = True
+        gen0, gen1, _ = self._default_thresholds
+        gc.set_threshold(gen0, gen1, SUPPRESSED_GEN2_THRESHOLD)
+
+    def enter_disabled(self) -> None:
+        """Restore normal collection and run the deferred full collection now"""
+        self._enabled = False
+        gc.set_threshold(*self._default_thresholds)
+        gc.collect()
+
+    def close(self) -> None:
+        """Stop timing collections and restore the default thresholds"""
+        if self._on_gc in gc.callbacks:
+            gc.callbacks.remove(self._on_gc)
+        gc.set_threshold(*self._default_thresholds)
+
+    def publish(self) -> None:
+        self._collections_pub.set(self.collections)
+        self._enabled_full_pub.set(self.enabled_full_collections)
+        self._max_pause_pub.set(self.max_pause)
+        self._overruns_pub.set(self.overruns)
+        self._frozen_pub.set(gc.get_freeze_count())
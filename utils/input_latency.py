@@ -0,0 +1,152 @@
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+from ntcore import NetworkTableInstance
+from phoenix6 import utils
+from phoenix6.hardware import TalonFX
+from wpilib.simulation import XboxControllerSim
+
+from utils.constants import (INPUT_LATENCY_INPUT_THRESHOLD, INPUT_LATENCY_OUTPUT_THRESHOLD,
+    INPUT_LATENCY_TIMEOUT, INPUT_LATENCY_SIGNAL_FREQUENCY)
+
+STAGES = ("Execute", "Submit", "Actuation", "Total")
+
+@dataclass
+class LatencyEvent:
+    """Timestamps of one input step on its way to the motor, in Phoenix time"""
+    input: float
+    baseline: float
+    execute: float | None = None
+    submit: float | None = None
+
+class InputLatencyMonitor:
+    """
+    Measures how long a driver input takes to change a motor's applied output.
+
+    A step in the watched input starts an event, stamped when the loop samples
+    it (or when a synthetic step is injected in simulation). The event is then
+    stamped when the command's request lambda runs, when the request is handed
+    to set_control, and finally with the device timestamp of the first motor
+    voltage frame that moved by more than the output threshold, which includes
+    the time the request waits for the Phoenix control thread. Per-stage p50,
+    p95 and max over the last window events are published to InputLatency
+    as each event completes.
+    Only one event is in flight at a time; one that does not reach the motor
+    within the timeout (disabled, inside the deadband) is dropped.
+    """
+
+    def __init__(self, input_value: Callable[[], float], motor: TalonFX, window: int = 200):
+        self._input_value = input_value
+        self._voltage = motor.get_motor_voltage(False)
+        # Device timestamps are only as fine as the frame rate of the watched signal
+        self._voltage.set_update_frequency(INPUT_LATENCY_SIGNAL_FREQUENCY)
+        self._last_input = 0.0
+        self._event: LatencyEvent | None = None
+        self._samples = {stage: np.zeros(window) for stage in STAGES}
+        self._index = 0
+        self._count = 0
+        self.dropped = 0
+        self._injector: XboxControllerSim | None = None
+        self._injected_at: float | None = None
+        self._next_step = 0.0
+        self._step_high = False
+
+        table = NetworkTableInstance.getDefault().getTable("InputLatency")
+        self._stage_pubs = {
+            stage: (
+                table.getDoubleTopic(f"{stage}/P50").publish(),
+                table.getDoubleTopic(f"{stage}/P95").publish(),
+                table.getDoubleTopic(f"{stage}/Max").publish(),
+            )
+            for stage in STAGES
+        }
+        self._count_pub = table.getIntegerTopic("Events").publish()
+        self._dropped_pub = table.getIntegerTopic("Dropped").publish()
+
+    def wrap_request(self, request: Callable):
+        """Wrap a drive request lambda so its call is stamped as the execute time"""
+        def stamped():
+            if self._event is not None and self._event.execute is None:
+                self._event.execute = utils.get_current_time_seconds()
+            return request()
+        return stamped
+
+    def attach(self, drivetrain) -> None:
+        """Stamp the first request submitted to the drivetrain after each execute"""
+        drivetrain.add_request_listener(self._stamp_submit)
+
+    def _stamp_submit(self, request) -> None:
+        event = self._event
+        if event is not None and event.execute is not None and event.submit is None:
+            event.submit = utils.get_current_time_seconds()
+
+    def sample(self) -> None:
+        """Look for an input step; call at the start of the loop, before the scheduler runs"""
+        value = self._input_value()
+        now = utils.get_current_time_seconds()
+        stepped = abs(value - self._last_input) > INPUT_LATENCY_INPUT_THRESHOLD
+        self._last_input = value
+        if self._event is not None and now - self._event.input > INPUT_LATENCY_TIMEOUT:
+            self._event = None
+            self.dropped += 1
+            self._dropped_pub.set(self.dropped)
+        if not stepped:
+            return
+        if self._event is None:
+            self._voltage.refresh()
+            input_time = self._injected_at if self._injected_at is not None else now
+            self._event = LatencyEvent(input_time, self._voltage.value)
+        self._injected_at = None
+
+    def update(self) -> None:
+        """Look for the output change; call after the scheduler has run"""
+        event = self._event
+        if event is not None and event.submit is not None:
+            self._voltage.refresh()
+            timestamp = self._voltage.all_timestamps.get_device_timestamp()
+            if not timestamp.is_valid:
+                timestamp = self._voltage.all_timestamps.get_best_timestamp()
+            if abs(self._voltage.value - event.baseline) > INPUT_LATENCY_OUTPUT_THRESHOLD and timestamp.time >= event.submit:
+                self._record(event, timestamp.time)
+                self._event = None
+
+    def _record(self, event: LatencyEvent, actuated: float) -> None:
+        i = self._index
+        self._samples["Execute"][i] = event.execute - event.input
+        self._samples["Submit"][i] = event.submit - event.execute
+        self._samples["Actuation"][i] = actuated - event.submit
+        self._samples["Total"][i] = actuated - event.input
+        window = len(self._samples["Total"])
+        self._index = (i + 1) % window
+        self._count = min(self._count + 1, window)
+
+        # Statistics only change when an event completes, so they are computed and published here
+        for stage, (p50, p95, worst) in self._stage_pubs.items():
+            samples = self._samples[stage][:self._count]
+            low, high = np.percentile(samples, [50, 95])
+            p50.set(low)
+            p95.set(high)
+            worst.set(samples.max())
+        self._count_pub.set(self._count)
+
+    def inject_steps(self, port: int, axis: Callable[[XboxControllerSim, float], None], amplitude: float, period: float) -> None:
+        """
+        Simulation only: toggle a controller axis between 0 and amplitude every
+        period seconds, stamping each step as the input time. The new value
+        reaches the robot code with the next driver station update, like a real
+        HID sample.
+        """
+        if self._injector is None:
+            self._injector = XboxControllerSim(port)
+            # Axes read as 0 until the simulated controller reports having them
+            self._injector.setAxisCount(6)
+            self._injector.setButtonCount(10)
+        now = utils.get_current_time_seconds()
+        if now < self._next_step:
+            return
+        self._next_step = now + period
+        self._step_high = not self._step_high
+        axis(self._injector, amplitude if self._step_high else 0.0)
+        self._injector.notifyNewData()
+        self._injected_at = now
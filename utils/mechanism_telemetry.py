@@ -0,0 +1,63 @@
+from dataclasses import dataclass
+
+from ntcore import NetworkTableInstance
+from phoenix6 import BaseStatusSignal
+from phoenix6.hardware import TalonFX
+from wpiutil import wpistruct
+
+from utils.constants import MECHANISM_TELEMETRY_RATE
+
+@wpistruct.make_wpistruct(name="MechanismState")
+@dataclass
+class MechanismState:
+    """One mechanism's state in its own units (inches, degrees, rotations)"""
+    position: wpistruct.double
+    velocity: wpistruct.double
+    setpoint: wpistruct.double
+    voltage: wpistruct.double
+    current: wpistruct.double
+
+class MechanismTelemetry:
+    """
+    Publishes a mechanism's state as one MechanismState struct under
+    Mechanisms/<name>/State.
+
+    Position and velocity come from the first motor, scaled by scale into the
+    mechanism's units; voltage is the first motor's applied voltage and current
+    the summed stator current magnitude of all motors. Signals and the
+    publisher are created once. publish() is called every loop but only
+    refreshes and publishes once every 1 / (rate * loop_period) calls.
+    Open-loop mechanisms publish a NaN setpoint.
+    """
+
+    def __init__(self, name: str, motors: list[TalonFX], scale: float = 1.0,
+                 rate: float = MECHANISM_TELEMETRY_RATE, loop_period: float = 0.02):
+        self.scale = scale
+        self._every = max(1, round(1.0 / (rate * loop_period)))
+        self._loops = 0
+        first = motors[0]
+        self._position = first.get_position(False)
+        self._velocity = first.get_velocity(False)
+        self._voltage = first.get_motor_voltage(False)
+        self._currents = [motor.get_stator_current(False) for motor in motors]
+        self._signals = [self._position, self._velocity, self._voltage, *self._currents]
+        self._state = MechanismState(0.0, 0.0, 0.0, 0.0, 0.0)
+
+        table = NetworkTableInstance.getDefault().getTable("Mechanisms").getSubTable(name)
+        self._state_pub = table.getStructTopic("State", MechanismState).publish()
+
+    def publish(self, setpoint: float) -> None:
+        """Publish the current state with setpoint in mechanism units, at most at the configured rate"""
+        self._loops += 1
+        if self._loops < self._every:
+            return
+        self._loops = 0
+        BaseStatusSignal.refresh_all(*self._signals)
+        state = self._state
+        state.position = self._position.value * self.scale
+        state.velocity = self._velocity.value * self.scale
+        state.setpoint = setpoint
+        state.voltage = self._voltage.value
+        # Opposed or inverted followers read negative stator current; magnitudes add up
+        state.current = sum(abs(signal.value) for signal in self._currents)
+        self._state_pub.set(state)
@@ -7,13 +7,84 @@ def percent_to_voltage(percent):
     return (percent / 100) * MAX_VOLTAGE
 
 MOTOR_CONFIG = {
+    "drive": {
+        # Power budget order (lowest served first) while driving and while stopped,
+        # and supply current limits per motor (A)
+        "budget_priority": 0,
+        "budget_priority_stopped": 4,
+        "supply_limit_min": 30,
+        "supply_limit_max": 70,
+    },
     "elevator": {
-        "max_speed": 50
+        "max_speed": 50,
+        # Position loop gains (volts per motor rotation of error), run on the fast loop
+        "kP": 0.5,
+        "kI": 0.01,
+        "kD": 0,
+        "i_zone": 0.125,
+        "tolerance": 0.5,  # motor rotations
+        "kG": 0.1,
+        "budget_priority": 2,
+        "budget_priority_stopped": 1,
+        "supply_limit_min": 20,
+        "supply_limit_max": 60,
     },
     "climb": {
-        "max_speed": 30
+        "max_speed": 30,
+        # Winch geometry; the soft limits are the rope travel either way from the
+        # stowed position at boot, converted to motor rotations by Climb
+        "gear_ratio": 25,  # motor rotations per drum rotation
+        "drum_diameter": 1.25,  # inches
+        "travel": 23.5,  # inches of rope, about 150 motor rotations
+        # Position hold gain (V per rotation of error), runs on the TalonFX
+        "hold_kP": 2.0,
+        # Stall detection from stator current (A) and winch speed (rps)
+        "stall_current": 60,
+        "stall_release_current": 40,
+        "stall_max_velocity": 0.5,
+        "stall_filter_alpha": 0.3,
+        "stall_debounce_loops": 5,
+        "stall_spinup_loops": 15,
+        "breaker_current": 40,
+        "budget_priority": 4,
+        "budget_priority_stopped": 0,
+        "supply_limit_min": 10,
+        "supply_limit_max": 40,
+    },
+    "rotate": {
+        # Rotor rotations per intake rotation
+        "gear_ratio": 25,
+        # Closed-loop gains per intake rotation, run on the TalonFX
+        "kP": 60,
+        "kD": 0.5,
+        "cruise_velocity": 1.5,  # rotations per second
+        "acceleration": 4,  # rotations per second squared
+        # Soft limits and manual nudging, in degrees from the stowed position at boot
+        "forward_soft_limit": 120,
+        "reverse_soft_limit": -2,
+        "nudge_rate": 90,  # degrees per second at full stick
+        "deadband": 0.1,
+        "tolerance": 2,
+        "budget_priority": 3,
+        "budget_priority_stopped": 3,
+        "supply_limit_min": 5,
+        "supply_limit_max": 30,
     },
     "wheels": {
-        "max_speed": 100
+        "max_speed": 100,
+        # Game piece detection from combined stator current (A) and wheel speed (rps)
+        "intake_speed": -100,
+        "piece_current": 25,
+        "piece_release_current": 15,
+        # Wheels count as spinning above piece_max_velocity and as stalled on a piece below piece_stalled_velocity
+        "piece_max_velocity": 15,
+        "piece_stalled_velocity": 10,
+        "piece_filter_alpha": 0.3,
+        "piece_debounce_loops": 3,
+        "piece_spinup_loops": 12,
+        "budget_priority": 1,
+        "budget_priority_stopped": 2,
+        "supply_limit_min": 10,
+        "supply_limit_max": 40,
     }
 }
\ No newline at end of file
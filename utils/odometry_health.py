@@ -0,0 +1,90 @@
+import numpy as np
+from ntcore import NetworkTableInstance
+from phoenix6 import swerve
+from wpilib import Alert
+
+class OdometryHealthMonitor:
+    """
+    Tracks how well the swerve odometry thread is keeping up.
+
+    update() runs on the odometry thread for every drive state and only writes one
+    slot of fixed-size ring buffers: the reported odometry period, the gap
+    between state timestamps, and how many DAQ reads succeeded and failed since
+    the previous state. publish() reduces the window on the main thread and
+    raises a dashboard alert when the rate falls below min_frequency_fraction of
+    expected_frequency or the DAQ failure rate exceeds max_failure_rate.
+    """
+
+    def __init__(
+        self,
+        expected_frequency: float,
+        window: int = 500,
+        min_frequency_fraction: float = 0.75,
+        max_failure_rate: float = 0.05,
+        gap_factor: float = 2.0,
+    ):
+        self.expected_frequency = expected_frequency
+        self.min_frequency_fraction = min_frequency_fraction
+        self.max_failure_rate = max_failure_rate
+        self.gap_threshold = gap_factor / expected_frequency
+        self._periods = np.zeros(window)
+        self._gaps = np.zeros(window)
+        self._successes = np.zeros(window, dtype=np.int64)
+        self._failures = np.zeros(window, dtype=np.int64)
+        self._index = 0
+        self._count = 0
+        self._last_timestamp: float | None = None
+        self._last_successes = 0
+        self._last_failures = 0
+        self.degraded = False
+
+        table = NetworkTableInstance.getDefault().getTable("OdometryHealth")
+        self._frequency_pub = table.getDoubleTopic("Frequency").publish()
+        self._jitter_pub = table.getDoubleTopic("JitterStdDev").publish()
+        self._max_period_pub = table.getDoubleTopic("MaxPeriod").publish()
+        self._failure_rate_pub = table.getDoubleTopic("FailureRate").publish()
+        self._gaps_pub = table.getIntegerTopic("Gaps").publish()
+        self._degraded_pub = table.getBooleanTopic("Degraded").publish()
+        self._alert = Alert("Odometry degraded", Alert.AlertType.kWarning)
+
+    def update(self, state: swerve.SwerveDrivetrain.SwerveDriveState) -> None:
+        if self._last_timestamp is None:
+            # DAQ counters are cumulative; start counting from the first state
+            self._last_timestamp = state.timestamp
+            self._last_successes = state.successful_daqs
+            self._last_failures = state.failed_daqs
+        i = self._index
+        self._periods[i] = state.odometry_period
+        self._gaps[i] = state.timestamp - self._last_timestamp
+        self._successes[i] = state.successful_daqs - self._last_successes
+        self._failures[i] = state.failed_daqs - self._last_failures
+        self._last_timestamp = state.timestamp
+        self._last_successes = state.successful_daqs
+        self._last_failures = state.failed_daqs
+        self._index = (i + 1) % len(self._periods)
+        self._count = min(self._count + 1, len(self._periods))
+
+    def publish(self) -> None:
+        if self._count == 0:
+            return
+        # Buffers may be mid-update from the odometry thread; one stale slot is fine
+        periods = self._periods[:self._count]
+        valid = periods[periods > 0]
+        frequency = 1.0 / valid.mean() if len(valid) else 0.0
+        reads = self._successes[:self._count].sum() + self._failures[:self._count].sum()
+        failure_rate = self._failures[:self._count].sum() / reads if reads > 0 else 0.0
+        gaps = int(np.count_nonzero(self._gaps[:self._count] > self.gap_threshold))
+
+        self.degraded = (
+            frequency < self.expected_frequency * self.min_frequency_fraction
+            or failure_rate > self.max_failure_rate
+        )
+        self._frequency_pub.set(frequency)
+        self._jitter_pub.set(float(valid.std()) if len(valid) else 0.0)
+        self._max_period_pub.set(float(periods.max()))
+        self._failure_rate_pub.set(failure_rate)
+        self._gaps_pub.set(gaps)
+        self._degraded_pub.set(self.degraded)
+        if self.degraded:
+            self._alert.setText(f"Odometry degraded: {frequency:.0f} Hz, {failure_rate:.0%} DAQ failures")
+        self._alert.set(self.degraded)
@@ -0,0 +1,156 @@
+import copy
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable
+
+import numpy as np
+from ntcore import NetworkTableInstance
+from phoenix6 import BaseStatusSignal, StatusSignal, configs
+from phoenix6.hardware import TalonFX
+from wpilib import RobotController, Timer
+
+from utils.constants import (POWER_BUDGET_MAX, POWER_BUDGET_MIN,
+    POWER_BUDGET_FULL_VOLTAGE, POWER_BUDGET_MIN_VOLTAGE, POWER_BUDGET_WRITE_INTERVAL)
+
+@dataclass
+class BudgetGroup:
+    """Motors sharing one supply current allowance; limits are per motor"""
+    name: str
+    motors: list[TalonFX]
+    priority: int
+    stopped_priority: int
+    min_limit: float
+    max_limit: float
+    supply_currents: list[StatusSignal] = field(default_factory=list)
+    base_limits: list[configs.CurrentLimitsConfigs] = field(default_factory=list)
+    applied_limit: float | None = None
+    last_write: float = -float("inf")
+    # Latest limit waiting for the worker; a newer one replaces it instead of queueing behind it
+    pending_limit: float | None = None
+    writing: bool = False
+    current: float = 0.0
+
+class PowerBudget:
+    """
+    Shares a battery-voltage-dependent supply current budget between mechanisms.
+
+    Every loop the budget is interpolated from the filtered battery voltage
+    between POWER_BUDGET_MIN and POWER_BUDGET_MAX. Each group is first guaranteed
+    its minimum limit, then groups are served in priority order: first up to
+    what they are drawing now plus headroom, then any leftover up to their
+    maximum. Groups have one priority while the robot is moving and another
+    while it is stopped. A group's motors only get a new supply limit when it
+    moves by more than the hysteresis, at most once per
+    POWER_BUDGET_WRITE_INTERVAL, and the blocking config writes run on a worker
+    thread that only ever writes a group's latest limit.
+    """
+
+    def __init__(self, moving: Callable[[], bool] = lambda: True, headroom: float = 1.5, hysteresis: float = 5.0,
+                 voltage_alpha: float = 0.2):
+        self.headroom = headroom
+        self.hysteresis = hysteresis
+        self.voltage_alpha = voltage_alpha
+        self.voltage: float | None = None
+        self._moving = moving
+        self._groups: list[BudgetGroup] = []
+        self._stopped_groups: list[BudgetGroup] = []
+        self._lock = threading.Lock()
+        self._config_worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="power-budget")
+        self.config_writes = 0
+
+        self._table = NetworkTableInstance.getDefault().getTable("PowerBudget")
+        self._voltage_pub = self._table.getDoubleTopic("BatteryVoltage").publish()
+        self._budget_pub = self._table.getDoubleTopic("Budget").publish()
+        self._total_pub = self._table.getDoubleTopic("TotalSupplyCurrent").publish()
+        self._writes_pub = self._table.getIntegerTopic("ConfigWrites").publish()
+        self._limit_pubs = {}
+
+    def add(self, name: str, motors: list[TalonFX], priority: int, min_limit: float, max_limit: float,
+            stopped_priority: int | None = None) -> None:
+        """Register a group; lower priority numbers are served first, using stopped_priority while not moving"""
+        group = BudgetGroup(name, motors, priority, priority if stopped_priority is None else stopped_priority,
+                            min_limit, max_limit)
+        for motor in motors:
+            # Keep each motor's existing stator limits when rewriting the supply limit
+            base = configs.CurrentLimitsConfigs()
+            motor.configurator.refresh(base)
+            group.base_limits.append(base)
+            group.supply_currents.append(motor.get_supply_current(False))
+        self._groups.append(group)
+        self._groups.sort(key=lambda g: g.priority)
+        self._stopped_groups.append(group)
+        self._stopped_groups.sort(key=lambda g: g.stopped_priority)
+        self._limit_pubs[name] = self._table.getDoubleTopic(f"Limits/{name}").publish()
+
+    def periodic(self) -> None:
+        # Groups never span CAN buses, and a bulk refresh must stay on one bus
+        for group in self._groups:
+            BaseStatusSignal.refresh_all(*group.supply_currents)
+        battery = RobotController.getBatteryVoltage()
+        if self.voltage is None:
+            self.voltage = battery
+        # Smooth out momentary dips so limits do not chase every spike
+        self.voltage += self.voltage_alpha * (battery - self.voltage)
+        budget = float(np.interp(
+            self.voltage,
+            [POWER_BUDGET_MIN_VOLTAGE, POWER_BUDGET_FULL_VOLTAGE],
+            [POWER_BUDGET_MIN, POWER_BUDGET_MAX],
+        ))
+
+        groups = self._groups if self._moving() else self._stopped_groups
+        limits = {}
+        remaining = budget
+        for group in groups:
+            group.current = max(abs(signal.value) for signal in group.supply_currents)
+            limits[group.name] = group.min_limit
+            remaining -= group.min_limit * len(group.motors)
+        for grow_to in (lambda g: min(g.max_limit, g.current * self.headroom), lambda g: g.max_limit):
+            for group in groups:
+                extra = min(max(grow_to(group) - limits[group.name], 0.0), max(remaining, 0.0) / len(group.motors))
+                limits[group.name] += extra
+                remaining -= extra * len(group.motors)
+
+        now = Timer.getFPGATimestamp()
+        total = 0.0
+        for group in self._groups:
+            total += sum(abs(signal.value) for signal in group.supply_currents)
+            limit = limits[group.name]
+            if ((group.applied_limit is None or abs(limit - group.applied_limit) > self.hysteresis)
+                    and now - group.last_write >= POWER_BUDGET_WRITE_INTERVAL):
+                group.applied_limit = limit
+                group.last_write = now
+                self._request(group, limit)
+            self._limit_pubs[group.name].set(group.applied_limit)
+
+        self._voltage_pub.set(self.voltage)
+        self._budget_pub.set(budget)
+        self._total_pub.set(total)
+        self._writes_pub.set(self.config_writes)
+
+    def _request(self, group: BudgetGroup, limit: float) -> None:
+        with self._lock:
+            group.pending_limit = limit
+            if group.writing:
+                return
+            group.writing = True
+        self._config_worker.submit(self._write_pending, group)
+
+    def _write_pending(self, group: BudgetGroup) -> None:
+        """Worker thread: write the group's latest limit until none is left"""
+        while True:
+            with self._lock:
+                limit, group.pending_limit = group.pending_limit, None
+                if limit is None:
+                    group.writing = False
+                    return
+            self._apply(group, limit)
+
+    def _apply(self, group: BudgetGroup, limit: float) -> None:
+        for motor, base in zip(group.motors, group.base_limits):
+            limits = copy.deepcopy(base)
+            limits.supply_current_limit = limit
+            limits.supply_current_lower_limit = min(base.supply_current_lower_limit, limit)
+            limits.supply_current_limit_enable = True
+            motor.configurator.apply(limits)
+            self.config_writes += 1
@@ -0,0 +1,371 @@
+"""
+Record robot inputs and outputs every loop, and replay them deterministically.
+
+A recording is a JSON-lines file with one frame per scheduler loop holding the
+FPGA timestamp, driver station state, joystick data, mechanism sensor signals,
+the drivetrain pose and the last control request sent to every device.
+
+Replaying runs MyRobot under the simulation HAL on a paused clock that only
+advances by the recorded loop periods, so it runs as fast as the CPU allows.
+Joystick and DS data are fed through DriverStationSim, sensor getters on every
+TalonFX return the recorded values, the drivetrain state is the recorded pose
+and fast control loops are stepped in lockstep with the virtual clock. After
+each loop the requests sent to each device are diffed against the recording.
+
+Usage::
+
+    python -m utils.replay logs/replay.jsonl
+"""
+
+import json
+import math
+import sys
+from dataclasses import dataclass, field
+from typing import Callable
+
+import hal
+from phoenix6 import BaseStatusSignal, StatusCode, swerve
+from phoenix6.hardware import TalonFX
+from wpilib import DriverStation, Timer
+from wpilib.simulation import DriverStationSim, pauseTiming, stepTimingAsync
+from wpimath.geometry import Pose2d, Rotation2d
+from wpimath.kinematics import ChassisSpeeds
+from utils.fast_loop import FastLoop
+
+# TalonFX signal getters that are recorded and replayed, by name (get_<name>); every signal a subsystem reads
+REPLAYED_SIGNALS = ("position", "velocity", "stator_current", "supply_current", "motor_voltage")
+JOYSTICK_PORTS = (0, 1)
+DRIVETRAIN = "drivetrain"
+
+def describe_request(request) -> dict:
+    """Flatten a control request into a JSON-able dict of its settings"""
+    if hasattr(request, "control_info"):
+        info = request.control_info
+    else:
+        info = dict(vars(request), name=type(request).__name__)
+    described = {}
+    for key, value in info.items():
+        if isinstance(value, (bool, int, float, str)):
+            described[key] = value
+        elif hasattr(value, "name") and not callable(value.name):
+            described[key] = value.name
+    return described
+
+def _tap_requests(device, last_requests: dict, name: str) -> Callable[[], None]:
+    """Wrap a device's set_control to remember the last request it was given; returns a function that unwraps it"""
+    set_control = device.set_control
+    wrapped_before = "set_control" in vars(device)
+
+    def tapped(request):
+        last_requests[name] = request
+        return set_control(request)
+
+    def untap():
+        if wrapped_before:
+            device.set_control = set_control
+        else:
+            del device.set_control
+
+    device.set_control = tapped
+    return untap
+
+def _listen_requests(drivetrain, last_requests: dict) -> Callable:
+    """Remember the last request given to the drivetrain; returns the registered listener"""
+    def listener(request):
+        last_requests[DRIVETRAIN] = request
+
+    drivetrain.add_request_listener(listener)
+    return listener
+
+class ReplayRecorder:
+    """Writes one replay frame per loop for the devices of a RobotContainer"""
+
+    def __init__(self, container, path: str):
+        self._motors: dict[str, TalonFX] = container.get_motors()
+        self._drivetrain = container.drivetrain
+        self._file = open(path, "w")
+        self._last_requests = {}
+        self._frame = None
+        self._untaps = [_tap_requests(motor, self._last_requests, name) for name, motor in self._motors.items()]
+        self._listener = _listen_requests(self._drivetrain, self._last_requests)
+        self._signals = {
+            str(motor.device_id): {signal: getattr(motor, f"get_{signal}")(False) for signal in REPLAYED_SIGNALS}
+            for motor in self._motors.values()
+        }
+        self._all_signals = [signal for signals in self._signals.values() for signal in signals.values()]
+
+    def record_inputs(self) -> None:
+        """Capture DS state, joysticks and sensors; call before the scheduler runs"""
+        BaseStatusSignal.refresh_all(*self._all_signals)
+        sensors = {
+            device: {name: signal.value_as_double for name, signal in signals.items()}
+            for device, signals in self._signals.items()
+        }
+        state = self._drivetrain.get_state()
+        sensors[DRIVETRAIN] = {
+            "pose": [state.pose.x, state.pose.y, state.pose.rotation().radians()],
+            "speeds": [state.speeds.vx, state.speeds.vy, state.speeds.omega],
+        }
+        self._frame = {
+            "t": Timer.getFPGATimestamp(),
+            "ds": {
+                "enabled": DriverStation.isEnabled(),
+                "autonomous": DriverStation.isAutonomous(),
+                "test": DriverStation.isTest(),
+                "station": hal.getAllianceStation()[0].name,
+            },
+            "hid": {
+                str(port): {
+                    "axes": [DriverStation.getStickAxis(port, a) for a in range(DriverStation.getStickAxisCount(port))],
+                    "buttons": DriverStation.getStickButtons(port),
+                    "button_count": DriverStation.getStickButtonCount(port),
+                    "povs": [DriverStation.getStickPOV(port, p) for p in range(DriverStation.getStickPOVCount(port))],
+                }
+                for port in JOYSTICK_PORTS
+            },
+            "sensors": sensors,
+        }
+
+    def record_outputs(self) -> None:
+        """Capture the last request sent to each device; call after the scheduler runs"""
+        if self._frame is None:
+            return
+        self._frame["outputs"] = {
+            name: describe_request(request) for name, request in self._last_requests.items()
+        }
+        self._file.write(json.dumps(self._frame) + "\n")
+        self._frame = None
+
+    def flush(self) -> None:
+        """Write buffered frames out, so a recording survives the robot losing power"""
+        if not self._file.closed:
+            self._file.flush()
+
+    def close(self) -> None:
+        """Stop recording and remove the request taps"""
+        if self._file.closed:
+            return
+        for untap in self._untaps:
+            untap()
+        self._drivetrain.remove_request_listener(self._listener)
+        self._file.close()
+
+class _ReplaySignal:
+    """Stand-in for a StatusSignal whose value is read from the current replay frame"""
+
+    def __init__(self, engine: "ReplayEngine", device_id: int, signal: str):
+        self._engine = engine
+        self._device = str(device_id)
+        self._signal = signal
+
+    @property
+    def value(self) -> float:
+        values = self._engine._sensors.get(self._device)
+        return values[self._signal] if values else 0.0
+
+    value_as_double = value
+
+    def refresh(self, report_error: bool = True):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+@dataclass
+class ReplayMismatch:
+    frame: int
+    device: str
+    recorded: dict | None
+    replayed: dict | None
+
+@dataclass
+class ReplayResult:
+    frames: int = 0
+    mismatches: list[ReplayMismatch] = field(default_factory=list)
+
+    @property
+    def matched(self) -> bool:
+        return not self.mismatches
+
+def _requests_match(recorded: dict | None, replayed: dict | None, tolerance: float) -> bool:
+    if recorded is None or replayed is None:
+        return recorded == replayed
+    if recorded.keys() != replayed.keys():
+        return False
+    for key, value in recorded.items():
+        other = replayed[key]
+        if isinstance(value, float) or isinstance(other, float):
+            if not math.isclose(value, other, abs_tol=tolerance):
+                return False
+        elif value != other:
+            return False
+    return True
+
+class ReplayEngine:
+    """Replays a recording through MyRobot, RobotContainer and the command scheduler"""
+
+    def __init__(self, path: str, tolerance: float = 1e-6):
+        with open(path) as f:
+            self._frames = [json.loads(line) for line in f if line.strip()]
+        self._tolerance = tolerance
+        self._sensors: dict = {}
+        # Devices that were recorded; signals of any other device still come from the device
+        self._recorded = set(self._frames[0]["sensors"]) if self._frames else set()
+        self._patched: list[tuple[type, str, object]] = []
+
+    def _patch(self, owner: type, name: str, value) -> None:
+        # None when the attribute is inherited, so removing the patch uncovers the base class's again
+        self._patched.append((owner, name, vars(owner).get(name)))
+        setattr(owner, name, value)
+
+    def _install_signal_hooks(self) -> None:
+        # Patch the class so signals cached by subsystems at construction are replayed too
+        engine = self
+
+        def make_getter(signal, original):
+            def getter(motor, *args, **kwargs):
+                if str(motor.device_id) not in engine._recorded:
+                    return original(motor, *args, **kwargs)
+                return _ReplaySignal(engine, motor.device_id, signal)
+            return getter
+
+        for signal in REPLAYED_SIGNALS:
+            self._patch(TalonFX, f"get_{signal}", make_getter(signal, getattr(TalonFX, f"get_{signal}")))
+
+        # Bulk signal calls only go to the device for signals that are not replayed
+        def skip_replayed(method):
+            def wrapper(*args):
+                leading = [a for a in args if not isinstance(a, (BaseStatusSignal, _ReplaySignal, list))]
+                signals = [
+                    signal
+                    for arg in args if isinstance(arg, (BaseStatusSignal, _ReplaySignal, list))
+                    for signal in (arg if isinstance(arg, list) else [arg])
+                    if not isinstance(signal, _ReplaySignal)
+                ]
+                return method(*leading, *signals) if signals else StatusCode.OK
+            return staticmethod(wrapper)
+
+        for name in ("refresh_all", "wait_for_all", "set_update_frequency_for_all"):
+            self._patch(BaseStatusSignal, name, skip_replayed(getattr(BaseStatusSignal, name)))
+
+    def _remove_signal_hooks(self) -> None:
+        while self._patched:
+            owner, name, original = self._patched.pop()
+            if original is None:
+                delattr(owner, name)
+            else:
+                setattr(owner, name, original)
+
+    def _apply_inputs(self, frame: dict) -> None:
+        ds = frame["ds"]
+        DriverStationSim.setDsAttached(True)
+        DriverStationSim.setEnabled(ds["enabled"])
+        DriverStationSim.setAutonomous(ds["autonomous"])
+        DriverStationSim.setTest(ds["test"])
+        DriverStationSim.setAllianceStationId(hal.AllianceStationID.__members__[ds["station"]])
+        for port, hid in frame["hid"].items():
+            port = int(port)
+            DriverStationSim.setJoystickAxisCount(port, len(hid["axes"]))
+            for axis, value in enumerate(hid["axes"]):
+                DriverStationSim.setJoystickAxis(port, axis, value)
+            DriverStationSim.setJoystickButtonCount(port, hid["button_count"])
+            DriverStationSim.setJoystickButtons(port, hid["buttons"])
+            DriverStationSim.setJoystickPOVCount(port, len(hid["povs"]))
+            for pov, value in enumerate(hid["povs"]):
+                DriverStationSim.setJoystickPOV(port, pov, value)
+        DriverStationSim.notifyNewData()
+        DriverStation.refreshData()
+        self._sensors = frame["sensors"]
+
+    def run(self) -> ReplayResult:
+        """Replay every frame; the signal hooks are removed again when it returns"""
+        self._install_signal_hooks()
+        FastLoop.synchronous = True
+        try:
+            return self._run()
+        finally:
+            FastLoop.synchronous = False
+            self._remove_signal_hooks()
+
+    def _run(self) -> ReplayResult:
+        from robot import MyRobot
+
+        pauseTiming()
+
+        robot = MyRobot()
+        robot.robotInit()
+        container = robot.container
+        drivetrain = container.drivetrain
+        if drivetrain._sim_notifier is not None:
+            # The drivetrain pose comes from the recording, not the physics thread
+            drivetrain._sim_notifier.stop()
+
+        drive_state = swerve.SwerveDrivetrain.SwerveDriveState()
+        drivetrain.get_state = lambda: drive_state
+
+        last_requests = {}
+        for name, motor in container.get_motors().items():
+            _tap_requests(motor, last_requests, name)
+        _listen_requests(drivetrain, last_requests)
+
+        result = ReplayResult()
+        mode = None
+        last_time = None
+        for index, frame in enumerate(self._frames):
+            if last_time is not None:
+                # The FPGA clock counts whole microseconds; an unrounded difference like 0.0199999 would lose one
+                elapsed = max(round(frame["t"] - last_time, 6), 0.0)
+                stepTimingAsync(elapsed)
+                FastLoop.step_all(elapsed)
+            last_time = frame["t"]
+
+            self._apply_inputs(frame)
+            x, y, heading = frame["sensors"][DRIVETRAIN]["pose"]
+            drive_state.pose = Pose2d(x, y, Rotation2d(heading))
+            drive_state.speeds = ChassisSpeeds(*frame["sensors"][DRIVETRAIN]["speeds"])
+
+            mode = self._step_robot(robot, mode)
+
+            recorded_outputs = frame.get("outputs", {})
+            replayed_outputs = {name: describe_request(r) for name, r in last_requests.items()}
+            for device in sorted(recorded_outputs.keys() | replayed_outputs.keys()):
+                recorded = recorded_outputs.get(device)
+                replayed = replayed_outputs.get(device)
+                if not _requests_match(recorded, replayed, self._tolerance):
+                    result.mismatches.append(ReplayMismatch(index, device, recorded, replayed))
+            result.frames += 1
+
+        robot.endCompetition()
+        return result
+
+    @staticmethod
+    def _step_robot(robot, previous_mode: str | None) -> str:
+        """Run one loop of MyRobot the way IterativeRobotBase does"""
+        if not DriverStation.isEnabled():
+            mode = "disabled"
+        elif DriverStation.isAutonomous():
+            mode = "autonomous"
+        elif DriverStation.isTest():
+            mode = "test"
+        else:
+            mode = "teleop"
+
+        if mode != previous_mode:
+            getattr(robot, f"{mode}Init")()
+        getattr(robot, f"{mode}Periodic")()
+        robot.robotPeriodic()
+        return mode
+
+def main(argv: list[str]) -> int:
+    if len(argv) != 1:
+        print("usage: python -m utils.replay <recording.jsonl>")
+        return 2
+
+    result = ReplayEngine(argv[0]).run()
+    for mismatch in result.mismatches[:20]:
+        print(f"frame {mismatch.frame} {mismatch.device}: recorded {mismatch.recorded}, replayed {mismatch.replayed}")
+    print(f"Replayed {result.frames} frames, {len(result.mismatches)} output mismatches")
+    return 0 if result.matched else 1
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
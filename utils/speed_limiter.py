@@ -0,0 +1,114 @@
+import math
+from typing import Callable
+
+from ntcore import NetworkTableInstance
+from wpilib import Timer
+from wpimath.geometry import Translation2d
+
+from utils.constants import (TIP_CG_HEIGHT_STOWED, TIP_CG_RISE, TIP_SAFETY_FACTOR, TIP_STOP_DISTANCE,
+    SPEED_LIMIT_MAX_HEIGHT, SPEED_LIMIT_BIN_SIZE)
+
+GRAVITY = 9.81  # m/s^2
+
+def tip_safe_limits(height: float, support: float, max_speed: float) -> tuple[float, float]:
+    """
+    Translational speed (m/s) and acceleration (m/s^2) caps with the elevator at
+    height inches, for wheels support meters from the robot center along the
+    narrowest axis.
+    """
+    cg_height = TIP_CG_HEIGHT_STOWED + TIP_CG_RISE * height
+    acceleration = TIP_SAFETY_FACTOR * GRAVITY * support / cg_height
+    # Fast enough to still stop within the stop distance at that acceleration
+    speed = min(max_speed, math.sqrt(2 * acceleration * TIP_STOP_DISTANCE))
+    return speed, acceleration
+
+class SpeedLimiter:
+    """
+    Caps translational drive speed and acceleration by elevator height.
+
+    The caps are precomputed into a table with one entry per
+    SPEED_LIMIT_BIN_SIZE inches, each holding the limits at the top of its
+    bin, so a lookup is one index. apply() clamps the requested field velocity
+    to the speed cap, then slews it from the last command by at most the
+    acceleration cap over the time since then, never more than one loop. After
+    a gap in calls it slews from measured_velocity(), the robot's measured
+    velocity in the same operator-relative frame, so taking over a moving or
+    stopped robot is limited too. Stopping goes through apply() as well, which
+    keeps hard stops from tipping the robot. The limited velocity is left in
+    velocity_x and velocity_y.
+    Commands that profile their own motion, like alignment and path following,
+    read the caps with speed_cap_at() and acceleration_cap_at() or scale their
+    output with clamp() instead.
+    """
+
+    def __init__(self, height: Callable[[], float], module_locations: list[Translation2d], max_speed: float,
+                 measured_velocity: Callable[[], tuple[float, float]], loop_period: float = 0.02):
+        self._height = height
+        self._measured_velocity = measured_velocity
+        self._loop_period = loop_period
+        support = min(min(abs(location.x), abs(location.y)) for location in module_locations)
+        bins = math.ceil(SPEED_LIMIT_MAX_HEIGHT / SPEED_LIMIT_BIN_SIZE)
+        limits = [tip_safe_limits((i + 1) * SPEED_LIMIT_BIN_SIZE, support, max_speed) for i in range(bins)]
+        self._speed_caps = [speed for speed, _ in limits]
+        self._acceleration_caps = [acceleration for _, acceleration in limits]
+        self.speed_cap = self._speed_caps[0]
+        self.acceleration_cap = self._acceleration_caps[0]
+        self.velocity_x = 0.0
+        self.velocity_y = 0.0
+        self._last_call = 0.0
+
+        table = NetworkTableInstance.getDefault().getTable("SpeedLimit")
+        self._speed_pub = table.getDoubleTopic("SpeedCap").publish()
+        self._acceleration_pub = table.getDoubleTopic("AccelerationCap").publish()
+
+    def _bin(self, height: float) -> int:
+        return min(max(int(height / SPEED_LIMIT_BIN_SIZE), 0), len(self._speed_caps) - 1)
+
+    def speed_cap_at(self, height: float) -> float:
+        """Translational speed cap in m/s with the elevator at height inches"""
+        return self._speed_caps[self._bin(height)]
+
+    def acceleration_cap_at(self, height: float) -> float:
+        """Translational acceleration cap in m/s^2 with the elevator at height inches"""
+        return self._acceleration_caps[self._bin(height)]
+
+    def clamp(self, velocity_x: float, velocity_y: float) -> tuple[float, float]:
+        """A field velocity in m/s scaled down to the speed cap at the current height, without slewing"""
+        cap = self.speed_cap_at(self._height())
+        speed = math.hypot(velocity_x, velocity_y)
+        if speed > cap:
+            return velocity_x * cap / speed, velocity_y * cap / speed
+        return velocity_x, velocity_y
+
+    def apply(self, velocity_x: float, velocity_y: float) -> None:
+        """Limit a requested field velocity in m/s; read the result from velocity_x and velocity_y"""
+        index = self._bin(self._height())
+        self.speed_cap = self._speed_caps[index]
+        self.acceleration_cap = self._acceleration_caps[index]
+
+        speed = math.hypot(velocity_x, velocity_y)
+        if speed > self.speed_cap:
+            velocity_x *= self.speed_cap / speed
+            velocity_y *= self.speed_cap / speed
+        now = Timer.getFPGATimestamp()
+        dt = now - self._last_call
+        self._last_call = now
+        if dt > 5 * self._loop_period:
+            # Another command had the drivetrain; slew from how fast the robot is actually going
+            self.velocity_x, self.velocity_y = self._measured_velocity()
+            dt = self._loop_period
+        # A second call within the same loop only gets the time since the first
+        dt = min(dt, self._loop_period)
+
+        delta_x = velocity_x - self.velocity_x
+        delta_y = velocity_y - self.velocity_y
+        change = math.hypot(delta_x, delta_y)
+        max_change = self.acceleration_cap * dt
+        if change > max_change:
+            delta_x *= max_change / change
+            delta_y *= max_change / change
+        self.velocity_x += delta_x
+        self.velocity_y += delta_y
+
+        self._speed_pub.set(self.speed_cap)
+        self._acceleration_pub.set(self.acceleration_cap)
@@ -0,0 +1,105 @@
+import functools
+import json
+import os
+import threading
+import time
+from typing import Callable
+
+import commands2
+
+from utils.constants import TRACE_MAX_EVENTS
+
+class Tracer:
+    """
+    Records begin/end spans for robot loop work and writes them as a Chrome Trace
+    Event file that opens in Perfetto (ui.perfetto.dev) or chrome://tracing.
+
+    Each span is kept in memory as a tuple until flush(), so tracing costs two
+    clock reads and a list append per call and never touches the disk mid-loop.
+    Each flush writes a new numbered file and releases the spans it wrote;
+    recording stops once max_events spans are held between flushes.
+    """
+
+    def __init__(self, max_events: int = TRACE_MAX_EVENTS):
+        self.max_events = max_events
+        self.dropped = 0
+        self.flushes = 0
+        self._events: list[tuple[str, str, int, int, int]] = []
+        self._thread_names: dict[int, str] = {}
+        self._origin = time.perf_counter_ns()
+
+    def wrap(self, fn: Callable, name: str, category: str) -> Callable:
+        """Return fn wrapped so every call is recorded as a span"""
+        if getattr(fn, "__traced__", False):
+            return fn
+        events = self._events
+        thread_names = self._thread_names
+
+        @functools.wraps(fn)
+        def traced(*args, **kwargs):
+            start = time.perf_counter_ns()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                end = time.perf_counter_ns()
+                tid = threading.get_native_id()
+                if tid not in thread_names:
+                    thread_names[tid] = threading.current_thread().name
+                if len(events) < self.max_events:
+                    events.append((name, category, tid, start, end))
+                else:
+                    self.dropped += 1
+
+        traced.__traced__ = True
+        return traced
+
+    def instrument(self, container) -> None:
+        """Trace the scheduler loop, subsystem periodics, command executes, odometry telemetry and the sim thread"""
+        scheduler = commands2.CommandScheduler.getInstance()
+        # MyRobot.robotPeriodic looks run up on the instance every loop, and is its only scheduler pass
+        scheduler.run = self.wrap(scheduler.run, "CommandScheduler.run", "scheduler")
+
+        for subsystem in vars(container).values():
+            if isinstance(subsystem, commands2.Subsystem):
+                subsystem.periodic = self.wrap(subsystem.periodic, f"{subsystem.getName()}.periodic", "subsystem")
+
+        # Top-level commands are wrapped as they are scheduled
+        def on_initialize(command: commands2.Command):
+            command.execute = self.wrap(command.execute, f"{command.getName()}.execute", "command")
+        scheduler.onCommandInitialize(on_initialize)
+
+        # Both are looked up on the instance each call, from the odometry and sim threads
+        logger = container._logger
+        logger.telemeterize = self.wrap(logger.telemeterize, "Telemetry.telemeterize", "odometry")
+        drivetrain = container.drivetrain
+        drivetrain.update_sim_state = self.wrap(drivetrain.update_sim_state, "update_sim_state", "sim")
+
+    def trace_events(self, spans: list[tuple[str, str, int, int, int]] | None = None) -> list[dict]:
+        pid = os.getpid()
+        events = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+            for tid, name in list(self._thread_names.items())
+        ]
+        for name, category, tid, start, end in list(self._events) if spans is None else spans:
+            events.append({
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "pid": pid,
+                "tid": tid,
+                "ts": (start - self._origin) / 1000,
+                "dur": (end - start) / 1000,
+            })
+        return events
+
+    def flush(self, path: str) -> str:
+        """Write the spans recorded since the last flush to a numbered file next to path and drop them"""
+        # Spans appended by other threads while writing stay for the next flush
+        spans = self._events[:]
+        del self._events[:len(spans)]
+        self.flushes += 1
+        root, ext = os.path.splitext(path)
+        numbered = f"{root}-{self.flushes}{ext}"
+        with open(numbered, "w") as f:
+            json.dump({"traceEvents": self.trace_events(spans), "displayTimeUnit": "ms"}, f)
+        return numbered
@@ -0,0 +1,180 @@
+import math
+
+import numpy as np
+from ntcore import NetworkTableInstance
+from phoenix6 import swerve
+from wpilib import Alert
+from wpimath.geometry import Translation2d
+
+from utils.constants import (TRACTION_SLIP_RESIDUAL, TRACTION_SLIP_YAW_ERROR, TRACTION_SLIP_COMMAND_ERROR,
+    TRACTION_COLLISION_ACCEL, TRACTION_HOLD_TIME, TRACTION_WINDOW, ODOMETRY_STD_DEVS, TRACTION_LOST_STD_DEV_SCALE)
+
+class TractionMonitor:
+    """
+    Flags wheel slip and collisions from every swerve drive state.
+
+    update() runs on the odometry thread. It fits one rigid-body chassis motion
+    (vx, vy, omega) to the four measured module velocities with a precomputed
+    least-squares solve, then checks three slip signs: a module far off the fit,
+    a module still speeding up past its commanded speed, or, over each
+    TRACTION_WINDOW, a wheel-derived yaw rate that disagrees with the gyro. A
+    fitted chassis acceleration over the window beyond what the drive can
+    produce, while the gap to the commanded chassis velocity grows, is a
+    collision. Either one holds a low-confidence window for
+    TRACTION_HOLD_TIME. publish() runs on the main thread, reports to the
+    Traction table and widens the pose estimator's odometry standard deviations
+    while a window is open.
+    """
+
+    def __init__(self, drivetrain: swerve.SwerveDrivetrain, module_locations: list[Translation2d]):
+        self._drivetrain = drivetrain
+        # Module velocity = A @ (vx, vy, omega); rows alternate x and y per module
+        kinematics = np.zeros((2 * len(module_locations), 3))
+        for i, location in enumerate(module_locations):
+            kinematics[2 * i] = (1.0, 0.0, -location.y)
+            kinematics[2 * i + 1] = (0.0, 1.0, location.x)
+        self._kinematics = kinematics
+        self._fit_matrix = np.linalg.pinv(kinematics)
+        count = len(module_locations)
+        # Scratch arrays so the odometry thread never allocates
+        self._measured = np.zeros(2 * count)
+        self._speeds = np.zeros(count)
+        self._last_speeds = np.zeros(count)
+        self._angles = np.zeros(count)
+        self._targets = np.zeros(count)
+        self._target_angles = np.zeros(count)
+        self._commanded = np.zeros(2 * count)
+        self._command_fit = np.zeros(3)
+        self._scratch = np.zeros(count)
+        self._rising = np.zeros(count, dtype=bool)
+        self._fit = np.zeros(3)
+        self._fitted = np.zeros(2 * count)
+        self._residual = np.zeros(2 * count)
+        self._residual_norms = np.zeros(count)
+        self._window_fit = np.zeros(3)
+        self._window_speed_error = 0.0
+        self._window_start: float | None = None
+        self._window_heading = 0.0
+        self._fit_yaw = 0.0
+        self._last_timestamp = 0.0
+
+        self.slipping = False
+        self.colliding = False
+        self.slip_events = 0
+        self.collision_events = 0
+        self.max_residual = 0.0
+        self.yaw_rate_error = 0.0
+        self.acceleration = 0.0
+        self._slip_until = 0.0
+        self._collision_until = 0.0
+        self._now = 0.0
+        self._low_confidence = False
+
+        table = NetworkTableInstance.getDefault().getTable("Traction")
+        self._slipping_pub = table.getBooleanTopic("Slipping").publish()
+        self._colliding_pub = table.getBooleanTopic("Colliding").publish()
+        self._slip_events_pub = table.getIntegerTopic("SlipEvents").publish()
+        self._collision_events_pub = table.getIntegerTopic("CollisionEvents").publish()
+        self._residual_pub = table.getDoubleTopic("MaxModuleResidual").publish()
+        self._yaw_error_pub = table.getDoubleTopic("YawRateError").publish()
+        self._acceleration_pub = table.getDoubleTopic("Acceleration").publish()
+        self._confidence_pub = table.getDoubleTopic("OdometryConfidence").publish()
+        self._alert = Alert("Collision detected, odometry trust reduced", Alert.AlertType.kWarning)
+
+    def update(self, state: swerve.SwerveDrivetrain.SwerveDriveState) -> None:
+        for i, (measured, target) in enumerate(zip(state.module_states, state.module_targets)):
+            self._speeds[i] = measured.speed
+            self._angles[i] = measured.angle.radians()
+            self._targets[i] = target.speed
+            self._target_angles[i] = target.angle.radians()
+        measured = self._measured
+        np.cos(self._angles, out=self._scratch)
+        np.multiply(self._speeds, self._scratch, out=measured[0::2])
+        np.sin(self._angles, out=self._scratch)
+        np.multiply(self._speeds, self._scratch, out=measured[1::2])
+        np.dot(self._fit_matrix, measured, out=self._fit)
+        np.dot(self._kinematics, self._fit, out=self._fitted)
+        np.subtract(measured, self._fitted, out=self._residual)
+        np.hypot(self._residual[0::2], self._residual[1::2], out=self._residual_norms)
+        self.max_residual = float(self._residual_norms.max())
+        commanded = self._commanded
+        np.cos(self._target_angles, out=self._scratch)
+        np.multiply(self._targets, self._scratch, out=commanded[0::2])
+        np.sin(self._target_angles, out=self._scratch)
+        np.multiply(self._targets, self._scratch, out=commanded[1::2])
+        np.dot(self._fit_matrix, commanded, out=self._command_fit)
+        speed_error = math.hypot(self._fit[0] - self._command_fit[0], self._fit[1] - self._command_fit[1])
+        # A wheel still speeding up past its commanded speed has broken loose;
+        # with nothing commanded the robot is only being pushed
+        np.abs(self._speeds, out=self._speeds)
+        np.abs(self._targets, out=self._targets)
+        np.subtract(self._speeds, self._targets, out=self._scratch)
+        np.greater(self._speeds, self._last_speeds, out=self._rising)
+        np.multiply(self._scratch, self._rising, out=self._scratch)
+        over_command = float(self._scratch.max()) if self._targets.any() else 0.0
+        self._last_speeds[:] = self._speeds
+
+        heading = state.raw_heading.radians()
+        timestamp = state.timestamp
+        self._now = timestamp
+        if self._window_start is None:
+            self._start_window(timestamp, heading, speed_error)
+            return
+        # Rates are taken over a short window rather than between samples, which
+        # are too close together and too unevenly spaced to differentiate
+        self._fit_yaw += self._fit[2] * (timestamp - self._last_timestamp)
+        self._last_timestamp = timestamp
+        if self.max_residual > TRACTION_SLIP_RESIDUAL or over_command > TRACTION_SLIP_COMMAND_ERROR:
+            self._slip(timestamp)
+        elapsed = timestamp - self._window_start
+        if elapsed < TRACTION_WINDOW:
+            return
+
+        gyro_yaw = math.remainder(heading - self._window_heading, math.tau)
+        self.yaw_rate_error = abs(self._fit_yaw - gyro_yaw) / elapsed
+        self.acceleration = math.hypot(self._fit[0] - self._window_fit[0], self._fit[1] - self._window_fit[1]) / elapsed
+        if self.yaw_rate_error > TRACTION_SLIP_YAW_ERROR:
+            self._slip(timestamp)
+        # Hard acceleration toward the commanded speed is just the drive; away from it is an impact
+        if self.acceleration > TRACTION_COLLISION_ACCEL and speed_error > self._window_speed_error:
+            if timestamp >= self._collision_until:
+                self.collision_events += 1
+            self._collision_until = timestamp + TRACTION_HOLD_TIME
+        self._start_window(timestamp, heading, speed_error)
+
+    def _start_window(self, timestamp: float, heading: float, speed_error: float) -> None:
+        self._window_start = timestamp
+        self._window_speed_error = speed_error
+        self._window_heading = heading
+        self._window_fit[:] = self._fit
+        self._fit_yaw = 0.0
+        self._last_timestamp = timestamp
+
+    def _slip(self, timestamp: float) -> None:
+        if timestamp >= self._slip_until:
+            self.slip_events += 1
+        self._slip_until = timestamp + TRACTION_HOLD_TIME
+
+    def confidence(self) -> float:
+        """1 while traction is good, down to 1 / TRACTION_LOST_STD_DEV_SCALE inside a slip or collision window"""
+        return 1.0 / TRACTION_LOST_STD_DEV_SCALE if self._low_confidence else 1.0
+
+    def publish(self) -> None:
+        # Written by the odometry thread; a reading one sample stale is fine
+        self.slipping = self._now < self._slip_until
+        self.colliding = self._now < self._collision_until
+        low_confidence = self.slipping or self.colliding
+        if low_confidence != self._low_confidence:
+            self._low_confidence = low_confidence
+            scale = TRACTION_LOST_STD_DEV_SCALE if low_confidence else 1.0
+            self._drivetrain.set_state_std_devs(tuple(std_dev * scale for std_dev in ODOMETRY_STD_DEVS))
+
+        self._slipping_pub.set(self.slipping)
+        self._colliding_pub.set(self.colliding)
+        self._slip_events_pub.set(self.slip_events)
+        self._collision_events_pub.set(self.collision_events)
+        self._residual_pub.set(self.max_residual)
+        self._yaw_error_pub.set(self.yaw_rate_error)
+        self._acceleration_pub.set(self.acceleration)
+        self._confidence_pub.set(self.confidence())
+        self._alert.set(self.colliding)
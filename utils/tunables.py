@@ -0,0 +1,135 @@
+import copy
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable
+
+from ntcore import Event, EventFlags, NetworkTableInstance
+from phoenix6 import configs
+from phoenix6.hardware import TalonFX
+
+# Slot gain fields exposed for tuning, as (NT name, Slot0Configs attribute, builder method)
+SLOT_GAINS = [
+    ("kP", "k_p", "with_k_p"),
+    ("kI", "k_i", "with_k_i"),
+    ("kD", "k_d", "with_k_d"),
+    ("kS", "k_s", "with_k_s"),
+    ("kV", "k_v", "with_k_v"),
+    ("kA", "k_a", "with_k_a"),
+    ("kG", "k_g", "with_k_g"),
+]
+
+class Tunable:
+    """A single value published under the Tuning table that calls back when edited"""
+
+    def __init__(self, key: str, default: float, on_change: Callable[[float], None] | None):
+        self.key = key
+        self.default = default
+        self.value = default
+        self.on_change = on_change
+
+class TunablesRegistry:
+    """
+    Publishes gains to NetworkTables so they can be edited live from a dashboard.
+
+    Edits are delivered by NT listener callbacks rather than polled every loop.
+    Callbacks run on the listener thread, so gains used by a fast loop should be
+    handed over through a Mailbox; anything that writes device configs is handed
+    to a single worker thread so the blocking CAN call never runs on the main
+    robot loop.
+    """
+
+    def __init__(self, table: str = "Tuning"):
+        self._inst = NetworkTableInstance.getDefault()
+        self._table = self._inst.getTable(table)
+        self._tunables: dict[str, Tunable] = {}
+        self._entries = {}
+        self._slot_groups: list[str] = []
+        self._lock = threading.Lock()
+        self._config_worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tunables")
+
+    def add(self, key: str, default: float, on_change: Callable[[float], None] | None = None) -> Tunable:
+        """Register a tunable value; re-registering a key replaces its entry, default and callback"""
+        with self._lock:
+            tunable = Tunable(key, default, on_change)
+            replaced = key in self._tunables
+            self._tunables[key] = tunable
+            if replaced:
+                # The listener looks the tunable up by key, so it already delivers to the new one
+                self._entries[key].set(default)
+                return tunable
+
+            entry = self._table.getDoubleTopic(key).getEntry(default)
+            entry.set(default)
+            self._entries[key] = entry
+            self._inst.addListener(entry, EventFlags.kValueAll, lambda event: self._on_event(self._tunables[key], event))
+            return tunable
+
+    def add_slot_gains(self, prefix: str, gains: configs.Slot0Configs, motors: Callable[[], Iterable[TalonFX]]) -> None:
+        """
+        Register every gain of a Slot0Configs under prefix.
+
+        When any of them changes, a copy of the slot config with the new values is
+        applied to all motors returned by the supplier on the config worker thread.
+        """
+        def apply_gains():
+            slot = copy.deepcopy(gains)
+            for motor in motors():
+                motor.configurator.apply(slot)
+
+        if prefix not in self._slot_groups:
+            self._slot_groups.append(prefix)
+        for name, attribute, _ in SLOT_GAINS:
+            def on_change(value: float, attribute=attribute):
+                setattr(gains, attribute, value)
+                self._config_worker.submit(apply_gains)
+            self.add(f"{prefix}/{name}", getattr(gains, attribute), on_change)
+
+    def _on_event(self, tunable: Tunable, event: Event) -> None:
+        value = event.data.value.getDouble()
+        if value == tunable.value:
+            return
+        tunable.value = value
+        if tunable.on_change is not None:
+            try:
+                tunable.on_change(value)
+            except Exception as e:
+                print(f"Tunable {tunable.key} error: {e}")
+
+    def get(self, key: str) -> float:
+        return self._tunables[key].value
+
+    def export_source(self) -> str:
+        """Render every value that differs from its default as Python source to paste back"""
+        lines = ["# Tuned values; copy the changed ones back into the source"]
+        for key, tunable in sorted(self._tunables.items()):
+            if tunable.value != tunable.default:
+                name = key.replace("/", "_").upper()
+                lines.append(f"{name} = {tunable.value!r}  # was {tunable.default!r}")
+        for prefix in self._slot_groups:
+            lines.append(f"# {prefix}")
+            lines.append("configs.Slot0Configs()")
+            for name, _, builder in SLOT_GAINS:
+                lines.append(f"    .{builder}({self._tunables[f'{prefix}/{name}'].value!r})")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: str) -> None:
+        with open(path, "w") as f:
+            f.write(self.export_source())
+
+    def add_export_button(self, path: str, key: str = "Export") -> None:
+        """Publish a boolean that writes export_source() to path when set to true"""
+        if key in self._entries:
+            return
+        entry = self._table.getBooleanTopic(key).getEntry(False)
+        entry.set(False)
+        self._entries[key] = entry
+
+        def on_event(event: Event):
+            if event.data.value.getBoolean():
+                self._config_worker.submit(self.export, path)
+                entry.set(False)
+
+        self._inst.addListener(entry, EventFlags.kValueAll, on_event)
+
+TUNABLES = TunablesRegistry()
+"""Shared registry for all live-tunable values"""